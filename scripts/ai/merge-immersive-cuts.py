@@ -5,6 +5,7 @@ import argparse
 import datetime as dt
 import re
 import shutil
+import sys
 from pathlib import Path
 from typing import Any
 
@@ -13,6 +14,13 @@ try:
 except ModuleNotFoundError:  # pragma: no cover
     yaml = None
 
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from toc.harness import append_state_snapshot  # noqa: E402
+from toc.manifest import load_manifest_data  # noqa: E402
+
 
 def now_iso() -> str:
     return dt.datetime.now().astimezone().isoformat(timespec="seconds")
@@ -34,13 +42,7 @@ def replace_yaml_block(text: str, new_yaml: str) -> str:
 
 
 def append_state_block(state_path: Path, kv: dict[str, str]) -> None:
-    state_path.parent.mkdir(parents=True, exist_ok=True)
-    lines = [f"{k}={v}" for k, v in kv.items()]
-    block = "\n".join(lines) + "\n---\n"
-    if state_path.exists():
-        state_path.write_text(state_path.read_text(encoding="utf-8") + block, encoding="utf-8")
-        return
-    state_path.write_text(block, encoding="utf-8")
+    append_state_snapshot(state_path, kv)
 
 
 def _as_int(value: Any) -> int | None:
@@ -156,10 +158,10 @@ def main() -> None:
         raise SystemExit("PyYAML is required. Install with: pip install pyyaml")
 
     md = manifest_path.read_text(encoding="utf-8")
-    y = extract_yaml_block(md)
-    manifest = yaml.safe_load(y)
-    if not isinstance(manifest, dict):
-        raise SystemExit("Manifest YAML must be a mapping at the root.")
+    try:
+        manifest = load_manifest_data(manifest_path)
+    except ValueError as e:
+        raise SystemExit(str(e)) from e
     raw_scenes = manifest.get("scenes")
     if not isinstance(raw_scenes, list):
         raise SystemExit("Manifest YAML scenes must be a list.")
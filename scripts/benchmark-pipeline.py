@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ToC pipeline end-to-end on synthetic manifests of increasing size.
+
+For each cut count this runs, against a local mock provider server (no paid calls):
+
+  scaffold        scripts/toc-run.py
+  generate_assets scripts/generate-assets-from-manifest.py   (mock Gemini/Kling/ElevenLabs)
+  placeholder     scripts/generate-placeholder-assets.py     (decodable media; needs ffmpeg)
+  clip_lists      scripts/build-clip-lists.py
+  render          scripts/render-video.py                    (needs ffmpeg)
+  verify          scripts/verify-pipeline.py --profile fast
+
+and records wall-clock, peak RSS of the process tree, processes spawned and bytes
+added per stage. Results are appended to a JSON history and compared against a stored
+baseline (`--update-baseline` replaces it).
+
+Example:
+  python scripts/benchmark-pipeline.py --cuts 10,100,500 --latency lognormal:200,0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from toc.benchmark import StageResult, append_history, find_regressions, run_stage, synthetic_manifest  # noqa: E402
+from toc.harness import now_iso  # noqa: E402
+from toc.mock_providers import Latency, MockBehavior, MockProviderServer  # noqa: E402
+
+
+def _git_rev() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(REPO_ROOT), capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _parse_cuts(raw: str) -> list[int]:
+    try:
+        cuts = [int(x) for x in raw.split(",") if x.strip()]
+    except ValueError as e:
+        raise SystemExit(f"Invalid --cuts: {raw}") from e
+    if not cuts or any(c <= 0 for c in cuts):
+        raise SystemExit(f"Invalid --cuts: {raw}")
+    return cuts
+
+
+def bench_size(cuts: int, *, work_root: Path, env: dict[str, str], args: argparse.Namespace) -> dict[str, Any]:
+    run_dir = work_root / f"cuts{cuts}"
+    if run_dir.exists():
+        shutil.rmtree(run_dir)
+    log_path = work_root / f"cuts{cuts}.log"
+    py = sys.executable
+    manifest = run_dir / "video_manifest.md"
+    have_ffmpeg = shutil.which("ffmpeg") is not None
+    stages: list[StageResult] = []
+
+    def stage(name: str, cmd: list[str], *, ok_returncodes: tuple[int, ...] = (0,)) -> StageResult:
+        result = run_stage(
+            name, cmd, cwd=REPO_ROOT, env=env, measure_dir=run_dir, log_path=log_path, ok_returncodes=ok_returncodes
+        )
+        stages.append(result)
+        print(
+            f"[bench] {cuts:>4} cuts  {name:<16} {result.status:<7} {result.wall_seconds:8.2f}s"
+            f"  rss={result.peak_rss_bytes / 2**20:6.1f}MiB  procs>={result.sampled_process_count}"
+            f"  written={result.bytes_written / 2**20:.1f}MiB",
+            flush=True,
+        )
+        return result
+
+    def skipped(name: str, note: str) -> None:
+        stages.append(StageResult(name=name, status="skipped", note=note))
+        print(f"[bench] {cuts:>4} cuts  {name:<16} skipped ({note})", flush=True)
+
+    stage("scaffold", [py, "scripts/toc-run.py", "benchmark", "--run-dir", str(run_dir), "--timestamp", "bench", "--force"])
+    manifest.write_text(synthetic_manifest(cuts), encoding="utf-8")
+
+    gen_cmd = [py, "scripts/generate-assets-from-manifest.py", "--manifest", str(manifest), "--poll-every", str(args.poll_every)]
+    gen_cmd.append("--generation-cache" if args.generation_cache else "--no-generation-cache")
+    if args.max_workers is not None:
+        gen_cmd += ["--max-workers", str(args.max_workers)]
+    stage("generate_assets", gen_cmd)
+
+    if have_ffmpeg:
+        stage("placeholder", [py, "scripts/generate-placeholder-assets.py", "--manifest", str(manifest), "--force"])
+    else:
+        skipped("placeholder", "ffmpeg not found")
+
+    stage("clip_lists", [py, "scripts/build-clip-lists.py", "--manifest", str(manifest), "--out-dir", str(run_dir)])
+
+    if have_ffmpeg:
+        stage(
+            "render",
+            [
+                py,
+                "scripts/render-video.py",
+                "--clip-list",
+                str(run_dir / "video_clips.txt"),
+                "--narration-list",
+                str(run_dir / "video_narration_list.txt"),
+                "--out",
+                str(run_dir / "video.mp4"),
+            ],
+        )
+    else:
+        skipped("render", "ffmpeg not found")
+
+    # A synthetic run never passes every content check; only a crash counts as failure.
+    stage("verify", [py, "scripts/verify-pipeline.py", "--run-dir", str(run_dir), "--flow", "toc-run", "--profile", "fast"], ok_returncodes=(0, 1))
+
+    return {
+        "cuts": cuts,
+        "total_seconds": round(sum(s.wall_seconds for s in stages), 4),
+        "stages": [s.to_dict() for s in stages],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end ToC pipeline benchmark with regression tracking.")
+    parser.add_argument("--cuts", default="10,100", help="Comma-separated manifest sizes (e.g. 10,100,500).")
+    parser.add_argument("--work-dir", default=None, help="Where run dirs are created (default: a temp dir).")
+    parser.add_argument("--keep", action="store_true", help="Keep the work dir after the run.")
+    parser.add_argument("--history", default="output/benchmarks/history.json")
+    parser.add_argument("--baseline", default="output/benchmarks/baseline.json")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown ratio before flagging.")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="Ignore wall-clock changes smaller than this.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--poll-every", type=float, default=0.2)
+    parser.add_argument("--generation-cache", action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("--latency", default="fixed:0", help="Mock provider latency (see mock-provider-server.py).")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--job-seconds", type=float, default=0.0)
+    args = parser.parse_args()
+
+    cuts_list = _parse_cuts(args.cuts)
+    try:
+        latency = Latency.parse(args.latency)
+    except ValueError as e:
+        raise SystemExit(str(e)) from e
+    behavior = MockBehavior(latency=latency, error_rate=args.error_rate, job_seconds=args.job_seconds)
+
+    work_root = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="toc-bench-"))
+    work_root.mkdir(parents=True, exist_ok=True)
+
+    record: dict[str, Any] = {
+        "ts": now_iso(),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": shutil.which("ffmpeg") is not None,
+        "mock": {"latency": args.latency, "error_rate": args.error_rate, "job_seconds": args.job_seconds},
+        "max_workers": args.max_workers,
+        "runs": [],
+    }
+    started = time.perf_counter()
+    try:
+        with MockProviderServer(behavior) as server:
+            env = {
+                **os.environ,
+                **server.env(),
+                "TOC_GENERATION_CACHE_DIR": str(work_root / "generation-cache"),
+                "TOC_RENDER_SEGMENT_CACHE_DIR": str(work_root / "segments"),
+            }
+            for cuts in cuts_list:
+                record["runs"].append(bench_size(cuts, work_root=work_root, env=env, args=args))
+            record["mock"]["stats"] = server.stats()
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_root, ignore_errors=True)
+    record["total_seconds"] = round(time.perf_counter() - started, 4)
+
+    history_path = Path(args.history)
+    baseline_path = Path(args.baseline)
+    regressions: list[str] = []
+    if baseline_path.exists() and not args.update_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        regressions = find_regressions(record, baseline, tolerance=args.tolerance, min_seconds=args.min_seconds)
+    record["regressions"] = regressions
+    append_history(history_path, record)
+    if args.update_baseline or not baseline_path.exists():
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(record, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline: {baseline_path}")
+
+    print(f"History: {history_path}")
+    failed = [f"{r['cuts']} cuts / {s['name']}" for r in record["runs"] for s in r["stages"] if s["status"] == "failed"]
+    for name in failed:
+        print(f"[bench] FAILED: {name}", file=sys.stderr)
+    for line in regressions:
+        print(f"[bench] REGRESSION: {line}", file=sys.stderr)
+    if failed or (regressions and args.fail_on_regression):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
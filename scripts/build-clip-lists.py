@@ -10,8 +10,16 @@ import argparse
 import glob
 import os
 import re
+import sys
 from pathlib import Path
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from toc.manifest import load_manifest  # noqa: E402
+
+
 def parse_manifest(path: Path):
     clips = []
     narrations = []
@@ -65,6 +73,17 @@ def parse_manifest(path: Path):
     return clips, narrations
 
 
+def manifest_outputs(path: Path):
+    """Video/narration outputs in cut order, from the compiled manifest (line parser as fallback)."""
+    try:
+        manifest = load_manifest(path)
+    except Exception:
+        return parse_manifest(path)
+    clips = [cut.video_output for cut in manifest.iter_cuts() if cut.video_output]
+    narrations = [cut.narration_output for cut in manifest.iter_cuts() if cut.narration_output]
+    return clips, narrations
+
+
 def write_concat_list(paths, out_path: Path, dry_run: bool):
     lines = [f"file '{p}'" for p in paths]
     if dry_run:
@@ -105,7 +124,7 @@ def main():
         raise SystemExit("No manifest files found. Use --manifest, --story-dir, or --dir.")
 
     for manifest in manifest_paths:
-        clips, narrations = parse_manifest(manifest)
+        clips, narrations = manifest_outputs(manifest)
 
         base = manifest.stem
         if base.endswith("_manifest"):
@@ -21,7 +21,7 @@ import tempfile
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 try:
     import yaml  # type: ignore[import-not-found]
@@ -32,17 +32,26 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from toc.dirty import inputs_key, invalidate, is_stale, record_inputs
 from toc.env import load_env_files
+from toc.gencache import GenerationCache, generation_key
 from toc.http import HttpError, request_bytes
+from toc.imaging import hstack_files, save_image_bytes
+from toc.journal import JobJournal
+from toc.manifest import load_manifest_data, load_yaml
 from toc.providers.elevenlabs import DEFAULT_ELEVENLABS_VOICE_ID, ElevenLabsClient, ElevenLabsConfig
 from toc.providers.evolink import EvoLinkClient, EvoLinkConfig
-from toc.providers.gemini import GeminiClient, GeminiConfig
+from toc.providers.gemini import GeminiClient, GeminiConfig, gemini_files_api_enabled
 from toc.providers.kling import KlingClient, KlingConfig
 from toc.providers.seedance import SeedanceClient, SeedanceConfig
 from toc.providers.seadream import SeaDreamClient, SeaDreamConfig
+from toc.scheduler import TaskGraph
+from toc.system_config import configured_max_workers
 
 
 ALLOWED_VEO_DURATIONS = (4, 6, 8)
+GEMINI_IMAGE_TOOLS = {"google_nanobanana_pro", "nanobanana_pro"}
+GEMINI_BATCH_TASK_KEY = "image:gemini-batch"
 
 
 @dataclass
@@ -458,7 +467,10 @@ def _parse_manifest_yaml_pyyaml(yaml_text: str) -> tuple[dict, AssetGuides, list
     if yaml is None:  # pragma: no cover
         raise RuntimeError("PyYAML is not installed.")
 
-    data = yaml.safe_load(yaml_text)
+    return _parse_manifest_data(load_yaml(yaml_text))
+
+
+def _parse_manifest_data(data: Any) -> tuple[dict, AssetGuides, list[SceneSpec]]:
     if not isinstance(data, dict):
         raise ValueError("Manifest YAML must be a mapping at the root.")
 
@@ -683,6 +695,18 @@ def parse_manifest_yaml_full(yaml_text: str) -> tuple[dict, AssetGuides, list[Sc
         return metadata, AssetGuides(character_bible=[], style_guide=None, object_bible=[]), scenes
 
 
+def parse_manifest_file_full(manifest_path: Path) -> tuple[dict, AssetGuides, list[SceneSpec]]:
+    """Like `parse_manifest_yaml_full`, but reuses the compiled-manifest sidecar (see toc.manifest)."""
+    try:
+        data = load_manifest_data(manifest_path)
+    except Exception:
+        return parse_manifest_yaml_full(extract_yaml_block(manifest_path.read_text(encoding="utf-8")))
+    try:
+        return _parse_manifest_data(data)
+    except Exception:
+        return parse_manifest_yaml_full(extract_yaml_block(manifest_path.read_text(encoding="utf-8")))
+
+
 def parse_manifest_yaml(yaml_text: str) -> tuple[dict, list[SceneSpec]]:
     metadata, _, scenes = parse_manifest_yaml_full(yaml_text)
     return metadata, scenes
@@ -1004,19 +1028,6 @@ def validate_object_reference_scenes(*, scenes: list[SceneSpec], guides: AssetGu
         )
 
 
-def _guess_image_suffix(mime_type: str | None) -> str:
-    if not mime_type:
-        return ".bin"
-    mt = mime_type.lower()
-    if mt == "image/png":
-        return ".png"
-    if mt == "image/jpeg":
-        return ".jpg"
-    if mt == "image/webp":
-        return ".webp"
-    return ".bin"
-
-
 def generate_macos_say_tts(
     *,
     text: str,
@@ -1140,25 +1151,12 @@ def _is_character_refstrip_path(path: Path, strip_suffix: str) -> bool:
     return path.stem.endswith(suff)
 
 
-def _ffmpeg_hstack_images(inputs: list[Path], out_path: Path, *, force: bool) -> None:
+def _hstack_images(inputs: list[Path], out_path: Path, *, force: bool) -> None:
     if out_path.exists() and not force:
         return
     if len(inputs) < 2:
         raise ValueError("hstack requires at least 2 inputs")
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    cmd = ["ffmpeg", "-hide_banner", "-y"]
-    for p in inputs:
-        cmd += ["-i", str(p)]
-    cmd += [
-        "-filter_complex",
-        f"hstack=inputs={len(inputs)}",
-        "-frames:v",
-        "1",
-        "-update",
-        "1",
-        str(out_path),
-    ]
-    _run(cmd)
+    hstack_files(inputs, out_path)
 
 
 def _character_view_prompt(base_prompt: str, view: str) -> str:
@@ -1250,6 +1248,7 @@ def generate_elevenlabs_tts(
     force: bool,
     request_log_path: Path | None,
     dry_run: bool,
+    cache: GenerationCache | None = None,
 ) -> None:
     if out_path.exists() and not force:
         return
@@ -1265,6 +1264,25 @@ def generate_elevenlabs_tts(
         },
     }
 
+    cache_key = (
+        cache.key(
+            kind="audio/elevenlabs",
+            model=model_id,
+            prompt=text,
+            params={
+                "voice_id": voice_id,
+                "output_format": output_format,
+                "voice_settings": payload["voice_settings"],
+                "duration_seconds": duration_seconds,
+                "suffix": out_path.suffix,
+            },
+        )
+        if cache is not None
+        else None
+    )
+    if _serve_from_generation_cache(cache, cache_key, out_path, label="AUDIO", force=force, dry_run=dry_run):
+        return
+
     if request_log_path:
         request_log_path.parent.mkdir(parents=True, exist_ok=True)
         request_log_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -1302,6 +1320,8 @@ def generate_elevenlabs_tts(
             tmp_path.unlink(missing_ok=True)
         except Exception:
             pass
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, out_path)
 
 
 def _plan_veo_segments(desired_seconds: int) -> tuple[list[int], int | None]:
@@ -1477,6 +1497,121 @@ def _ffmpeg_extract_frame_from_end_best_effort(
     raise SystemExit(f"Failed to extract chaining frame from: {src}")
 
 
+def _serve_from_generation_cache(
+    cache: GenerationCache | None,
+    key: str | None,
+    out_path: Path,
+    *,
+    label: str,
+    force: bool,
+    dry_run: bool,
+) -> bool:
+    """Return True when `out_path` is (or, in dry-run, would be) served from the generation cache."""
+    if cache is None or key is None or force:
+        return False
+    if dry_run:
+        if cache.contains(key, out_path.suffix):
+            print(f"[dry-run] {label} {out_path} <- generation cache ({key[:12]})")
+            return True
+        return False
+    if cache.materialize(key, out_path):
+        print(f"[cache] {label} {out_path} <- {key[:12]}")
+        return True
+    return False
+
+
+def _run_remote_job(
+    *,
+    journal: JobJournal | None,
+    out_path: Path,
+    provider: str,
+    model: str,
+    request_key: str,
+    submit: Callable[[], tuple[dict[str, Any], str, str | None]],
+    poll: Callable[[str], Any],
+) -> tuple[dict[str, Any], Any]:
+    """
+    Submit (or re-attach to) a remote job and wait for it. Returns (submit_response, final_status).
+
+    The operation id is journaled before polling, so an interrupted run can pick the job up
+    again; a job the provider no longer knows (404/410) is submitted again.
+    """
+    job = str(out_path)
+    resumed = journal.resumable(job, request_key) if journal is not None else None
+    if journal is not None and resumed is not None:
+        operation_id = str(resumed.get("operation_id") or "")
+        print(f"[resume] {provider} {out_path} <- {operation_id}")
+        try:
+            return {"resumed": operation_id}, poll(str(resumed.get("poll_ref") or operation_id))
+        except HttpError as e:
+            if e.status not in {404, 410}:
+                raise
+            journal.record_closed(job=job, event="lost", detail=f"HTTP {e.status}")
+
+    submit_resp, operation_id, poll_ref = submit()
+    if journal is not None:
+        journal.record_submitted(
+            job=job,
+            provider=provider,
+            model=model,
+            request_key=request_key,
+            operation_id=operation_id,
+            poll_ref=poll_ref,
+        )
+    return submit_resp, poll(poll_ref or operation_id)
+
+
+@dataclass(frozen=True)
+class GeminiImageJob:
+    prompt: str
+    aspect_ratio: str
+    image_size: str
+    reference_images: list[Path]
+    out_path: Path
+    log_path: Path | None
+
+
+def _gemini_image_cache_key(
+    cache: GenerationCache | None,
+    *,
+    model: str,
+    prompt: str,
+    aspect_ratio: str,
+    image_size: str,
+    reference_images: list[Path] | None,
+    out_path: Path,
+) -> str | None:
+    if cache is None:
+        return None
+    return cache.key(
+        kind="image/gemini",
+        model=model,
+        prompt=prompt,
+        params={"aspect_ratio": aspect_ratio, "image_size": image_size, "suffix": out_path.suffix},
+        reference_files=list(reference_images or []),
+    )
+
+
+def _write_gemini_image(
+    image_bytes: bytes,
+    resp: dict[str, Any],
+    *,
+    out_path: Path,
+    log_path: Path | None,
+    cache: GenerationCache | None,
+    cache_key: str | None,
+) -> None:
+    if log_path:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        # The client already swapped the base64 image data for `<redacted N chars>`.
+        log_path.write_text(json.dumps(resp, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # Same-format bytes are written as-is; conversion runs in-process (ffmpeg only as fallback).
+    save_image_bytes(image_bytes, out_path)
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, out_path)
+
+
 def generate_gemini_image(
     *,
     client: GeminiClient | None,
@@ -1489,10 +1624,23 @@ def generate_gemini_image(
     force: bool,
     log_path: Path | None,
     dry_run: bool,
+    cache: GenerationCache | None = None,
 ) -> None:
     if out_path.exists() and not force:
         return
 
+    cache_key = _gemini_image_cache_key(
+        cache,
+        model=model,
+        prompt=prompt,
+        aspect_ratio=aspect_ratio,
+        image_size=image_size,
+        reference_images=reference_images,
+        out_path=out_path,
+    )
+    if _serve_from_generation_cache(cache, cache_key, out_path, label="IMAGE", force=force, dry_run=dry_run):
+        return
+
     if dry_run:
         print(f"[dry-run] IMAGE {out_path} <- {model} ({aspect_ratio}, {image_size})")
         return
@@ -1511,47 +1659,123 @@ def generate_gemini_image(
     except (HttpError, ValueError) as e:
         raise SystemExit(str(e)) from e
 
-    if log_path:
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        redacted = json.loads(json.dumps(resp))
-        # redact base64 payloads
-        for cand in redacted.get("candidates", []) or []:
-            for part in (cand.get("content", {}) or {}).get("parts", []) or []:
-                inline = part.get("inlineData") or part.get("inline_data")
-                if inline and "data" in inline:
-                    inline["data"] = f"<redacted {len(inline['data'])} chars>"
-        log_path.write_text(json.dumps(redacted, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_gemini_image(image_bytes, resp, out_path=out_path, log_path=log_path, cache=cache, cache_key=cache_key)
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    suffix = _guess_image_suffix(mime_type)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp_path = Path(tmp.name)
-        tmp.write(image_bytes)
+def generate_gemini_images_batch(
+    *,
+    client: GeminiClient | None,
+    model: str,
+    jobs: list[GeminiImageJob],
+    force: bool,
+    dry_run: bool,
+    batch_job_path: Path,
+    poll_every: float,
+    timeout_seconds: float,
+    cache: GenerationCache | None = None,
+    journal: JobJournal | None = None,
+) -> None:
+    """
+    Generate several Gemini images with one Batch API job (submit once, poll, write each result).
 
-    try:
-        try:
-            _run(
-                [
-                    "ffmpeg",
-                    "-hide_banner",
-                    "-y",
-                    "-i",
-                    str(tmp_path),
-                    "-frames:v",
-                    "1",
-                    "-update",
-                    "1",
-                    str(out_path),
-                ]
+    Existing outputs (unless `force`) and generation-cache hits are left out of the batch. The
+    batch is journaled under `batch_job_path` like video jobs, so an interrupted run re-attaches
+    to it while the same set of requests is still pending.
+    """
+    pending: list[tuple[GeminiImageJob, str | None]] = []
+    for job in jobs:
+        if job.out_path.exists() and not force:
+            continue
+        cache_key = _gemini_image_cache_key(
+            cache,
+            model=model,
+            prompt=job.prompt,
+            aspect_ratio=job.aspect_ratio,
+            image_size=job.image_size,
+            reference_images=job.reference_images,
+            out_path=job.out_path,
+        )
+        if _serve_from_generation_cache(cache, cache_key, job.out_path, label="IMAGE", force=force, dry_run=dry_run):
+            continue
+        pending.append((job, cache_key))
+    if not pending:
+        return
+
+    if dry_run:
+        for job, _ in pending:
+            print(f"[dry-run] IMAGE {job.out_path} <- {model} ({job.aspect_ratio}, {job.image_size}) [batch of {len(pending)}]")
+        return
+
+    if client is None:
+        raise SystemExit("Gemini client not configured (missing GEMINI_API_KEY).")
+
+    request_key = generation_key(
+        kind="image/gemini-batch",
+        model=model,
+        prompt="",
+        extra=[
+            [
+                str(job.out_path),
+                generation_key(
+                    kind="image/gemini",
+                    model=model,
+                    prompt=job.prompt,
+                    params={"aspect_ratio": job.aspect_ratio, "image_size": job.image_size},
+                    reference_files=list(job.reference_images),
+                ),
+            ]
+            for job, _ in pending
+        ],
+    )
+
+    def submit_job() -> tuple[dict[str, Any], str, str | None]:
+        requests = {
+            str(i): client.build_image_request(
+                prompt=job.prompt,
+                aspect_ratio=job.aspect_ratio,
+                image_size=job.image_size,
+                reference_images=job.reference_images,
             )
-        except FileNotFoundError:
-            out_path.write_bytes(image_bytes)
-    finally:
-        try:
-            tmp_path.unlink(missing_ok=True)
-        except Exception:
-            pass
+            for i, (job, _) in enumerate(pending)
+        }
+        print(f"[batch] IMAGE submitting {len(requests)} Gemini requests as one batch job")
+        resp = client.submit_image_batch(requests=requests, model=model, display_name=f"toc-images-{len(requests)}")
+        return resp, str(resp.get("name") or ""), None
+
+    try:
+        _, batch = _run_remote_job(
+            journal=journal,
+            out_path=batch_job_path,
+            provider="gemini",
+            model=model,
+            request_key=request_key,
+            submit=submit_job,
+            poll=lambda name: client.poll_image_batch(
+                name=name, poll_every_seconds=float(poll_every), timeout_seconds=float(timeout_seconds)
+            ),
+        )
+        written: set[str] = set()
+
+        def write_image(key: str, image_bytes: bytes, _mime: str | None, resp: dict[str, Any]) -> None:
+            job, cache_key = pending[int(key)]
+            _write_gemini_image(image_bytes, resp, out_path=job.out_path, log_path=job.log_path, cache=cache, cache_key=cache_key)
+            written.add(key)
+
+        errors = client.read_image_batch(batch, on_image=write_image)
+    except (HttpError, TimeoutError, ValueError) as e:
+        if journal is not None and isinstance(e, ValueError):
+            journal.record_closed(job=str(batch_job_path), event="failed")
+        raise SystemExit(str(e)) from e
+
+    missing = [
+        f"{job.out_path}: {errors.get(str(i), 'no response')}"
+        for i, (job, _) in enumerate(pending)
+        if str(i) not in written
+    ]
+    if journal is not None:
+        journal.record_closed(job=str(batch_job_path), event="done")
+    if missing:
+        raise SystemExit("Gemini batch returned no image for:\n" + "\n".join(missing))
 
 
 def generate_seadream_image(
@@ -1564,10 +1788,19 @@ def generate_seadream_image(
     force: bool,
     log_path: Path | None,
     dry_run: bool,
+    cache: GenerationCache | None = None,
 ) -> None:
     if out_path.exists() and not force:
         return
 
+    cache_key = (
+        cache.key(kind="image/seadream", model=model, prompt=prompt, params={"size": size, "suffix": out_path.suffix})
+        if cache is not None
+        else None
+    )
+    if _serve_from_generation_cache(cache, cache_key, out_path, label="IMAGE", force=force, dry_run=dry_run):
+        return
+
     if dry_run:
         print(f"[dry-run] IMAGE {out_path} <- {model} (size={size})")
         return
@@ -1588,37 +1821,10 @@ def generate_seadream_image(
                 item["b64_json"] = "<redacted>"
         log_path.write_text(json.dumps(redacted, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-
-    mime_type = mime_type or "image/png"
-    suffix = _guess_image_suffix(mime_type)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp_path = Path(tmp.name)
-        tmp.write(image_bytes)
-
-    try:
-        try:
-            _run(
-                [
-                    "ffmpeg",
-                    "-hide_banner",
-                    "-y",
-                    "-i",
-                    str(tmp_path),
-                    "-frames:v",
-                    "1",
-                    "-update",
-                    "1",
-                    str(out_path),
-                ]
-            )
-        except FileNotFoundError:
-            out_path.write_bytes(image_bytes)
-    finally:
-        try:
-            tmp_path.unlink(missing_ok=True)
-        except Exception:
-            pass
+    # Same-format bytes are written as-is; conversion runs in-process (ffmpeg only as fallback).
+    save_image_bytes(image_bytes, out_path)
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, out_path)
 
 
 def generate_veo_video(
@@ -1671,10 +1877,32 @@ def generate_kling_video(
     force: bool,
     log_path: Path | None,
     dry_run: bool,
+    cache: GenerationCache | None = None,
+    journal: JobJournal | None = None,
 ) -> None:
     if out_path.exists() and not force:
         return
 
+    # The journal key identifies the provider request; the cache key also covers reference preparation.
+    key_inputs: dict[str, Any] = dict(
+        kind="video/kling",
+        model=model,
+        prompt=prompt,
+        params={
+            "negative_prompt": negative_prompt,
+            "duration_seconds": int(duration_seconds),
+            "aspect_ratio": aspect_ratio,
+            "resolution": resolution,
+            "suffix": out_path.suffix,
+        },
+        reference_files=[input_image, last_frame_image],
+        extra=extra_payload,
+    )
+    request_key = generation_key(**key_inputs)
+    cache_key = cache.key(**key_inputs) if cache is not None else None
+    if _serve_from_generation_cache(cache, cache_key, out_path, label="VIDEO", force=force, dry_run=dry_run):
+        return
+
     if dry_run:
         kind = "F2F" if (input_image and last_frame_image) else ("I2V" if input_image else "T2V")
         print(f"[dry-run] VIDEO({kind}) {out_path} <- {model} ({duration_seconds}s, {aspect_ratio}, {resolution})")
@@ -1683,8 +1911,8 @@ def generate_kling_video(
     if client is None:
         raise SystemExit("Kling client not configured (missing KLING_API_KEY).")
 
-    try:
-        submit = client.start_video_generation(
+    def submit_job() -> tuple[dict[str, Any], str, str | None]:
+        resp = client.start_video_generation(
             prompt=prompt,
             duration_seconds=int(duration_seconds),
             aspect_ratio=aspect_ratio,
@@ -1696,11 +1924,22 @@ def generate_kling_video(
             extra_payload=extra_payload,
             timeout_seconds=180.0,
         )
-        operation_id = client.extract_operation_id(submit)
-        op = client.poll_operation(
-            operation_id_or_url=operation_id,
-            poll_every_seconds=float(poll_every),
-            timeout_seconds=float(timeout_seconds),
+        operation_id = client.extract_operation_id(resp)
+        return resp, operation_id, client.operation_status_url(operation_id)
+
+    try:
+        submit, op = _run_remote_job(
+            journal=journal,
+            out_path=out_path,
+            provider="kling",
+            model=model,
+            request_key=request_key,
+            submit=submit_job,
+            poll=lambda ref: client.poll_operation(
+                operation_id_or_url=ref,
+                poll_every_seconds=float(poll_every),
+                timeout_seconds=float(timeout_seconds),
+            ),
         )
     except (HttpError, TimeoutError, ValueError) as e:
         raise SystemExit(str(e)) from e
@@ -1710,6 +1949,8 @@ def generate_kling_video(
         log_path.write_text(json.dumps({"submit": submit, "operation": op}, ensure_ascii=False, indent=2), encoding="utf-8")
 
     if client.is_failed_operation(op):
+        if journal is not None:
+            journal.record_closed(job=str(out_path), event="failed")
         raise SystemExit(f"Kling operation failed: {json.dumps(op, ensure_ascii=False)}")
 
     try:
@@ -1717,6 +1958,10 @@ def generate_kling_video(
         client.download_to_file(uri=video_uri, out_path=out_path)
     except (HttpError, ValueError) as e:
         raise SystemExit(str(e)) from e
+    if journal is not None:
+        journal.record_closed(job=str(out_path), event="done")
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, out_path)
 
 
 def _deep_merge_dict(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]:
@@ -1747,10 +1992,31 @@ def generate_evolink_video(
     force: bool,
     log_path: Path | None,
     dry_run: bool,
+    cache: GenerationCache | None = None,
+    journal: JobJournal | None = None,
 ) -> None:
     if out_path.exists() and not force:
         return
 
+    key_inputs: dict[str, Any] = dict(
+        kind="video/evolink",
+        model=model,
+        prompt=prompt,
+        params={
+            "negative_prompt": negative_prompt,
+            "duration_seconds": int(duration_seconds),
+            "aspect_ratio": aspect_ratio,
+            "resolution": resolution,
+            "suffix": out_path.suffix,
+        },
+        reference_files=[input_image, last_frame_image],
+        extra=extra_payload,
+    )
+    request_key = generation_key(**key_inputs)
+    cache_key = cache.key(**key_inputs) if cache is not None else None
+    if _serve_from_generation_cache(cache, cache_key, out_path, label="VIDEO", force=force, dry_run=dry_run):
+        return
+
     if dry_run:
         kind = "I2V" if input_image else "T2V"
         print(f"[dry-run] VIDEO({kind}) {out_path} <- {model} ({duration_seconds}s, {aspect_ratio}, {resolution})")
@@ -1772,18 +2038,31 @@ def generate_evolink_video(
     if negative_prompt and negative_prompt.strip():
         payload["negative_prompt"] = negative_prompt.strip()
 
-    if input_image is not None:
-        payload["image_start"] = client.upload_image_base64(path=input_image)
-    if last_frame_image is not None:
-        payload["image_end"] = client.upload_image_base64(path=last_frame_image)
+    def submit_job() -> tuple[dict[str, Any], str, str | None]:
+        nonlocal payload
+        if input_image is not None:
+            payload["image_start"] = client.upload_image_base64(path=input_image)
+        if last_frame_image is not None:
+            payload["image_end"] = client.upload_image_base64(path=last_frame_image)
 
-    if extra_payload:
-        payload = _deep_merge_dict(payload, extra_payload)
+        if extra_payload:
+            payload = _deep_merge_dict(payload, extra_payload)
+
+        resp = client.submit_video_task(payload=payload)
+        return resp, client.extract_task_id(resp), None
 
     try:
-        submit = client.submit_video_task(payload=payload)
-        task_id = client.extract_task_id(submit)
-        task = client.poll_task(task_id=task_id, poll_every_seconds=float(poll_every), timeout_seconds=float(timeout_seconds))
+        submit, task = _run_remote_job(
+            journal=journal,
+            out_path=out_path,
+            provider="evolink",
+            model=model,
+            request_key=request_key,
+            submit=submit_job,
+            poll=lambda task_id: client.poll_task(
+                task_id=task_id, poll_every_seconds=float(poll_every), timeout_seconds=float(timeout_seconds)
+            ),
+        )
     except (HttpError, TimeoutError, ValueError) as e:
         raise SystemExit(str(e)) from e
 
@@ -1793,6 +2072,8 @@ def generate_evolink_video(
 
     status = str(task.get("status") or "").strip().lower()
     if status in {"failed", "error", "canceled", "cancelled", "rejected"}:
+        if journal is not None:
+            journal.record_closed(job=str(out_path), event="failed")
         raise SystemExit(f"EvoLink task failed: {json.dumps(task, ensure_ascii=False)}")
 
     try:
@@ -1800,6 +2081,10 @@ def generate_evolink_video(
         client.download_to_file(url=video_url, out_path=out_path)
     except (HttpError, ValueError) as e:
         raise SystemExit(str(e)) from e
+    if journal is not None:
+        journal.record_closed(job=str(out_path), event="done")
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, out_path)
 
 
 def generate_seedance_video(
@@ -1821,10 +2106,31 @@ def generate_seedance_video(
     force: bool,
     log_path: Path | None,
     dry_run: bool,
+    cache: GenerationCache | None = None,
+    journal: JobJournal | None = None,
 ) -> None:
     if out_path.exists() and not force:
         return
 
+    key_inputs: dict[str, Any] = dict(
+        kind="video/seedance",
+        model=model,
+        prompt=prompt,
+        params={
+            "duration_seconds": int(duration_seconds),
+            "aspect_ratio": aspect_ratio,
+            "resolution": resolution,
+            "generate_audio": bool(generate_audio),
+            "suffix": out_path.suffix,
+        },
+        reference_files=[input_image, last_frame_image, *(reference_images or [])],
+        extra=extra_payload,
+    )
+    request_key = generation_key(**key_inputs)
+    cache_key = cache.key(**key_inputs) if cache is not None else None
+    if _serve_from_generation_cache(cache, cache_key, out_path, label="VIDEO", force=force, dry_run=dry_run):
+        return
+
     if dry_run:
         kind = "F2F" if (input_image and last_frame_image) else ("I2V" if input_image else "T2V")
         print(f"[dry-run] VIDEO({kind}) {out_path} <- {model} ({duration_seconds}s, {aspect_ratio}, {resolution})")
@@ -1847,10 +2153,22 @@ def generate_seedance_video(
         extra_payload=extra_payload,
     )
 
+    def submit_job() -> tuple[dict[str, Any], str, str | None]:
+        resp = client.create_task(payload=payload)
+        return resp, client.extract_task_id(resp), None
+
     try:
-        submit = client.create_task(payload=payload)
-        task_id = client.extract_task_id(submit)
-        task = client.poll_task(task_id=task_id, poll_every_seconds=float(poll_every), timeout_seconds=float(timeout_seconds))
+        submit, task = _run_remote_job(
+            journal=journal,
+            out_path=out_path,
+            provider="seedance",
+            model=model,
+            request_key=request_key,
+            submit=submit_job,
+            poll=lambda task_id: client.poll_task(
+                task_id=task_id, poll_every_seconds=float(poll_every), timeout_seconds=float(timeout_seconds)
+            ),
+        )
     except (HttpError, TimeoutError, ValueError) as e:
         raise SystemExit(str(e)) from e
 
@@ -1859,6 +2177,8 @@ def generate_seedance_video(
         log_path.write_text(json.dumps({"submit": submit, "task": task}, ensure_ascii=False, indent=2), encoding="utf-8")
 
     if client.is_failed_task(task):
+        if journal is not None:
+            journal.record_closed(job=str(out_path), event="failed")
         raise SystemExit(f"Seedance task failed: {json.dumps(task, ensure_ascii=False)}")
 
     try:
@@ -1866,6 +2186,10 @@ def generate_seedance_video(
         client.download_to_file(url=video_url, out_path=out_path)
     except (HttpError, ValueError) as e:
         raise SystemExit(str(e)) from e
+    if journal is not None:
+        journal.record_closed(job=str(out_path), event="done")
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, out_path)
 
 
 def normalize_tool_name(tool: str | None) -> str:
@@ -1893,6 +2217,54 @@ def main() -> None:
     parser.add_argument("--base-dir", default=None, help="Resolve relative paths from this dir (default: manifest dir).")
     parser.add_argument("--force", action="store_true", help="Overwrite existing outputs.")
     parser.add_argument("--dry-run", action="store_true", help="Plan only (no API calls).")
+    parser.add_argument(
+        "--generation-cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Reuse outputs for identical requests (model, prompt, params, reference bytes) from the shared "
+            "content-addressed cache (TOC_GENERATION_CACHE_DIR, default output/.cache/generations). "
+            "--force skips the lookup but still stores the new result."
+        ),
+    )
+    parser.add_argument(
+        "--dirty-check",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Record each output's effective inputs (prompt after asset guides, tool/model, duration, payload, "
+            "reference and first-frame files by content) in a sidecar next to it and regenerate outputs whose "
+            "inputs changed since the last run, together with their dependents (views/ref strips, chained frames)."
+        ),
+    )
+    parser.add_argument(
+        "--prepare-references",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=(
+            "Downscale/re-encode reference and first/last-frame images to each provider's input size before "
+            "upload (cached by content under output/.cache/refprep). Default: TOC_PREPARE_REFERENCES (off)."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Re-attach to video jobs left in flight by an interrupted run (logs/providers/jobs.jsonl) "
+            "instead of submitting them again. Jobs whose inputs changed are always resubmitted."
+        ),
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help=(
+            "Run up to N independent scene jobs concurrently (dependencies such as reference images and "
+            "chained first frames are respected). Default: TOC_MAX_WORKERS or config/system.yaml "
+            "execution.concurrency.max_workers."
+        ),
+    )
 
     parser.add_argument("--skip-images", action="store_true")
     parser.add_argument("--skip-videos", action="store_true")
@@ -1904,6 +2276,26 @@ def main() -> None:
     parser.add_argument("--gemini-api-base", default=_env("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta"))
     parser.add_argument("--gemini-api-key", default=_env("GEMINI_API_KEY"))
     parser.add_argument("--gemini-image-model", default=_env("GEMINI_IMAGE_MODEL", "gemini-3.1-flash-image-preview"))
+    parser.add_argument(
+        "--gemini-files-api",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=(
+            "Upload Gemini reference images once via the Files API and reference them by URI instead of "
+            "inlining base64 in every request. Default: GEMINI_FILES_API (off), on with --gemini-batch."
+        ),
+    )
+    parser.add_argument(
+        "--gemini-batch",
+        action="store_true",
+        help=(
+            "Submit all story-scene Gemini images as one Batch API job and poll it (batch pricing/throughput; "
+            "results can take much longer than synchronous calls). Character/object reference images and "
+            "scenes that reference other story images are still generated synchronously first."
+        ),
+    )
+    parser.add_argument("--gemini-batch-poll-seconds", type=float, default=30.0)
+    parser.add_argument("--gemini-batch-timeout-seconds", type=float, default=24 * 3600.0)
     parser.add_argument("--image-size", default="2K")
     parser.add_argument("--image-aspect-ratio", default=None)
     parser.add_argument("--image-prompt-prefix", default="", help="Optional text prepended to every image prompt.")
@@ -2112,6 +2504,8 @@ def main() -> None:
     )
 
     args = parser.parse_args()
+    if args.prepare_references is not None:
+        os.environ["TOC_PREPARE_REFERENCES"] = "1" if args.prepare_references else "0"
 
     def _parse_optional_json_object(value: str | None, *, flag_name: str) -> dict[str, Any] | None:
         if value is None:
@@ -2136,9 +2530,7 @@ def main() -> None:
         raise SystemExit(f"Manifest not found: {manifest_path}")
 
     base_dir = Path(args.base_dir) if args.base_dir else manifest_path.parent
-    md = manifest_path.read_text(encoding="utf-8")
-    yaml_text = extract_yaml_block(md)
-    metadata, guides, scenes = parse_manifest_yaml_full(yaml_text)
+    metadata, guides, scenes = parse_manifest_file_full(manifest_path)
 
     char_views = sorted(_parse_csv_set(args.character_reference_views))
     allowed_views = {"front", "side", "back"}
@@ -2239,7 +2631,7 @@ def main() -> None:
     needs_gemini_image = (
         not args.skip_images
         and any(
-            _scene_uses_tool(scene, {"google_nanobanana_pro", "nanobanana_pro"})
+            _scene_uses_tool(scene, GEMINI_IMAGE_TOOLS)
             and scene.image_output
             and scene.image_prompt
             and (scene_filter is None or scene.scene_id in scene_filter)
@@ -2303,6 +2695,11 @@ def main() -> None:
                 api_base=args.gemini_api_base,
                 image_model=args.gemini_image_model,
                 video_model=args.gemini_video_model,
+                upload_references=(
+                    args.gemini_files_api
+                    if args.gemini_files_api is not None
+                    else (gemini_files_api_enabled() or bool(args.gemini_batch))
+                ),
             )
         )
 
@@ -2390,6 +2787,24 @@ def main() -> None:
                 )
             )
 
+    generation_cache = GenerationCache.from_env(REPO_ROOT) if args.generation_cache else None
+    job_journal = JobJournal(log_dir / "jobs.jsonl", reattach=bool(args.resume))
+
+    dirty_check = bool(args.dirty_check)
+
+    def _refresh_if_stale(label: str, out_path: Path, key: str, derived: list[Path]) -> None:
+        if not dirty_check or args.force or not is_stale(out_path, key):
+            return
+        if args.dry_run:
+            print(f"[dry-run] STALE {out_path} (inputs changed; would regenerate)")
+            return
+        print(f"[dirty] {label}: inputs changed; regenerating {out_path}")
+        invalidate([out_path, *derived])
+
+    def _record_inputs(out_path: Path, key: str) -> None:
+        if dirty_check and not args.dry_run and out_path.exists():
+            record_inputs(out_path, key)
+
     # Pass 1: images (allows later videos to reference other scene images, e.g. first/last frame conditioning).
     image_scenes: list[SceneSpec] = []
     for scene in scenes:
@@ -2450,13 +2865,28 @@ def main() -> None:
         selected.extend(selected_story)
         image_scenes = selected
 
-    for scene in image_scenes:
-        if scene_filter is not None and scene.scene_id not in scene_filter:
-            continue
-
-        if args.skip_images or not scene.image_output or not scene.image_prompt:
-            continue
+    def _scene_image_refs(scene: SceneSpec) -> list[Path]:
+        refs: list[Path] = []
+        for ref_str in scene.image_references or []:
+            ref_path = resolve_path(base_dir, ref_str)
+            if not ref_path:
+                continue
+            if not args.dry_run and not ref_path.exists():
+                raise SystemExit(f"scene{scene.scene_id}: reference image not found: {ref_path}")
+            refs.append(ref_path)
+        return refs
+
+    def _gemini_scene_prompt(scene: SceneSpec) -> str:
+        prefix = (args.image_prompt_prefix or "").strip()
+        suffix = (args.image_prompt_suffix or "").strip()
+        prompt = scene.image_prompt.strip()
+        if prefix:
+            prompt = prefix + "\n\n" + prompt
+        if suffix:
+            prompt = prompt + "\n\n" + suffix
+        return prompt
 
+    def _generate_image_scene(scene: SceneSpec) -> None:
         tool = normalize_tool_name(scene.image_tool)
         out_path = resolve_path(base_dir, scene.image_output)
         if not out_path:
@@ -2465,25 +2895,12 @@ def main() -> None:
         scene_aspect_ratio = scene.image_aspect_ratio or aspect_ratio
         scene_image_size = scene.image_size or args.image_size
 
-        refs: list[Path] = []
-        for ref_str in scene.image_references or []:
-            ref_path = resolve_path(base_dir, ref_str)
-            if not ref_path:
-                continue
-            if not args.dry_run and not ref_path.exists():
-                raise SystemExit(f"scene{scene.scene_id}: reference image not found: {ref_path}")
-            refs.append(ref_path)
+        refs = _scene_image_refs(scene)
 
         is_char_ref = bool(out_path and _is_character_ref_path(out_path))
 
-        if tool in {"google_nanobanana_pro", "nanobanana_pro"}:
-            prefix = (args.image_prompt_prefix or "").strip()
-            suffix = (args.image_prompt_suffix or "").strip()
-            prompt = scene.image_prompt.strip()
-            if prefix:
-                prompt = prefix + "\n\n" + prompt
-            if suffix:
-                prompt = prompt + "\n\n" + suffix
+        if tool in GEMINI_IMAGE_TOOLS:
+            prompt = _gemini_scene_prompt(scene)
 
             if is_char_ref and (char_views or args.character_reference_strip):
                 # Turnaround: generate front/side/back images + optional ref strip.
@@ -2512,6 +2929,7 @@ def main() -> None:
                     force=args.force,
                     log_path=log_dir / f"scene{scene.scene_id}_image.json",
                     dry_run=args.dry_run,
+                    cache=generation_cache,
                 )
 
                 # side/back conditioned by the front reference when available
@@ -2537,19 +2955,20 @@ def main() -> None:
                         force=args.force,
                         log_path=log_dir / f"scene{scene.scene_id}_image_{v}.json",
                         dry_run=args.dry_run,
+                        cache=generation_cache,
                     )
 
                 if args.character_reference_strip and all(k in view_paths for k in ("front", "side", "back")):
                     strip_path = _derive_character_refstrip_path(out_path, args.character_reference_strip_suffix)
                     if not args.dry_run:
-                        _ffmpeg_hstack_images(
+                        _hstack_images(
                             [view_paths["front"], view_paths["side"], view_paths["back"]],
                             strip_path,
                             force=args.force,
                         )
                     else:
                         print(f"[dry-run] IMAGE {strip_path} <- hstack(front,side,back)")
-                continue
+                return
 
             if args.log_prompts:
                 log_dir.mkdir(parents=True, exist_ok=True)
@@ -2565,6 +2984,7 @@ def main() -> None:
                 force=args.force,
                 log_path=log_dir / f"scene{scene.scene_id}_image.json",
                 dry_run=args.dry_run,
+                cache=generation_cache,
             )
         elif tool in {"seadream", "seedream", "seedream_4_5", "byteplus_seedream_4_5"}:
             base_prompt = scene.image_prompt.strip()
@@ -2592,19 +3012,20 @@ def main() -> None:
                         force=args.force,
                         log_path=log_dir / f"scene{scene.scene_id}_image{'' if v == 'front' else '_' + v}.json",
                         dry_run=args.dry_run,
+                        cache=generation_cache,
                     )
 
                 if args.character_reference_strip and all(k in view_paths for k in ("front", "side", "back")):
                     strip_path = _derive_character_refstrip_path(out_path, args.character_reference_strip_suffix)
                     if not args.dry_run:
-                        _ffmpeg_hstack_images(
+                        _hstack_images(
                             [view_paths["front"], view_paths["side"], view_paths["back"]],
                             strip_path,
                             force=args.force,
                         )
                     else:
                         print(f"[dry-run] IMAGE {strip_path} <- hstack(front,side,back)")
-                continue
+                return
 
             if args.log_prompts:
                 log_dir.mkdir(parents=True, exist_ok=True)
@@ -2618,10 +3039,83 @@ def main() -> None:
                 force=args.force,
                 log_path=log_dir / f"scene{scene.scene_id}_image.json",
                 dry_run=args.dry_run,
+                cache=generation_cache,
             )
         else:
             raise SystemExit(f"scene{scene.scene_id}: unsupported image tool: {scene.image_tool}")
 
+    def _image_inputs_key(scene: SceneSpec) -> tuple[Path, str, list[Path]]:
+        """(output, dirty-check key, derived outputs) of an image scene."""
+        out_path = resolve_path(base_dir, scene.image_output)
+        if not out_path:
+            raise SystemExit(f"scene{scene.scene_id}: missing image output path")
+        tool = normalize_tool_name(scene.image_tool)
+        if tool in {"seadream", "seedream", "seedream_4_5", "byteplus_seedream_4_5"}:
+            model_params: dict[str, Any] = {"model": args.seadream_model, "size": args.seadream_size}
+        else:
+            model_params = {
+                "model": args.gemini_image_model,
+                "aspect_ratio": scene.image_aspect_ratio or aspect_ratio,
+                "image_size": scene.image_size or args.image_size,
+                "prefix": (args.image_prompt_prefix or "").strip(),
+                "suffix": (args.image_prompt_suffix or "").strip(),
+            }
+        derived: list[Path] = []
+        if _is_character_ref_path(out_path):
+            derived = [_derive_character_view_path(out_path, v) for v in ("side", "back")]
+            derived.append(_derive_character_refstrip_path(out_path, args.character_reference_strip_suffix))
+            model_params["views"] = list(char_views)
+            model_params["strip"] = bool(args.character_reference_strip)
+        key = inputs_key(
+            kind="image",
+            tool=tool,
+            prompt=scene.image_prompt.strip(),
+            params=model_params,
+            input_files=[resolve_path(base_dir, r) for r in scene.image_references or []],
+        )
+        return out_path, key, derived
+
+    def run_image_scene(scene: SceneSpec) -> None:
+        out_path, key, derived = _image_inputs_key(scene)
+        _refresh_if_stale(f"scene{scene.scene_id} image", out_path, key, derived)
+        _generate_image_scene(scene)
+        _record_inputs(out_path, key)
+
+    def run_gemini_image_batch(batch_scenes: list[SceneSpec]) -> None:
+        keyed = [_image_inputs_key(scene) for scene in batch_scenes]
+        for scene, (out_path, key, derived) in zip(batch_scenes, keyed):
+            _refresh_if_stale(f"scene{scene.scene_id} image", out_path, key, derived)
+        jobs: list[GeminiImageJob] = []
+        for scene, (out_path, _, _) in zip(batch_scenes, keyed):
+            prompt = _gemini_scene_prompt(scene)
+            if args.log_prompts:
+                log_dir.mkdir(parents=True, exist_ok=True)
+                (log_dir / f"scene{scene.scene_id}_image_prompt.txt").write_text(prompt + "\n", encoding="utf-8")
+            jobs.append(
+                GeminiImageJob(
+                    prompt=prompt,
+                    aspect_ratio=scene.image_aspect_ratio or aspect_ratio,
+                    image_size=scene.image_size or args.image_size,
+                    reference_images=_scene_image_refs(scene),
+                    out_path=out_path,
+                    log_path=log_dir / f"scene{scene.scene_id}_image.json",
+                )
+            )
+        generate_gemini_images_batch(
+            client=gemini_client,
+            model=args.gemini_image_model,
+            jobs=jobs,
+            force=args.force,
+            dry_run=args.dry_run,
+            batch_job_path=log_dir / "gemini_image_batch",
+            poll_every=args.gemini_batch_poll_seconds,
+            timeout_seconds=args.gemini_batch_timeout_seconds,
+            cache=generation_cache,
+            journal=job_journal,
+        )
+        for out_path, key, _ in keyed:
+            _record_inputs(out_path, key)
+
     # Pass 2: videos
     video_scenes_in_order: list[SceneSpec] = []
     for s in scenes:
@@ -2633,14 +3127,10 @@ def main() -> None:
 
     video_scene_index_by_id: dict[int, int] = {int(s.scene_id): idx for idx, s in enumerate(video_scenes_in_order)}
 
-    prev_chain_first_frame: Path | None = None
-    for scene in scenes:
-        if scene_filter is not None and scene.scene_id not in scene_filter:
-            continue
-
-        if args.skip_videos or not scene.video_output or not (scene.video_motion_prompt or scene.image_prompt):
-            continue
+    # Chain frames extracted from each finished video, keyed by scene_id (read by the next video in order).
+    chain_frames: dict[int, Path | None] = {}
 
+    def run_video_scene(scene: SceneSpec) -> None:
         tool = normalize_tool_name(scene.video_tool)
         out_path = resolve_path(base_dir, scene.video_output)
         if not out_path:
@@ -2651,29 +3141,28 @@ def main() -> None:
         input_image = resolve_path(base_dir, scene.video_first_frame or scene.video_input_image)
         if input_image is None and scene.image_output:
             input_image = resolve_path(base_dir, scene.image_output)
+        idx = video_scene_index_by_id.get(int(scene.scene_id))
+        prev_scene = video_scenes_in_order[idx - 1] if idx is not None and idx > 0 else None
+        prev_chain_first_frame = chain_frames.get(int(prev_scene.scene_id)) if prev_scene is not None else None
         if args.chain_first_frame_from_prev_video and prev_chain_first_frame is not None:
             # Best-effort: override the provided first_frame so the new clip starts
             # exactly where the previous clip ended (improves mp4 concat continuity).
             input_image = prev_chain_first_frame
-        elif args.chain_first_frame_from_prev_video and prev_chain_first_frame is None:
-            # If the user is regenerating only later scenes, we may have skipped the previous video generation.
-            # Don't assume contiguous numeric IDs; use manifest order to find the previous video scene.
-            idx = video_scene_index_by_id.get(int(scene.scene_id))
-            if idx is not None and idx > 0:
-                prev_scene = video_scenes_in_order[idx - 1]
-                prev_video = resolve_path(base_dir, prev_scene.video_output)
-                if prev_video and prev_video.exists() and not args.dry_run:
-                    chain_frame = prev_video.with_name(prev_video.stem + "_chain_first_frame.png")
-                    try:
-                        prev_chain_first_frame = _ffmpeg_extract_frame_from_end_best_effort(
-                            prev_video,
-                            chain_frame,
-                            seconds_from_end=float(args.chain_first_frame_seconds_from_end),
-                            force=True,
-                        )
-                        input_image = prev_chain_first_frame
-                    except FileNotFoundError:
-                        prev_chain_first_frame = None
+        elif args.chain_first_frame_from_prev_video and prev_scene is not None:
+            # The previous video may not have produced a chain frame in this run (e.g. ffmpeg missing).
+            # Don't assume contiguous numeric IDs; manifest order defines the previous video scene.
+            prev_video = resolve_path(base_dir, prev_scene.video_output)
+            if prev_video and prev_video.exists() and not args.dry_run:
+                chain_frame = prev_video.with_name(prev_video.stem + "_chain_first_frame.png")
+                try:
+                    input_image = _ffmpeg_extract_frame_from_end_best_effort(
+                        prev_video,
+                        chain_frame,
+                        seconds_from_end=float(args.chain_first_frame_seconds_from_end),
+                        force=True,
+                    )
+                except FileNotFoundError:
+                    pass
         if input_image and not args.dry_run and not input_image.exists():
             raise SystemExit(f"scene{scene.scene_id}: first frame image not found: {input_image}")
 
@@ -2717,6 +3206,39 @@ def main() -> None:
             if strips:
                 video_ref_paths = non_char + strips
 
+        video_params: dict[str, Any] = {
+            "duration_seconds": dur,
+            "aspect_ratio": aspect_ratio,
+            "resolution": args.video_resolution,
+            "negative_prompt": args.video_negative_prompt or "",
+        }
+        if tool == "google_veo_3_1":
+            video_params["model"] = args.gemini_video_model
+        elif tool in {"kling_3_0", "kling", "kling_3_0_omni", "kling_omni", "kling-omni"}:
+            omni = tool in {"kling_3_0_omni", "kling_omni", "kling-omni"}
+            if evolink_client is not None:
+                video_params["model"] = (
+                    (args.evolink_kling_o3_i2v_model if input_image is not None else args.evolink_kling_o3_t2v_model)
+                    if omni
+                    else (args.evolink_kling_v3_i2v_model if input_image is not None else args.evolink_kling_v3_t2v_model)
+                )
+            else:
+                video_params["model"] = args.kling_omni_video_model if omni else args.kling_video_model
+            video_params["payload"] = (kling_omni_extra_payload or kling_extra_payload) if omni else kling_extra_payload
+        else:
+            video_params["model"] = args.ark_seedance_i2v_model if input_image is not None else args.ark_seedance_t2v_model
+            video_params["payload"] = ark_extra_payload
+            video_params["generate_audio"] = bool(args.ark_generate_audio)
+        dirty_key = inputs_key(
+            kind="video",
+            tool=tool,
+            prompt=prompt,
+            params=video_params,
+            input_files=[input_image, last_image, *video_ref_paths],
+        )
+        chain_frame_out = out_path.with_name(out_path.stem + "_chain_first_frame.png")
+        _refresh_if_stale(f"scene{scene.scene_id} video", out_path, dirty_key, [chain_frame_out])
+
         if tool == "google_veo_3_1":
             segs, trim_to = _plan_veo_segments(dur)
             if len(segs) == 1:
@@ -2804,6 +3326,8 @@ def main() -> None:
                     force=args.force,
                     log_path=log_dir / f"scene{scene.scene_id}_video.json",
                     dry_run=args.dry_run,
+                    cache=generation_cache,
+                    journal=job_journal,
                 )
             else:
                 kling_model = args.kling_video_model
@@ -2828,6 +3352,8 @@ def main() -> None:
                     force=args.force,
                     log_path=log_dir / f"scene{scene.scene_id}_video.json",
                     dry_run=args.dry_run,
+                    cache=generation_cache,
+                    journal=job_journal,
                 )
         elif tool in {
             "seedance",
@@ -2857,15 +3383,17 @@ def main() -> None:
                 force=args.force,
                 log_path=log_dir / f"scene{scene.scene_id}_video.json",
                 dry_run=args.dry_run,
+                cache=generation_cache,
+                journal=job_journal,
             )
         else:
             raise SystemExit(f"scene{scene.scene_id}: unsupported video tool: {scene.video_tool}")
 
         if args.chain_first_frame_from_prev_video:
+            chain_frame = out_path.with_name(out_path.stem + "_chain_first_frame.png")
             if args.dry_run:
-                prev_chain_first_frame = out_path.with_name(out_path.stem + "_chain_first_frame.png")
+                chain_frames[int(scene.scene_id)] = chain_frame
             else:
-                chain_frame = out_path.with_name(out_path.stem + "_chain_first_frame.png")
                 try:
                     _ffmpeg_extract_frame_from_end_best_effort(
                         out_path,
@@ -2873,25 +3401,39 @@ def main() -> None:
                         seconds_from_end=float(args.chain_first_frame_seconds_from_end),
                         force=args.force,
                     )
-                    prev_chain_first_frame = chain_frame
+                    chain_frames[int(scene.scene_id)] = chain_frame
                 except FileNotFoundError:
                     # ffmpeg missing; chaining can't proceed.
-                    prev_chain_first_frame = None
+                    chain_frames[int(scene.scene_id)] = None
 
-    # Pass 3: audio (TTS)
-    for scene in scenes:
-        if scene_filter is not None and scene.scene_id not in scene_filter:
-            continue
-
-        if args.skip_audio or not scene.narration_output:
-            continue
+        _record_inputs(out_path, dirty_key)
 
+    # Pass 3: audio (TTS)
+    def run_audio_scene(scene: SceneSpec) -> None:
         dur = int(scene.duration_seconds) if scene.duration_seconds is not None else duration_from_timestamp_range(scene.timestamp, args.default_scene_seconds)
         out_path = resolve_path(base_dir, scene.narration_output)
         if not out_path:
             raise SystemExit(f"scene{scene.scene_id}: missing narration output path")
 
         tool = normalize_tool_name((args.override_narration_tool or "").strip() or scene.narration_tool)
+        audio_params: dict[str, Any] = {
+            "prefix": (args.tts_prompt_prefix or "").strip(),
+            "suffix": (args.tts_prompt_suffix or "").strip(),
+        }
+        if tool == "elevenlabs":
+            audio_params.update(
+                voice_id=str(args.elevenlabs_voice_id or DEFAULT_ELEVENLABS_VOICE_ID),
+                model_id=args.elevenlabs_model_id or "eleven_multilingual_v2",
+                output_format=args.elevenlabs_output_format or "mp3_44100_128",
+                normalize_to=dur if scene.narration_normalize_to_scene_duration else None,
+            )
+        elif tool in {"macos_say", "say"}:
+            audio_params["voice"] = (args.macos_say_voice or "").strip() or None
+        else:
+            audio_params["duration_seconds"] = dur
+        dirty_key = inputs_key(kind="audio", tool=tool, prompt=(scene.narration_text or "").strip(), params=audio_params)
+        _refresh_if_stale(f"scene{scene.scene_id} audio", out_path, dirty_key, [])
+
         if tool == "elevenlabs":
             if not scene.narration_text:
                 raise SystemExit(f"scene{scene.scene_id}: missing narration text for ElevenLabs TTS")
@@ -2914,6 +3456,7 @@ def main() -> None:
                 force=args.force,
                 request_log_path=log_dir / f"scene{scene.scene_id}_tts_request.json",
                 dry_run=args.dry_run,
+                cache=generation_cache,
             )
         elif tool in {"macos_say", "say"}:
             if not scene.narration_text:
@@ -2940,6 +3483,102 @@ def main() -> None:
         else:
             raise SystemExit(f"scene{scene.scene_id}: unsupported narration tool: {scene.narration_tool}")
 
+        _record_inputs(out_path, dirty_key)
+
+    # Schedule every scene as a node in a dependency graph; independent scenes run concurrently.
+    graph = TaskGraph()
+    producers: dict[Path, str] = {}
+
+    def _dep_keys(paths: list[Path | None]) -> list[str]:
+        return [producers[p] for p in paths if p is not None and p in producers]
+
+    for idx, scene in enumerate(image_scenes):
+        out_path = resolve_path(base_dir, scene.image_output)
+        if not out_path:
+            continue
+        key = f"image:{idx}:scene{scene.scene_id}"
+        produced = [out_path]
+        if _is_character_ref_path(out_path):
+            produced.extend(_derive_character_view_path(out_path, v) for v in ("side", "back"))
+            produced.append(_derive_character_refstrip_path(out_path, args.character_reference_strip_suffix))
+        for p in produced:
+            producers.setdefault(p, key)
+
+    image_scene_by_key: dict[str, SceneSpec] = {
+        f"image:{idx}:scene{scene.scene_id}": scene
+        for idx, scene in enumerate(image_scenes)
+        if resolve_path(base_dir, scene.image_output)
+    }
+
+    def _scene_ref_deps(scene: SceneSpec) -> list[str]:
+        return _dep_keys([resolve_path(base_dir, r) for r in scene.image_references or []])
+
+    def _is_story_image(scene: SceneSpec) -> bool:
+        out_path = resolve_path(base_dir, scene.image_output)
+        return not (_is_character_ref_path(out_path) or _is_object_ref_path(out_path))
+
+    def _ready_before_batch(key: str, seen: tuple[str, ...] = ()) -> bool:
+        # Reference images the batch may wait for: produced without depending on any story image.
+        scene = image_scene_by_key[key]
+        if key in seen or _is_story_image(scene):
+            return False
+        return all(_ready_before_batch(dep, (*seen, key)) for dep in _scene_ref_deps(scene))
+
+    batch_image_keys: list[str] = []
+    if args.gemini_batch:
+        batch_image_keys = [
+            key
+            for key, scene in image_scene_by_key.items()
+            if normalize_tool_name(scene.image_tool) in GEMINI_IMAGE_TOOLS
+            and _is_story_image(scene)
+            and all(_ready_before_batch(dep) for dep in _scene_ref_deps(scene))
+        ]
+        for key in batch_image_keys:
+            producers[resolve_path(base_dir, image_scene_by_key[key].image_output)] = GEMINI_BATCH_TASK_KEY
+
+    for key, scene in image_scene_by_key.items():
+        if key in batch_image_keys:
+            continue
+        graph.add(key, lambda scene=scene: run_image_scene(scene), deps=_scene_ref_deps(scene))
+    if batch_image_keys:
+        batch_scenes = [image_scene_by_key[key] for key in batch_image_keys]
+        graph.add(
+            GEMINI_BATCH_TASK_KEY,
+            lambda: run_gemini_image_batch(batch_scenes),
+            deps=[dep for scene in batch_scenes for dep in _scene_ref_deps(scene)],
+        )
+
+    prev_video_key: str | None = None
+    for idx, scene in enumerate(video_scenes_in_order):
+        key = f"video:{idx}:scene{scene.scene_id}"
+        inputs: list[Path | None] = [
+            resolve_path(base_dir, scene.video_first_frame or scene.video_input_image),
+            resolve_path(base_dir, scene.image_output),
+        ]
+        if args.enable_last_frame:
+            inputs.append(resolve_path(base_dir, scene.video_last_frame))
+        inputs.extend(resolve_path(base_dir, r) for r in scene.image_references or [])
+        deps = _dep_keys(inputs)
+        if args.chain_first_frame_from_prev_video and prev_video_key is not None:
+            deps.append(prev_video_key)
+        graph.add(key, lambda scene=scene: run_video_scene(scene), deps=deps)
+        prev_video_key = key
+
+    for idx, scene in enumerate(scenes):
+        if scene_filter is not None and scene.scene_id not in scene_filter:
+            continue
+        if args.skip_audio or not scene.narration_output:
+            continue
+        graph.add(f"audio:{idx}:scene{scene.scene_id}", lambda scene=scene: run_audio_scene(scene))
+
+    max_workers = int(args.max_workers) if args.max_workers is not None else configured_max_workers(REPO_ROOT)
+    if max_workers <= 0:
+        raise SystemExit("--max-workers must be a positive integer.")
+    if args.dry_run:
+        # Keep the plan output deterministic.
+        max_workers = 1
+    graph.run(max_workers=max_workers)
+
     print("Done.")
 
 
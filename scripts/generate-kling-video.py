@@ -20,7 +20,7 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from toc.env import load_env_files
-from toc.http import HttpError
+from toc.http import HttpError, json_default
 from toc.providers.kling import KlingClient, KlingConfig
 
 
@@ -36,7 +36,7 @@ def _split_csv(value: str) -> list[str]:
 
 
 def _redact_image_b64(payload: dict[str, Any]) -> dict[str, Any]:
-    redacted = json.loads(json.dumps(payload))
+    redacted = json.loads(json.dumps(payload, default=json_default))
     candidates = [redacted]
     input_node = redacted.get("input")
     if isinstance(input_node, dict):
@@ -14,10 +14,18 @@ from __future__ import annotations
 import argparse
 import re
 import subprocess
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from toc.imaging import write_solid_image  # noqa: E402
+from toc.manifest import load_manifest  # noqa: E402
+
 
 @dataclass
 class SceneAssetSpec:
@@ -65,6 +73,27 @@ def duration_from_timestamp_range(ts_range: str | None, default_seconds: int) ->
     return end - start
 
 
+def load_scene_specs(manifest_path: Path) -> tuple[tuple[int, int], list[SceneAssetSpec]]:
+    """Scene/cut outputs from the compiled manifest (line parser as fallback)."""
+    try:
+        manifest = load_manifest(manifest_path)
+    except Exception:
+        return parse_manifest_yaml(extract_yaml_block(manifest_path.read_text(encoding="utf-8")))
+    scenes = [
+        SceneAssetSpec(
+            scene_id=cut.synthetic_id,
+            timestamp=cut.timestamp,
+            duration_seconds=cut.duration_seconds,
+            image_output=cut.image_output,
+            video_output=cut.video_output,
+            narration_output=cut.narration_output,
+        )
+        for cut in manifest.iter_cuts()
+        if cut.image_output or cut.video_output or cut.narration_output
+    ]
+    return manifest.resolution or (1080, 1920), scenes
+
+
 def parse_manifest_yaml(yaml_text: str) -> tuple[tuple[int, int], list[SceneAssetSpec]]:
     resolution = (1080, 1920)
     scenes: list[SceneAssetSpec] = []
@@ -213,21 +242,8 @@ def ensure_parent(path: Path) -> None:
 def maybe_write_placeholder_image(out_path: Path, width: int, height: int, color: str, force: bool) -> None:
     if out_path.exists() and not force:
         return
-    ensure_parent(out_path)
-    run(
-        [
-            "ffmpeg",
-            "-hide_banner",
-            "-y",
-            "-f",
-            "lavfi",
-            "-i",
-            f"color=c={color}:s={width}x{height}:d=1",
-            "-frames:v",
-            "1",
-            str(out_path),
-        ]
-    )
+    # Solid PNG encoded in-process; ffmpeg (lavfi color) only for other formats without Pillow.
+    write_solid_image(out_path, width, height, color)
 
 
 def maybe_write_placeholder_video(out_path: Path, width: int, height: int, duration_seconds: int, color: str, force: bool) -> None:
@@ -310,9 +326,7 @@ def main() -> None:
 
     base_dir = Path(args.base_dir) if args.base_dir else manifest_path.parent
 
-    md = manifest_path.read_text(encoding="utf-8")
-    yaml_text = extract_yaml_block(md)
-    (width, height), scenes = parse_manifest_yaml(yaml_text)
+    (width, height), scenes = load_scene_specs(manifest_path)
 
     if not scenes:
         raise SystemExit("No scenes found in manifest YAML.")
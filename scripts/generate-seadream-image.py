@@ -10,9 +10,7 @@ from __future__ import annotations
 import argparse
 import json
 import os
-import subprocess
 import sys
-import tempfile
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -21,6 +19,7 @@ if str(REPO_ROOT) not in sys.path:
 
 from toc.env import load_env_files
 from toc.http import HttpError
+from toc.imaging import save_image_bytes
 from toc.providers.seadream import SeaDreamClient, SeaDreamConfig
 
 
@@ -31,36 +30,6 @@ def _env(name: str, default: str | None = None) -> str | None:
     return v
 
 
-def _guess_suffix(mime_type: str | None) -> str:
-    if not mime_type:
-        return ".bin"
-    mt = mime_type.lower()
-    if mt == "image/png":
-        return ".png"
-    if mt == "image/jpeg":
-        return ".jpg"
-    if mt == "image/webp":
-        return ".webp"
-    return ".bin"
-
-
-def _run_ffmpeg_convert_image(src: Path, dst: Path) -> None:
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    subprocess.run(
-        [
-            "ffmpeg",
-            "-hide_banner",
-            "-y",
-            "-i",
-            str(src),
-            "-frames:v",
-            "1",
-            str(dst),
-        ],
-        check=True,
-    )
-
-
 def main() -> None:
     load_env_files(repo_root=REPO_ROOT)
 
@@ -105,23 +74,8 @@ def main() -> None:
         Path(args.save_json).write_text(json.dumps(resp, ensure_ascii=False, indent=2), encoding="utf-8")
 
     out_path = Path(args.out)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-
-    suffix = _guess_suffix(mime_type or "image/png")
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp_path = Path(tmp.name)
-        tmp.write(image_bytes)
-
-    try:
-        try:
-            _run_ffmpeg_convert_image(tmp_path, out_path)
-        except FileNotFoundError:
-            out_path.write_bytes(image_bytes)
-    finally:
-        try:
-            tmp_path.unlink(missing_ok=True)
-        except Exception:
-            pass
+    # Same-format bytes are written as-is; conversion runs in-process (ffmpeg only as fallback).
+    save_image_bytes(image_bytes, out_path)
 
     print(f"Wrote: {out_path}")
 
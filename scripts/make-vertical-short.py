@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 """
-Create a 9:16 vertical short (~60s) from an approved ToC run video (16:9).
+Create 9:16 vertical shorts (~60s) from an approved ToC run video (16:9).
 
 This script:
 - Reads approval from output/<topic>_<timestamp>/state.txt (review.video.status=approved)
 - Uses timestamps from video_manifest.md (```yaml) to cut scene ranges from video.mp4
 - Center-crops to 9:16 and scales to 1080x1920
-- Concatenates segments into a single short mp4
+- Concatenates segments into a single short mp4 per short
 - Appends artifact + stage to state.txt on success
+
+One short: `--scene-ids 10,20,30`. Many shorts: `--specs shorts.yaml` (list of
+`{scene_ids, duration_seconds?, out?}`). Every distinct segment of every short is cut in
+as few ffmpeg passes as possible: each pass input-seeks (`-ss` before `-i`) to the first
+segment it needs, decodes + crops once, and fans out with split/trim branches into one
+encoder per segment (encoders run in parallel inside ffmpeg). Shorts are then assembled
+from the encoded segments with a stream-copy concat.
 """
 
 from __future__ import annotations
@@ -19,8 +26,20 @@ import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from toc.manifest import load_manifest_data  # noqa: E402
+from toc.mediainfo import MediaInfoCache  # noqa: E402
+
+
+ENCODE_ARGS = ["-c:v", "libx264", "-preset", "medium", "-crf", "18", "-pix_fmt", "yuv420p"]
+AUDIO_ENCODE_ARGS = ["-c:a", "aac", "-b:a", "192k"]
+
 
 def extract_yaml_block(text: str) -> str:
     m = re.search(r"```yaml\s*\n(.*?)\n```", text, flags=re.DOTALL)
@@ -120,9 +139,10 @@ def run(cmd: list[str]) -> None:
 
 
 def load_scene_ranges(manifest_path: Path) -> dict[int, tuple[int, int]]:
-    md = manifest_path.read_text(encoding="utf-8")
-    y = extract_yaml_block(md)
-    data = _safe_load_yaml(y)
+    try:
+        data = load_manifest_data(manifest_path)
+    except Exception:
+        data = _safe_load_yaml(extract_yaml_block(manifest_path.read_text(encoding="utf-8")))
     scenes = data.get("scenes")
     out: dict[int, tuple[int, int]] = {}
     if not isinstance(scenes, list):
@@ -152,13 +172,169 @@ def crop_filter_9x16_center() -> str:
     return r"crop=min(iw\,ih*9/16):ih:(iw-min(iw\,ih*9/16))/2:0,scale=1080:1920"
 
 
+def plan_segments(scene_ids: list[int], ranges: dict[int, tuple[int, int]], duration_seconds: int) -> list[dict]:
+    segments: list[dict] = []
+    remaining = int(duration_seconds)
+    for sid in scene_ids:
+        start, end = ranges[sid]
+        seg_len = end - start
+        if remaining <= 0:
+            break
+        if seg_len > remaining:
+            end = start + remaining
+            seg_len = end - start
+        segments.append({"scene_id": sid, "start": start, "end": end, "duration": seg_len})
+        remaining -= seg_len
+    return segments
+
+
+def _parse_scene_ids(value: object) -> list[int]:
+    items = value if isinstance(value, list) else str(value or "").split(",")
+    return [int(str(x).strip()) for x in items if str(x).strip()]
+
+
+def load_short_specs(path: Path, *, run_dir: Path, default_duration: int) -> list[dict]:
+    """Specs file (JSON or YAML): a list of shorts, or `{shorts: [...]}`."""
+    text = path.read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        try:
+            import yaml  # type: ignore
+        except Exception as e:
+            raise SystemExit(f"--specs is not JSON and PyYAML is not installed: {path}") from e
+        data = yaml.safe_load(text)
+    if isinstance(data, dict):
+        data = data.get("shorts")
+    if not isinstance(data, list) or not data:
+        raise SystemExit(f"--specs must contain a non-empty list of shorts: {path}")
+
+    specs: list[dict] = []
+    for i, raw in enumerate(data, start=1):
+        if not isinstance(raw, dict):
+            raise SystemExit(f"--specs entry #{i} must be a mapping: {raw!r}")
+        scene_ids = _parse_scene_ids(raw.get("scene_ids"))
+        if not scene_ids:
+            raise SystemExit(f"--specs entry #{i} has no scene_ids")
+        out = Path(str(raw["out"])) if raw.get("out") else Path("shorts") / f"short{i:02d}.mp4"
+        specs.append(
+            {
+                "index": i,
+                "scene_ids": scene_ids,
+                "duration_seconds": int(raw.get("duration_seconds") or default_duration),
+                "out": out if out.is_absolute() else run_dir / out,
+            }
+        )
+    return specs
+
+
+def plan_passes(shorts: list[dict], *, max_branches: int) -> list[dict]:
+    """
+    Group the distinct (start, end) segments of all shorts into decode passes, in timeline
+    order, at most `max_branches` encoders each. Each pass seeks to its first segment and
+    decodes only up to its last segment end.
+    """
+    unique = sorted({(seg["start"], seg["end"]) for short in shorts for seg in short["segments"]})
+    passes: list[dict] = []
+    for i in range(0, len(unique), max(1, max_branches)):
+        chunk = unique[i : i + max(1, max_branches)]
+        seek = min(start for start, _ in chunk)
+        passes.append({"seek": seek, "duration": max(end for _, end in chunk) - seek, "segments": [list(seg) for seg in chunk]})
+    return passes
+
+
+def _ts(value: float) -> str:
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def build_pass_command(video_path: Path, plan: dict, seg_files: list[Path], *, has_audio: bool) -> list[str]:
+    """One decode of [seek, seek+duration] -> crop once -> split/trim -> one encoded file per segment."""
+    n = len(plan["segments"])
+    seek = plan["seek"]
+    graph = [f"[0:v]{crop_filter_9x16_center()},split={n}" + "".join(f"[c{i}]" for i in range(n))]
+    if has_audio:
+        graph.append(f"[0:a]asplit={n}" + "".join(f"[d{i}]" for i in range(n)))
+    for i, (start, end) in enumerate(plan["segments"]):
+        rel = f"start={_ts(start - seek)}:end={_ts(end - seek)}"
+        graph.append(f"[c{i}]trim={rel},setpts=PTS-STARTPTS[v{i}]")
+        if has_audio:
+            graph.append(f"[d{i}]atrim={rel},asetpts=PTS-STARTPTS[a{i}]")
+
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-y",
+        "-ss",
+        _ts(seek),
+        "-t",
+        _ts(plan["duration"]),
+        "-i",
+        str(video_path),
+        "-filter_complex",
+        ";".join(graph),
+    ]
+    for i, seg_file in enumerate(seg_files):
+        cmd += ["-map", f"[v{i}]"]
+        if has_audio:
+            cmd += ["-map", f"[a{i}]"]
+        cmd += ENCODE_ARGS + (AUDIO_ENCODE_ARGS if has_audio else []) + [str(seg_file)]
+    return cmd
+
+
+def _has_audio(video_path: Path) -> bool:
+    try:
+        info = MediaInfoCache.from_env(REPO_ROOT).probe(video_path)
+    except FileNotFoundError:
+        info = None
+    if info is not None:
+        return info.audio_codec is not None
+    # No ffprobe (or it could not read the file): ask ffmpeg, which the cut needs anyway.
+    res = subprocess.run(["ffmpeg", "-hide_banner", "-i", str(video_path)], capture_output=True, text=True, check=False)
+    return re.search(r"^\s*Stream #.*: Audio:", res.stderr, flags=re.MULTILINE) is not None
+
+
+def render_shorts(video_path: Path, shorts: list[dict], passes: list[dict], *, tmp: Path) -> None:
+    seg_file: dict[tuple[int, int], Path] = {}
+    for p_idx, plan in enumerate(passes):
+        files = [tmp / f"seg_{p_idx:02d}_{i:02d}.mp4" for i in range(len(plan["segments"]))]
+        seg_file.update({tuple(seg): f for seg, f in zip(plan["segments"], files)})
+
+    has_audio = _has_audio(video_path)
+    for plan in passes:
+        files = [seg_file[tuple(seg)] for seg in plan["segments"]]
+        run(build_pass_command(video_path, plan, files, has_audio=has_audio))
+
+    def concat(short: dict) -> None:
+        concat_list = tmp / f"concat_{short['index']:02d}.txt"
+        concat_list.write_text(
+            "\n".join([f"file '{seg_file[(seg['start'], seg['end'])].as_posix()}'" for seg in short["segments"]]) + "\n",
+            encoding="utf-8",
+        )
+        short["out"].parent.mkdir(parents=True, exist_ok=True)
+        run(["ffmpeg", "-hide_banner", "-y", "-f", "concat", "-safe", "0", "-i", str(concat_list), "-c", "copy", str(short["out"])])
+
+    with ThreadPoolExecutor(max_workers=min(4, len(shorts))) as pool:
+        list(pool.map(concat, shorts))
+
+
 def main() -> int:
-    parser = argparse.ArgumentParser(description="Make a vertical (9:16) short from an approved run video.")
+    parser = argparse.ArgumentParser(description="Make vertical (9:16) shorts from an approved run video.")
     parser.add_argument("--run-dir", required=True, help="output/<topic>_<timestamp> directory")
-    parser.add_argument("--scene-ids", required=True, help="Comma-separated scene ids (e.g. 10,20,30)")
-    parser.add_argument("--out", default=None, help="Output mp4 path (default: <run-dir>/shorts/short01.mp4)")
-    parser.add_argument("--duration-seconds", type=int, default=60, help="Max total duration (default: 60)")
+    which = parser.add_mutually_exclusive_group(required=True)
+    which.add_argument("--scene-ids", help="Comma-separated scene ids (e.g. 10,20,30)")
+    which.add_argument(
+        "--specs",
+        help="JSON/YAML list of shorts: [{scene_ids: [10, 20], duration_seconds: 60, out: shorts/short01.mp4}] (out is relative to --run-dir)",
+    )
+    parser.add_argument("--out", default=None, help="Output mp4 path for --scene-ids (default: <run-dir>/shorts/short01.mp4)")
+    parser.add_argument("--duration-seconds", type=int, default=60, help="Max total duration per short (default: 60)")
     parser.add_argument("--manifest", default=None, help="Manifest path (default: <run-dir>/video_manifest.md)")
+    parser.add_argument(
+        "--max-branches",
+        type=int,
+        default=8,
+        help="Max segments encoded per decode pass (bounds parallel encoders/memory; default: 8)",
+    )
     parser.add_argument("--dry-run", action="store_true", help="Parse only, do not call ffmpeg or write files.")
     args = parser.parse_args()
 
@@ -176,114 +352,48 @@ def main() -> int:
     if not video_path.exists():
         raise SystemExit(f"Video not found: {video_path}")
 
-    out_path = Path(args.out) if args.out else (run_dir / "shorts" / "short01.mp4")
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-
-    scene_ids = [int(x.strip()) for x in str(args.scene_ids).split(",") if x.strip()]
-    if not scene_ids:
-        raise SystemExit("--scene-ids is required")
+    if args.specs:
+        shorts = load_short_specs(Path(args.specs), run_dir=run_dir, default_duration=int(args.duration_seconds))
+    else:
+        scene_ids = _parse_scene_ids(args.scene_ids)
+        if not scene_ids:
+            raise SystemExit("--scene-ids is required")
+        out_path = Path(args.out) if args.out else (run_dir / "shorts" / "short01.mp4")
+        shorts = [{"index": 1, "scene_ids": scene_ids, "duration_seconds": int(args.duration_seconds), "out": out_path}]
 
     ranges = load_scene_ranges(manifest_path)
-    missing = [sid for sid in scene_ids if sid not in ranges]
+    missing = sorted({sid for short in shorts for sid in short["scene_ids"] if sid not in ranges})
     if missing:
         raise SystemExit(f"Missing timestamp for scene_id(s): {missing} in {manifest_path}")
-
-    segments: list[dict] = []
-    remaining = int(args.duration_seconds)
-    for sid in scene_ids:
-        start, end = ranges[sid]
-        seg_len = end - start
-        if remaining <= 0:
-            break
-        if seg_len > remaining:
-            end = start + remaining
-            seg_len = end - start
-        segments.append({"scene_id": sid, "start": start, "end": end, "duration": seg_len})
-        remaining -= seg_len
+    for short in shorts:
+        short["segments"] = plan_segments(short["scene_ids"], ranges, short["duration_seconds"])
+    passes = plan_passes(shorts, max_branches=int(args.max_branches))
 
     if args.dry_run:
-        print(json.dumps({"video": str(video_path), "out": str(out_path), "segments": segments}, ensure_ascii=False))
+        if args.specs:
+            payload = {
+                "video": str(video_path),
+                "shorts": [{"out": str(s["out"]), "scene_ids": s["scene_ids"], "segments": s["segments"]} for s in shorts],
+                "passes": passes,
+            }
+        else:
+            payload = {"video": str(video_path), "out": str(shorts[0]["out"]), "segments": shorts[0]["segments"], "passes": passes}
+        print(json.dumps(payload, ensure_ascii=False))
         return 0
 
     if not ffmpeg_exists():
         raise SystemExit("ffmpeg not found. Please install ffmpeg.")
 
     with tempfile.TemporaryDirectory(prefix="toc_short_") as td:
-        tmp = Path(td)
-        seg_files: list[Path] = []
-        vf = crop_filter_9x16_center()
-
-        for i, seg in enumerate(segments):
-            seg_out = tmp / f"seg_{i:02d}.mp4"
-            seg_files.append(seg_out)
-            run(
-                [
-                    "ffmpeg",
-                    "-hide_banner",
-                    "-y",
-                    "-i",
-                    str(video_path),
-                    "-ss",
-                    str(seg["start"]),
-                    "-t",
-                    str(seg["duration"]),
-                    "-vf",
-                    vf,
-                    "-c:v",
-                    "libx264",
-                    "-preset",
-                    "medium",
-                    "-crf",
-                    "18",
-                    "-pix_fmt",
-                    "yuv420p",
-                    "-c:a",
-                    "aac",
-                    "-b:a",
-                    "192k",
-                    str(seg_out),
-                ]
-            )
-
-        concat_list = tmp / "concat.txt"
-        concat_list.write_text(
-            "\n".join([f"file '{p.as_posix()}'" for p in seg_files]) + "\n",
-            encoding="utf-8",
-        )
-
-        run(
-            [
-                "ffmpeg",
-                "-hide_banner",
-                "-y",
-                "-f",
-                "concat",
-                "-safe",
-                "0",
-                "-i",
-                str(concat_list),
-                "-c",
-                "copy",
-                str(out_path),
-            ]
-        )
+        render_shorts(video_path, shorts, passes, tmp=Path(td))
 
-    subprocess.run(
-        [
-            sys.executable,
-            "scripts/toc-state.py",
-            "append",
-            "--run-dir",
-            str(run_dir),
-            "--set",
-            "runtime.stage=shorts",
-            "--set",
-            f"artifact.video.short.01={out_path.resolve()}",
-        ],
-        check=True,
-    )
+    cmd = [sys.executable, "scripts/toc-state.py", "append", "--run-dir", str(run_dir), "--set", "runtime.stage=shorts"]
+    for short in shorts:
+        cmd += ["--set", f"artifact.video.short.{short['index']:02d}={short['out'].resolve()}"]
+    subprocess.run(cmd, check=True)
 
-    print(f"Wrote: {out_path}")
+    for short in shorts:
+        print(f"Wrote: {short['out']}")
     return 0
 
 
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Run a local stand-in for the Gemini / Kling / Ark (SeaDream, Seedance) / EvoLink /
+ElevenLabs APIs so the generation pipeline can be exercised without paid calls.
+
+Example:
+  python scripts/mock-provider-server.py --port 8765 --latency lognormal:300,0.6 \
+      --error-rate 0.02 --burst-every 50 --burst-length 5 --job-seconds 3 &
+  eval "$(python scripts/mock-provider-server.py --port 8765 --print-env)"
+  python scripts/generate-assets-from-manifest.py --manifest output/<run>/video_manifest.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shlex
+import signal
+import sys
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from toc.mock_providers import Latency, MockBehavior, MockProviderServer  # noqa: E402
+
+
+def _interrupt(signum: int, frame: object) -> None:
+    raise KeyboardInterrupt
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local mock server for ToC provider APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:<ms> | uniform:<lo>,<hi> | lognormal:<median>,<sigma>")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests answered with 503.")
+    parser.add_argument("--burst-every", type=int, default=0, help="Inject a 429 burst every N API requests.")
+    parser.add_argument("--burst-length", type=int, default=0, help="Requests per 429 burst.")
+    parser.add_argument("--rpm", type=int, default=0, help="Per-provider requests/minute before 429 (0 = unlimited).")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429/503.")
+    parser.add_argument("--job-seconds", type=float, default=0.0, help="How long async video jobs stay running.")
+    parser.add_argument("--video-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--print-env", action="store_true", help="Print shell exports for the clients and exit.")
+    parser.add_argument("--stats-out", default=None, help="Write request/error counters as JSON on shutdown.")
+    args = parser.parse_args()
+
+    try:
+        latency = Latency.parse(args.latency)
+    except ValueError as e:
+        raise SystemExit(str(e)) from e
+
+    behavior = MockBehavior(
+        latency=latency,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        rpm=args.rpm,
+        retry_after_seconds=args.retry_after,
+        job_seconds=args.job_seconds,
+        video_bytes=args.video_bytes,
+        seed=args.seed,
+    )
+
+    if args.print_env:
+        for k, v in MockProviderServer.env_for(f"http://{args.host}:{args.port}").items():
+            print(f"export {k}={shlex.quote(v)}")
+        return 0
+
+    server = MockProviderServer(behavior, host=args.host, port=args.port)
+    signal.signal(signal.SIGTERM, _interrupt)
+    print(f"Mock providers listening on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        if args.stats_out:
+            Path(args.stats_out).write_text(json.dumps(server.stats(), indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Render a final mp4 from clips and audio in a single ffmpeg pass.
+
+Notes:
+- clips.txt must be in ffmpeg concat format:
+  file 'path/to/clip1.mp4'
+  file 'path/to/clip2.mp4'
+- If --audio is provided, narration/bgm are ignored.
+- If clips have different codecs, use --reencode.
+- --fps / --size / --srt imply a re-encode; everything is done in one encode.
+- --incremental normalizes each clip into a cached segment (keyed by clip hash +
+  size/fps/preset) and stream-copies the segments, so only changed cuts are encoded.
+  Falls back to a full render with --srt or when the clips' own audio is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from toc.render import (  # noqa: E402
+    DEFAULT_PRESET,
+    RENDER_PRESETS,
+    RenderSpec,
+    SegmentCache,
+    build_normalize_command,
+    build_render_command,
+    read_concat_list,
+    segment_render_spec,
+    supports_incremental,
+    write_concat_list,
+)
+from toc.system_config import configured_max_workers  # noqa: E402
+
+
+def _optional_path(value: str | None) -> Path | None:
+    return Path(value) if value else None
+
+
+def build_spec(args: argparse.Namespace) -> RenderSpec:
+    return RenderSpec(
+        clip_list=Path(args.clip_list),
+        out=Path(args.out),
+        narration=_optional_path(args.narration),
+        narration_list=_optional_path(args.narration_list),
+        bgm=_optional_path(args.bgm),
+        bgm_volume=str(args.bgm_volume),
+        audio=_optional_path(args.audio),
+        srt=_optional_path(args.srt),
+        fps=args.fps or None,
+        size=args.size or None,
+        reencode=bool(args.reencode),
+        preset=args.preset,
+    )
+
+
+def _encode_segment(clip: Path, segment: Path, spec: RenderSpec) -> None:
+    segment.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(segment.parent), prefix=".tmp-", suffix=segment.suffix)
+    os.close(fd)
+    try:
+        subprocess.run(build_normalize_command(clip, Path(tmp), spec), check=True)
+        os.replace(tmp, segment)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+
+
+@contextlib.contextmanager
+def render_incremental(spec: RenderSpec, cache: SegmentCache, *, max_workers: int) -> Iterator[list[str]]:
+    """Encode missing segments, then yield the stream-copy command over all segments (its list is removed on exit)."""
+    clips = read_concat_list(spec.clip_list)
+    if not clips:
+        raise SystemExit(f"clip list is empty: {spec.clip_list}")
+    for clip in clips:
+        if not clip.exists():
+            raise SystemExit(f"clip not found: {clip}")
+
+    segments: list[Path] = []
+    missing: dict[Path, Path] = {}
+    for clip in clips:
+        seg, cached = cache.lookup(clip, spec)
+        segments.append(seg)
+        if not cached:
+            missing.setdefault(seg, clip)
+    print(f"Segments: {len(clips) - len(missing)} reused, {len(missing)} to encode")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for fut in [pool.submit(_encode_segment, clip, seg, spec) for seg, clip in missing.items()]:
+            fut.result()
+    cache.evict(keep=set(segments))
+
+    fd, list_path = tempfile.mkstemp(prefix="segments-", suffix=".txt", dir=str(cache.root))
+    os.close(fd)
+    try:
+        write_concat_list(segments, Path(list_path))
+        yield build_render_command(segment_render_spec(spec, Path(list_path)))
+    finally:
+        Path(list_path).unlink(missing_ok=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Render a final mp4 from clips and audio.")
+    parser.add_argument("--clip-list", required=True, help="ffmpeg concat list of video clips.")
+    parser.add_argument("--narration", default=None)
+    parser.add_argument("--narration-list", default=None, help="ffmpeg concat list of narration files.")
+    parser.add_argument("--bgm", default=None)
+    parser.add_argument("--bgm-volume", default="0.3")
+    parser.add_argument("--audio", default=None, help="Pre-mixed audio (narration/bgm are ignored).")
+    parser.add_argument("--srt", default=None, help="Burn in subtitles.")
+    parser.add_argument("--fps", default=None)
+    parser.add_argument("--size", default=None, help="WxH, e.g. 1280x720.")
+    parser.add_argument("--reencode", action="store_true", help="Re-encode video even without filters.")
+    parser.add_argument(
+        "--preset",
+        default=DEFAULT_PRESET,
+        choices=sorted(RENDER_PRESETS),
+        help="Encoder preset (software libx264; default reproduces the historical output).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse per-clip normalized segments and stream-copy them (only changed cuts are encoded).",
+    )
+    parser.add_argument("--segment-cache-dir", default=None, help="Default: TOC_RENDER_SEGMENT_CACHE_DIR or output/.cache/segments.")
+    parser.add_argument("--max-workers", type=int, default=None, help="Parallel segment encodes (incremental only).")
+    parser.add_argument("--print-command", action="store_true", help="Print the ffmpeg command and exit.")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    if args.narration and args.narration_list:
+        raise SystemExit("Use either --narration or --narration-list, not both.")
+
+    try:
+        spec = build_spec(args)
+        cmd = build_render_command(spec)
+    except ValueError as e:
+        raise SystemExit(str(e)) from e
+
+    if args.print_command:
+        print(shlex.join(cmd))
+        return 0
+
+    if not shutil.which("ffmpeg"):
+        raise SystemExit("ffmpeg not found. Please install ffmpeg.")
+    if not Path(args.clip_list).is_file():
+        raise SystemExit(f"clip list not found: {args.clip_list}")
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    if args.incremental and supports_incremental(spec):
+        cache = SegmentCache.from_env(REPO_ROOT, root=Path(args.segment_cache_dir) if args.segment_cache_dir else None)
+        cache.root.mkdir(parents=True, exist_ok=True)
+        max_workers = args.max_workers if args.max_workers is not None else configured_max_workers(REPO_ROOT)
+        with render_incremental(spec, cache, max_workers=max_workers) as cmd:
+            subprocess.run(cmd, check=True)
+    else:
+        if args.incremental:
+            print("Incremental render needs external audio and no --srt; rendering in full.")
+        subprocess.run(cmd, check=True)
+    print(f"Rendered: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,7 +10,9 @@ Intended workflow:
 3) Generate images/videos using the updated durations.
 
 Notes:
-- Uses `ffprobe` to read audio duration.
+- Reads audio durations in-process from MP3/WAV/M4A headers (toc/audioinfo.py); other
+  files go through `ffprobe` in one parallel batch, cached across runs by path/size/mtime
+  (toc/mediainfo.py).
 - Updates `video_generation.duration_seconds` (ceil by default) so video is not shorter than narration.
 - Updates `scenes[].timestamp` sequentially (00:00-...).
 """
@@ -21,7 +23,7 @@ import argparse
 import math
 import re
 import shutil
-import subprocess
+import sys
 from pathlib import Path
 from typing import Any
 
@@ -30,6 +32,13 @@ try:
 except ModuleNotFoundError:  # pragma: no cover
     yaml = None
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from toc.manifest import load_manifest_data  # noqa: E402
+from toc.mediainfo import MediaInfoCache  # noqa: E402
+
 
 def extract_yaml_block(text: str) -> str:
     m = re.search(r"```yaml\s*\n(.*?)\n```", text, flags=re.DOTALL)
@@ -67,33 +76,34 @@ def _mmss(total_seconds: int) -> str:
     return f"{m:02d}:{r:02d}"
 
 
-def _ffprobe_duration_seconds(path: Path) -> float:
+def _narration_outputs(scenes: list[Any]) -> list[str]:
+    outs: list[str] = []
+    for scene in scenes:
+        if not isinstance(scene, dict):
+            continue
+        raw_cuts = scene.get("cuts")
+        containers = [c for c in raw_cuts if isinstance(c, dict)] if isinstance(raw_cuts, list) and raw_cuts else [scene]
+        for container in containers:
+            audio = container.get("audio")
+            narration = audio.get("narration") if isinstance(audio, dict) else None
+            out = _as_opt_str(narration.get("output")) if isinstance(narration, dict) else None
+            if out:
+                outs.append(out)
+    return outs
+
+
+def _probe_durations(paths: list[Path]) -> dict[Path, float]:
+    """Durations for all existing paths: in-process header parsing, cached ffprobe for the rest."""
     try:
-        res = subprocess.run(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "default=nw=1:nk=1",
-                str(path),
-            ],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
+        found = MediaInfoCache.from_env(REPO_ROOT).durations(paths)
     except FileNotFoundError as e:  # pragma: no cover
         raise SystemExit("ffprobe not found. Please install ffmpeg (ffprobe).") from e
-    except subprocess.CalledProcessError as e:
-        raise SystemExit((e.stderr or "").strip() or f"ffprobe failed for: {path}") from e
-
-    raw = (res.stdout or "").strip()
-    try:
-        return float(raw)
-    except Exception as e:
-        raise SystemExit(f"ffprobe returned invalid duration for {path}: {raw!r}") from e
+    out: dict[Path, float] = {}
+    for path, duration in found.items():
+        if duration is None:
+            raise SystemExit(f"ffprobe failed for: {path}")
+        out[path] = float(duration)
+    return out
 
 
 def _role_bounds(*, role: str) -> tuple[int, int]:
@@ -146,15 +156,18 @@ def main() -> None:
 
     base_dir = Path(args.base_dir) if args.base_dir else manifest_path.parent
     md = manifest_path.read_text(encoding="utf-8")
-    y = extract_yaml_block(md)
-    manifest = yaml.safe_load(y)
-    if not isinstance(manifest, dict):
-        raise SystemExit("Manifest YAML must be a mapping at the root.")
+    try:
+        manifest = load_manifest_data(manifest_path)
+    except ValueError as e:
+        raise SystemExit(str(e)) from e
 
     scenes = manifest.get("scenes")
     if not isinstance(scenes, list):
         raise SystemExit("Manifest YAML scenes must be a list.")
 
+    audio_paths = [p for p in (_resolve_path(base_dir, out) for out in _narration_outputs(scenes)) if p is not None]
+    durations = _probe_durations(audio_paths)
+
     cursor = 0
     total_video_seconds = 0
     changed = 0
@@ -170,7 +183,7 @@ def main() -> None:
                 return None
             raise SystemExit(f"Missing narration audio: {audio_path}")
 
-        dur_f = _ffprobe_duration_seconds(audio_path)
+        dur_f = durations[audio_path]
         dur_i = max(0, _round_duration(dur_f, mode=args.rounding))
         min_s, max_s = _role_bounds(role=role)
         if dur_i > max_s:
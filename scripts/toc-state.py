@@ -6,6 +6,11 @@ State format:
 - Append-only key=value blocks separated by a line containing only "---".
 - For backward compatibility, we interpret the "current state" as a merge of all keys
   in order (last write wins), even if older blocks were partial updates.
+- Updates go through the per-run SQLite store (state.sqlite3, see toc/state_store.py),
+  which mirrors every snapshot to state.txt / run_status.json. `history` queries it;
+  `export` rewrites state.txt and run_status.json from it.
+- `catalog` answers cross-run queries (status / stage / pending gate) from an incrementally
+  refreshed index of output/ (see toc/catalog.py).
 """
 
 from __future__ import annotations
@@ -28,6 +33,8 @@ from toc.harness import (
     safe_load_yaml,
     sync_run_status,
 )
+from toc.catalog import RunCatalog, entries_to_json
+from toc.state_store import StateStore, store_enabled
 
 
 def read_manifest_topic(manifest_path: Path) -> str:
@@ -209,6 +216,54 @@ def cmd_sync(args: argparse.Namespace) -> int:
     return 0
 
 
+def cmd_history(args: argparse.Namespace) -> int:
+    run_dir = Path(args.run_dir)
+    if not (run_dir / "state.txt").exists():
+        raise SystemExit(f"state.txt not found: {run_dir / 'state.txt'}")
+    if not store_enabled():
+        raise SystemExit("State store is disabled (TOC_STATE_STORE=0 or sqlite3 unavailable).")
+    for change in StateStore.for_run_dir(run_dir).history(args.key, limit=args.limit):
+        print(f"{change.seq}\t{change.ts}\t{change.key}={change.value}")
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    run_dir = Path(args.run_dir)
+    if not store_enabled():
+        raise SystemExit("State store is disabled (TOC_STATE_STORE=0 or sqlite3 unavailable).")
+    state_path, status_path = StateStore.for_run_dir(run_dir).export()
+    print(state_path)
+    print(status_path)
+    return 0
+
+
+def cmd_catalog(args: argparse.Namespace) -> int:
+    output_root = Path(args.output_dir)
+    catalog = RunCatalog(output_root, db_path=Path(args.db) if args.db else None)
+    if not args.no_refresh:
+        stats = catalog.refresh(rebuild=bool(args.rebuild))
+        if args.verbose:
+            print(f"[catalog] scanned={stats.scanned} updated={stats.updated} removed={stats.removed}", file=sys.stderr)
+    entries = catalog.query(
+        status=args.status,
+        stage=args.stage,
+        pending_gate=args.pending_gate,
+        topic=args.topic,
+        limit=args.limit,
+    )
+    if args.json:
+        print(entries_to_json(entries))
+        return 0
+    for e in entries:
+        gates = ",".join(e.pending_gates) or "-"
+        size_mb = e.artifact_bytes / 2**20
+        print(
+            f"{e.name}\tstatus={e.status or '-'}\tstage={e.stage or '-'}\tpending={gates}"
+            f"\tartifacts={e.artifact_count} ({size_mb:.1f}MiB)\tupdated={e.updated_at or '-'}"
+        )
+    return 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="ToC state.txt helper (append-only snapshots).")
     sub = parser.add_subparsers(dest="cmd", required=True)
@@ -246,6 +301,30 @@ def main() -> int:
     p_sync.add_argument("--run-dir", required=True)
     p_sync.set_defaults(fn=cmd_sync)
 
+    p_history = sub.add_parser("history", help="List state changes (newest first) from the run state store.")
+    p_history.add_argument("--run-dir", required=True)
+    p_history.add_argument("--key", default=None, help="Only changes of this key.")
+    p_history.add_argument("--limit", type=int, default=None)
+    p_history.set_defaults(fn=cmd_history)
+
+    p_export = sub.add_parser("export", help="Rewrite state.txt and run_status.json from the run state store.")
+    p_export.add_argument("--run-dir", required=True)
+    p_export.set_defaults(fn=cmd_export)
+
+    p_catalog = sub.add_parser("catalog", help="Query all runs under output/ (incrementally indexed).")
+    p_catalog.add_argument("--output-dir", default=str(REPO_ROOT / "output"))
+    p_catalog.add_argument("--db", default=None, help="Catalog path (default: <output>/.cache/catalog.sqlite3).")
+    p_catalog.add_argument("--status", default=None)
+    p_catalog.add_argument("--stage", default=None, help="runtime.stage")
+    p_catalog.add_argument("--pending-gate", default=None, help="e.g. video_review")
+    p_catalog.add_argument("--topic", default=None, help="Substring match on topic.")
+    p_catalog.add_argument("--limit", type=int, default=None)
+    p_catalog.add_argument("--json", action="store_true")
+    p_catalog.add_argument("--no-refresh", action="store_true", help="Query the index as-is without scanning output/.")
+    p_catalog.add_argument("--rebuild", action="store_true", help="Re-read every run instead of only changed ones.")
+    p_catalog.add_argument("--verbose", action="store_true")
+    p_catalog.set_defaults(fn=cmd_catalog)
+
     args = parser.parse_args()
     return int(args.fn(args))
 
@@ -5,8 +5,6 @@ from __future__ import annotations
 
 import argparse
 import json
-import shutil
-import subprocess
 import sys
 from pathlib import Path
 from typing import Any
@@ -26,6 +24,9 @@ from toc.harness import (  # noqa: E402
     sync_run_status,
     write_json,
 )
+from toc.mediacheck import MediaCheckCache, check_media_files  # noqa: E402
+from toc.mediainfo import MediaInfoCache  # noqa: E402
+from toc.render import read_concat_list  # noqa: E402
 
 
 def has_todo(text: str) -> bool:
@@ -341,29 +342,11 @@ def check_manifest_scene_series(run_dir: Path, profile: str) -> tuple[dict[str,
 
 
 def _probe_duration(path: Path) -> float | None:
-    ffprobe = shutil.which("ffprobe")
-    if ffprobe is None or not path.exists():
-        return None
-    result = subprocess.run(
-        [
-            ffprobe,
-            "-v",
-            "error",
-            "-show_entries",
-            "format=duration",
-            "-of",
-            "default=noprint_wrappers=1:nokey=1",
-            str(path),
-        ],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    if result.returncode != 0:
+    if not path.exists():
         return None
     try:
-        return float(result.stdout.strip())
-    except ValueError:
+        return MediaInfoCache.from_env(REPO_ROOT).duration(path)
+    except FileNotFoundError:
         return None
 
 
@@ -398,23 +381,59 @@ def _video_checks(checks: list[dict[str, Any]], *, video_path: Path, state: dict
         add_check(checks, "video.duration", video_duration > 0.0, f"video duration is positive ({video_duration:.2f}s)", kind="rubric")
 
 
-def check_video_single(run_dir: Path) -> tuple[dict[str, Any], dict[str, str]]:
+def _deep_media_checks(checks: list[dict[str, Any]], list_dirs: list[Path]) -> dict[str, Any]:
+    """Decode every clip/narration file listed in video_clips.txt / video_narration_list.txt."""
+    groups = {"clips": ("video_clips.txt", "video"), "narration": ("video_narration_list.txt", "audio")}
+    items: list[tuple[Path, str]] = []
+    owners: list[str] = []
+    for group, (list_name, kind) in groups.items():
+        for list_dir in list_dirs:
+            list_path = list_dir / list_name
+            if not list_path.exists():
+                continue
+            for path in read_concat_list(list_path):
+                items.append((path, kind))
+                owners.append(group)
+
+    results = check_media_files(items, cache=MediaCheckCache.from_env(REPO_ROOT)) if items else []
+    details: dict[str, Any] = {}
+    for group in groups:
+        group_results = [r for r, owner in zip(results, owners) if owner == group]
+        if not group_results:
+            continue
+        failed = [r for r in group_results if r["status"] == "failed"]
+        skipped = sum(1 for r in group_results if r["status"] == "skipped")
+        message = f"{len(group_results)} {group} files decode cleanly (not black/frozen/silent, durations match)"
+        if failed:
+            message += "; failed: " + ", ".join(f"{Path(r['path']).name} ({'; '.join(r['problems'])})" for r in failed[:5])
+        if skipped:
+            message += f"; {skipped} decode-checks skipped (ffmpeg not found)"
+        add_check(checks, f"video.deep.{group}", not failed, message, kind="rubric")
+        details[f"deep_{group}"] = group_results
+    return details
+
+
+def check_video_single(run_dir: Path, *, deep: bool = False) -> tuple[dict[str, Any], dict[str, str]]:
     state = parse_state_file(run_dir / "state.txt")
     checks: list[dict[str, Any]] = []
     _video_checks(checks, video_path=run_dir / "video.mp4", state=state, run_dir=run_dir)
-    return make_stage("video", "video.mp4", checks), {}
+    details = _deep_media_checks(checks, [run_dir]) if deep else None
+    return make_stage("video", "video.mp4", checks, details=details), {}
 
 
-def check_video_scene_series(run_dir: Path) -> tuple[dict[str, Any], dict[str, str]]:
+def check_video_scene_series(run_dir: Path, *, deep: bool = False) -> tuple[dict[str, Any], dict[str, str]]:
     scene_dirs = sorted((run_dir / "scenes").glob("scene*"))
     checks: list[dict[str, Any]] = []
     add_check(checks, "video.scene_dirs", len(scene_dirs) >= 1, f"scene-series has scene directories (got {len(scene_dirs)})")
     video_paths = [scene_dir / "video.mp4" for scene_dir in scene_dirs]
     add_check(checks, "video.scene_files", all(path.exists() for path in video_paths), "each scene has video.mp4")
-    return make_stage("video", "scenes/*/video.mp4", checks, details={"scene_count": len(scene_dirs)}), {}
+    details: dict[str, Any] = {"scene_count": len(scene_dirs)}
+    if deep:
+        details.update(_deep_media_checks(checks, scene_dirs))
+    return make_stage("video", "scenes/*/video.mp4", checks, details=details), {}
 
 
-def build_report(run_dir: Path, flow: str, profile: str) -> tuple[dict[str, Any], dict[str, str]]:
+def build_report(run_dir: Path, flow: str, profile: str, *, deep: bool = False) -> tuple[dict[str, Any], dict[str, str]]:
     state_path = run_dir / "state.txt"
     if not state_path.exists():
         append_state_snapshot(
@@ -440,14 +459,14 @@ def build_report(run_dir: Path, flow: str, profile: str) -> tuple[dict[str, Any]
     if flow == "scene-series":
         script_stage, updates = check_script_scene_series(run_dir, profile)
         manifest_stage, updates2 = check_manifest_scene_series(run_dir, profile)
-        video_stage, updates3 = check_video_scene_series(run_dir)
+        video_stage, updates3 = check_video_scene_series(run_dir, deep=deep)
         stage_updates.update(updates)
         stage_updates.update(updates2)
         stage_updates.update(updates3)
     else:
         script_stage, updates = check_script_single(run_dir, profile)
         manifest_stage, updates2 = check_manifest_single(run_dir, profile, flow)
-        video_stage, updates3 = check_video_single(run_dir)
+        video_stage, updates3 = check_video_single(run_dir, deep=deep)
         stage_updates.update(updates)
         stage_updates.update(updates2)
         stage_updates.update(updates3)
@@ -540,10 +559,15 @@ def main() -> int:
     parser.add_argument("--run-dir", required=True, help="Path to output/<topic>_<timestamp>/")
     parser.add_argument("--flow", required=True, choices=["toc-run", "scene-series", "immersive"])
     parser.add_argument("--profile", default="standard", choices=["fast", "standard"])
+    parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="Decode every clip/narration file (parallel, cached by content hash): black/frozen/silent/truncated detection.",
+    )
     args = parser.parse_args()
 
     run_dir = Path(args.run_dir)
-    report, updates = build_report(run_dir, args.flow, args.profile)
+    report, updates = build_report(run_dir, args.flow, args.profile, deep=args.deep)
 
     report_path = eval_report_path(run_dir)
     write_json(report_path, report)
@@ -0,0 +1,79 @@
+import struct
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+
+from toc.audioinfo import read_duration, read_video_duration
+from toc.mediainfo import MediaInfoCache
+from toc.mock_providers import MP3_FRAME
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def _m4a(timescale: int, duration: int) -> bytes:
+    mvhd = _box(b"mvhd", b"\x00" * 12 + struct.pack(">II", 1000, 1) + b"\x00" * 80)
+    mdhd = _box(b"mdhd", b"\x00" * 12 + struct.pack(">II", timescale, duration) + b"\x00" * 4)
+    hdlr = _box(b"hdlr", b"\x00" * 8 + b"soun" + b"\x00" * 12)
+    trak = _box(b"trak", _box(b"mdia", mdhd + hdlr))
+    return _box(b"ftyp", b"M4A \x00\x00\x00\x00") + _box(b"free", b"\x00" * 16) + _box(b"moov", mvhd + trak)
+
+
+def _trak(handler: bytes, timescale: int, duration: int) -> bytes:
+    mdhd = _box(b"mdhd", b"\x00" * 12 + struct.pack(">II", timescale, duration) + b"\x00" * 4)
+    return _box(b"trak", _box(b"mdia", mdhd + _box(b"hdlr", b"\x00" * 8 + handler + b"\x00" * 12)))
+
+
+def _mp4_av(*, video_ms: int, audio_ms: int) -> bytes:
+    mvhd = _box(b"mvhd", b"\x00" * 12 + struct.pack(">II", 1000, max(video_ms, audio_ms)) + b"\x00" * 80)
+    moov = _box(b"moov", mvhd + _trak(b"vide", 1000, video_ms) + _trak(b"soun", 1000, audio_ms))
+    return _box(b"ftyp", b"isom\x00\x00\x00\x00") + moov
+
+
+class TestAudioInfo(unittest.TestCase):
+    def test_formats(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            cbr = root / "cbr.mp3"
+            cbr.write_bytes(b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10 + MP3_FRAME * 40 + b"TAG" + b"\x00" * 125)
+            self.assertAlmostEqual(read_duration(cbr) or 0, 40 * 1152 / 44100)
+
+            xing_frame = MP3_FRAME[:36] + b"Xing" + struct.pack(">II", 1, 1000) + MP3_FRAME[48:]
+            xing = root / "xing.mp3"
+            xing.write_bytes(xing_frame + MP3_FRAME * 3)
+            self.assertAlmostEqual(read_duration(xing) or 0, 1000 * 1152 / 44100)
+
+            wav = root / "a.wav"
+            with wave.open(str(wav), "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(16000)
+                w.writeframes(b"\x00" * 2 * 16000 * 2)
+            self.assertEqual(read_duration(wav), 2.0)
+
+            m4a = root / "a.m4a"
+            m4a.write_bytes(_m4a(44100, 44100 * 7 // 2))
+            self.assertEqual(read_duration(m4a), 3.5)
+            self.assertEqual(read_video_duration(m4a), 0.001)  # no video track: mvhd
+
+            # Audio runs 1.5s past the video: each reader picks its own track.
+            clip = root / "clip.mp4"
+            clip.write_bytes(_mp4_av(video_ms=2000, audio_ms=3500))
+            self.assertEqual(read_duration(clip), 3.5)
+            self.assertEqual(read_video_duration(clip), 2.0)
+
+            junk = root / "junk.bin"
+            junk.write_bytes(b"not media" * 100)
+            self.assertIsNone(read_duration(junk))
+            (root / "empty.mp3").write_bytes(b"")
+            self.assertIsNone(read_duration(root / "empty.mp3"))
+
+            # Header-readable files never need ffprobe.
+            found = MediaInfoCache(None).durations([cbr, wav, m4a, root / "missing.mp3"], ffprobe=str(root / "no-ffprobe"))
+            self.assertEqual(set(found), {cbr, wav, m4a})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import yaml
+
+from toc.benchmark import find_regressions, run_stage, synthetic_manifest
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_manifest_has_requested_cuts(self) -> None:
+        text = synthetic_manifest(12, cuts_per_scene=5)
+        data = yaml.safe_load(text.split("```yaml", 1)[1].split("```", 1)[0])
+        cuts = [c for s in data["scenes"] for c in s["cuts"]]
+        self.assertEqual(len(data["scenes"]), 3)
+        self.assertEqual(len(cuts), 12)
+        self.assertEqual(cuts[-1]["video_generation"]["output"], "assets/scenes/scene3_cut2_video.mp4")
+
+    def test_run_stage_measures_child(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            code = "import pathlib,sys; pathlib.Path(sys.argv[1]).write_bytes(b'x' * 5000)"
+            result = run_stage("write", [sys.executable, "-c", code, str(root / "out.bin")], cwd=root, measure_dir=root)
+            self.assertEqual(result.status, "ok")
+            self.assertEqual(result.bytes_written, 5000)
+            self.assertGreater(result.peak_rss_bytes, 0)
+            self.assertGreaterEqual(result.sampled_process_count, 1)
+
+            failed = run_stage("fail", [sys.executable, "-c", "raise SystemExit(3)"], cwd=root)
+            self.assertEqual((failed.status, failed.returncode), ("failed", 3))
+
+    def test_find_regressions(self) -> None:
+        def record(wall: float) -> dict:
+            stage = {"name": "generate_assets", "status": "ok", "wall_seconds": wall, "peak_rss_bytes": 1}
+            return {"runs": [{"cuts": 10, "stages": [stage]}]}
+
+        self.assertEqual(find_regressions(record(10.2), record(10.0)), [])
+        self.assertEqual(find_regressions(record(10.0), record(2.0), min_seconds=0.5), ["10 cuts / generate_assets: wall 2.00s -> 10.00s"])
+
+
+if __name__ == "__main__":
+    unittest.main()
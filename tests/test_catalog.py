@@ -0,0 +1,60 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from toc.catalog import RunCatalog
+
+
+def _write_run(root: Path, name: str, lines: list[str]) -> Path:
+    run_dir = root / name
+    run_dir.mkdir(parents=True, exist_ok=True)
+    (run_dir / "state.txt").write_text("\n".join(lines) + "\n---\n", encoding="utf-8")
+    return run_dir
+
+
+class TestRunCatalog(unittest.TestCase):
+    def test_incremental_refresh_and_queries(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "output"
+            a = _write_run(
+                root,
+                "a_20990101_0000",
+                [
+                    "timestamp=2099-01-01T00:00:00+09:00",
+                    "topic=alpha",
+                    "status=VIDEO",
+                    "runtime.stage=render",
+                    "gate.video_review=required",
+                    "artifact.video=video.mp4",
+                ],
+            )
+            (a / "video.mp4").write_bytes(b"x" * 100)
+            _write_run(root, "b_20990101_0000", ["timestamp=2099-01-01T01:00:00+09:00", "topic=beta", "status=DONE"])
+            (root / "notes").mkdir()
+
+            catalog = RunCatalog(root)
+            first = catalog.refresh()
+            self.assertEqual((first.scanned, first.updated, first.removed), (2, 2, 0))
+            self.assertEqual(catalog.refresh().updated, 0)
+
+            stuck = catalog.query(pending_gate="video_review")
+            self.assertEqual([e.name for e in stuck], ["a_20990101_0000"])
+            self.assertEqual((stuck[0].video_bytes, stuck[0].artifact_bytes), (100, 100))
+            self.assertEqual([e.topic for e in catalog.query(status="DONE")], ["beta"])
+
+            with (a / "state.txt").open("a", encoding="utf-8") as f:
+                f.write("timestamp=2099-01-01T00:30:00+09:00\nreview.video.status=approved\n---\n")
+            later = time.time() + 5
+            os.utime(a / "state.txt", (later, later))
+            self.assertEqual(catalog.refresh().updated, 1)
+            self.assertEqual(catalog.query(pending_gate="video_review"), [])
+            self.assertEqual(catalog.query(topic="alph")[0].elapsed_seconds, 1800.0)
+
+            (root / "b_20990101_0000" / "state.txt").unlink()
+            self.assertEqual(catalog.refresh().removed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from toc.benchmark import synthetic_manifest
+from toc.dirty import inputs_key, inputs_path, invalidate, is_stale, record_inputs
+from toc.mock_providers import MockBehavior, MockProviderServer
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+class TestDirtyRecords(unittest.TestCase):
+    def test_stale_only_when_recorded_key_differs(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            ref = root / "ref.png"
+            ref.write_bytes(b"a")
+            out = root / "out.png"
+            key = inputs_key(kind="image", tool="t", prompt="p", input_files=[ref])
+
+            self.assertFalse(is_stale(out, key))
+            out.write_bytes(b"img")
+            self.assertFalse(is_stale(out, key))  # no record yet: adopted
+            record_inputs(out, key)
+            self.assertFalse(is_stale(out, key))
+
+            ref.write_bytes(b"b")
+            changed = inputs_key(kind="image", tool="t", prompt="p", input_files=[ref])
+            self.assertNotEqual(changed, key)
+            self.assertTrue(is_stale(out, changed))
+
+            self.assertEqual(invalidate([out, root / "missing.png"]), [out])
+            self.assertFalse(out.exists() or inputs_path(out).exists())
+
+
+class TestIncrementalRegeneration(unittest.TestCase):
+    def test_edited_prompt_regenerates_only_that_cut(self) -> None:
+        with MockProviderServer(MockBehavior()) as server, tempfile.TemporaryDirectory() as td:
+            manifest = Path(td) / "video_manifest.md"
+            manifest.write_text(synthetic_manifest(3), encoding="utf-8")
+            env = {
+                **os.environ,
+                **server.env(),
+                "TOC_GENERATION_CACHE_DIR": str(Path(td) / "cache"),
+                "TOC_MANIFEST_CACHE": "0",
+            }
+            cmd = [sys.executable, "scripts/generate-assets-from-manifest.py", "--manifest", str(manifest), "--poll-every", "0.01"]
+
+            def run() -> dict[str, int]:
+                before = server.stats()
+                subprocess.run(cmd, cwd=str(REPO_ROOT), env=env, check=True, capture_output=True)
+                after = server.stats()
+                return {k: after.get(k, 0) - before.get(k, 0) for k in ("gemini.requests", "elevenlabs.requests")}
+
+            self.assertEqual(run(), {"gemini.requests": 3, "elevenlabs.requests": 3})
+            self.assertEqual(run(), {"gemini.requests": 0, "elevenlabs.requests": 0})
+
+            manifest.write_text(
+                synthetic_manifest(3).replace("benchmark scene 1 cut 2", "edited prompt"), encoding="utf-8"
+            )
+            self.assertEqual(run(), {"gemini.requests": 1, "elevenlabs.requests": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,10 @@
 import base64
+import json
 import unittest
 from pathlib import Path
 from unittest import mock
 
-from toc.providers.gemini import GeminiClient, GeminiConfig
+from toc.providers.gemini import GeminiClient, GeminiConfig, parse_image_response
 
 
 def _tiny_png_bytes() -> bytes:
@@ -13,13 +14,13 @@ def _tiny_png_bytes() -> bytes:
 class TestGeminiProviderPayloads(unittest.TestCase):
     def test_generate_image_sends_reference_images(self) -> None:
         with self.subTest("payload contains inlineData parts"):
-            with unittest.mock.patch("toc.providers.gemini.request_json") as m:
+            with unittest.mock.patch("toc.providers.gemini.request_bytes") as m:
                 captured = {}
 
-                def fake_request_json(*, url, method, headers, json_payload, timeout_seconds):  # noqa: ANN001
+                def fake_request_bytes(*, url, method, headers, json_payload, timeout_seconds):  # noqa: ANN001
                     captured["payload"] = json_payload
                     png_b64 = base64.b64encode(_tiny_png_bytes()).decode("ascii")
-                    return {
+                    return json.dumps({
                         "candidates": [
                             {
                                 "content": {
@@ -29,9 +30,9 @@ class TestGeminiProviderPayloads(unittest.TestCase):
                                 }
                             }
                         ]
-                    }
+                    }).encode("utf-8")
 
-                m.side_effect = fake_request_json
+                m.side_effect = fake_request_bytes
                 import tempfile
 
                 with tempfile.TemporaryDirectory(prefix="toc_test_") as td:
@@ -87,5 +88,36 @@ class TestGeminiProviderPayloads(unittest.TestCase):
         self.assertIn("image", inst)
         self.assertIn("endImage", inst)
 
+    def test_parse_image_response_decodes_from_raw_bytes_and_redacts(self) -> None:
+        image = _tiny_png_bytes() * 100
+        b64 = base64.b64encode(image).decode("ascii")
+        resp = {
+            "candidates": [
+                {"content": {"parts": [
+                    {"text": "here"},
+                    {"inlineData": {"data": b64, "mimeType": "image/png"}},
+                    {"inline_data": {"mime_type": "image/jpeg", "data": b64}},
+                ]}}
+            ],
+            "usageMetadata": {"totalTokenCount": 7},
+        }
+        for raw in (json.dumps(resp).encode("utf-8"), json.dumps(resp, indent=2).encode("utf-8")):
+            got, mime, redacted = parse_image_response(raw)
+            self.assertEqual(got, image)
+            self.assertEqual(mime, "image/png")
+            parts = redacted["candidates"][0]["content"]["parts"]
+            self.assertEqual(parts[1]["inlineData"]["data"], f"<redacted {len(b64)} chars>")
+            self.assertEqual(parts[2]["inline_data"]["data"], f"<redacted {len(b64)} chars>")
+            self.assertEqual(redacted["usageMetadata"], {"totalTokenCount": 7})
+
+        # Escaped blobs fall back to a full parse and are still redacted.
+        escaped = json.dumps(resp).replace(f'"data": "{b64[0]}', f'"data": "\\u{ord(b64[0]):04x}', 1).encode("utf-8")
+        self.assertIn(b"\\u", escaped)
+        got, mime, redacted = parse_image_response(escaped)
+        self.assertEqual(got, image)
+        self.assertTrue(redacted["candidates"][0]["content"]["parts"][1]["inlineData"]["data"].startswith("<redacted"))
+        with self.assertRaises(ValueError):
+            parse_image_response(b'{"candidates": []}')
+
 if __name__ == "__main__":
     unittest.main()
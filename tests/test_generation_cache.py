@@ -0,0 +1,146 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from toc.gencache import GenerationCache
+
+
+def _load_generate_assets_module(repo_root: Path):
+    script = repo_root / "scripts" / "generate-assets-from-manifest.py"
+    spec = importlib.util.spec_from_file_location("generate_assets_from_manifest", script)
+    assert spec and spec.loader
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = mod
+    spec.loader.exec_module(mod)  # type: ignore[assignment]
+    return mod
+
+
+class TestGenerationCache(unittest.TestCase):
+    def test_key_depends_on_reference_bytes_not_paths(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            cache = GenerationCache(root / "cache")
+            a = root / "a.png"
+            b = root / "renamed.png"
+            a.write_bytes(b"ref")
+            b.write_bytes(b"ref")
+
+            k1 = cache.key(kind="image/gemini", model="m", prompt="p", params={"x": 1}, reference_files=[a])
+            k2 = cache.key(kind="image/gemini", model="m", prompt="p", params={"x": 1}, reference_files=[b])
+            self.assertEqual(k1, k2)
+
+            b.write_bytes(b"other")
+            k3 = cache.key(kind="image/gemini", model="m", prompt="p", params={"x": 1}, reference_files=[b])
+            self.assertNotEqual(k1, k3)
+            self.assertNotEqual(k1, cache.key(kind="image/gemini", model="m", prompt="p2", params={"x": 1}, reference_files=[a]))
+
+    def test_store_materialize_and_evict(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            cache = GenerationCache(root / "cache", max_bytes=10)
+            src = root / "run1" / "scene1.png"
+            src.parent.mkdir()
+            src.write_bytes(b"12345678")
+            cache.store("aa" + "0" * 62, src)
+
+            out = root / "run2" / "scene1.png"
+            self.assertTrue(cache.materialize("aa" + "0" * 62, out))
+            self.assertEqual(out.read_bytes(), b"12345678")
+            with out.open("r+b") as f:  # in-place rewrite (ffmpeg -y) must not reach the entry
+                f.write(b"XXXX")
+            self.assertEqual(cache.entry_path("aa" + "0" * 62, ".png").read_bytes(), b"12345678")
+            self.assertFalse(cache.materialize("bb" + "0" * 62, root / "run2" / "miss.png"))
+
+            older = cache.entry_path("aa" + "0" * 62, ".png")
+            os.utime(older, (1, 1))
+            src.write_bytes(b"abcdefgh")
+            cache.store("cc" + "0" * 62, src)
+            self.assertFalse(older.exists())
+            self.assertTrue(cache.entry_path("cc" + "0" * 62, ".png").exists())
+
+    def test_gemini_image_reuses_cache_across_output_paths(self) -> None:
+        repo_root = Path(__file__).resolve().parents[1]
+        mod = _load_generate_assets_module(repo_root)
+
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            cache = GenerationCache(root / "cache")
+            client = mock.Mock()
+            client.generate_image.return_value = (b"\x89PNG\r\n\x1a\nimage", "image/png", {"candidates": []})
+
+            def run(out: Path, force: bool = False) -> None:
+                with mock.patch.object(mod, "_run", side_effect=FileNotFoundError()):
+                    mod.generate_gemini_image(
+                        client=client,
+                        model="m",
+                        prompt="a fox",
+                        aspect_ratio="9:16",
+                        image_size="2K",
+                        reference_images=[],
+                        out_path=out,
+                        force=force,
+                        log_path=None,
+                        dry_run=False,
+                        cache=cache,
+                    )
+
+            run(root / "run1" / "scene1.png")
+            run(root / "run2" / "renamed.png")
+            self.assertEqual(client.generate_image.call_count, 1)
+            self.assertEqual((root / "run2" / "renamed.png").read_bytes(), b"\x89PNG\r\n\x1a\nimage")
+
+            run(root / "run2" / "renamed.png", force=True)
+            self.assertEqual(client.generate_image.call_count, 2)
+
+    def test_video_cache_key_tracks_reference_preparation(self) -> None:
+        repo_root = Path(__file__).resolve().parents[1]
+        mod = _load_generate_assets_module(repo_root)
+
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            cache = GenerationCache(root / "cache")
+            first = root / "first.png"
+            first.write_bytes(b"\x89PNG\r\n\x1a\nframe")
+            client = mock.Mock()
+            client.extract_operation_id.return_value = "op1"
+            client.operation_status_url.return_value = "https://k/op1"
+            client.is_failed_operation.return_value = False
+            client.extract_video_uri.return_value = "https://cdn/v.mp4"
+            client.download_to_file.side_effect = lambda *, uri, out_path: out_path.write_bytes(b"video")
+
+            def run(out: Path, prepare: str) -> None:
+                env = {"TOC_PREPARE_REFERENCES": prepare, "TOC_REFPREP_CACHE_DIR": str(root / "refprep")}
+                with mock.patch.dict(os.environ, env):
+                    mod.generate_kling_video(
+                        client=client,
+                        model="kling-v3",
+                        prompt="walk",
+                        negative_prompt="",
+                        duration_seconds=5,
+                        aspect_ratio="9:16",
+                        resolution="720p",
+                        input_image=first,
+                        last_frame_image=None,
+                        extra_payload=None,
+                        out_path=out,
+                        poll_every=0.01,
+                        timeout_seconds=1.0,
+                        force=False,
+                        log_path=None,
+                        dry_run=False,
+                        cache=cache,
+                    )
+
+            run(root / "a.mp4", "0")
+            run(root / "b.mp4", "0")
+            self.assertEqual(client.start_video_generation.call_count, 1)
+            run(root / "c.mp4", "1")
+            self.assertEqual(client.start_video_generation.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import base64
+import hashlib
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from toc.http import (
+    Base64File,
+    ConnectionPool,
+    HttpError,
+    StreamingJsonBody,
+    encode_json_body,
+    inline_file_base64,
+    request_bytes,
+    request_json,
+    stream_to_file,
+)
+
+
+MEDIA = bytes(range(256)) * 4096
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_media(self) -> None:
+        rng = self.headers.get("Range")
+        if rng:
+            start = int(rng.split("=", 1)[1].split("-", 1)[0])
+            body = MEDIA[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(MEDIA) - 1}/{len(MEDIA)}")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        # First request: promise the whole file but drop the connection halfway.
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(MEDIA)))
+        self.end_headers()
+        self.wfile.write(MEDIA[: len(MEDIA) // 2])
+        self.wfile.flush()
+        self.close_connection = True
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/media.mp4":
+            self._send_media()
+        elif self.path == "/redirect":
+            self._send(302, b"", {"Location": "/ok"})
+        elif self.path == "/limited":
+            self._send(429, b"slow down", {"Retry-After": "7"})
+        elif self.path == "/drop":
+            # Keep-alive is advertised but the server hangs up right after responding.
+            self._send(200, b"dropped")
+            self.close_connection = True
+        else:
+            self._send(200, b"ok:" + self.path.encode("utf-8"))
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length).decode("utf-8"))
+        self._send(200, json.dumps({"echo": payload, "ctype": self.headers.get("content-type")}).encode("utf-8"))
+
+
+class TestHttpPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        self.pool = ConnectionPool(maxsize=2)
+        patcher = mock.patch("toc.http._POOL", self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.pool.close)
+        env = mock.patch.dict("os.environ", {"TOC_HTTP_POOL": "1", "http_proxy": "", "HTTP_PROXY": ""})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_connections_are_reused(self) -> None:
+        for i in range(5):
+            self.assertEqual(request_bytes(url=f"{self.base}/a{i}"), f"ok:/a{i}".encode("utf-8"))
+        stats = self.pool.stats()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["connections_reused"], 4)
+
+    def test_json_post_and_redirect(self) -> None:
+        resp = request_json(url=f"{self.base}/echo", method="POST", json_payload={"x": 1})
+        self.assertEqual(resp, {"echo": {"x": 1}, "ctype": "application/json"})
+        self.assertEqual(request_bytes(url=f"{self.base}/redirect"), b"ok:/ok")
+
+    def test_http_error_carries_headers(self) -> None:
+        with self.assertRaises(HttpError) as ctx:
+            request_bytes(url=f"{self.base}/limited")
+        self.assertEqual(ctx.exception.status, 429)
+        self.assertEqual(ctx.exception.body, "slow down")
+        self.assertEqual(ctx.exception.retry_after_seconds, 7.0)
+
+    def test_stale_keepalive_connection_is_retried(self) -> None:
+        self.assertEqual(request_bytes(url=f"{self.base}/drop"), b"dropped")
+        self.assertEqual(request_bytes(url=f"{self.base}/after"), b"ok:/after")
+        self.assertEqual(self.pool.stats()["connections_opened"], 2)
+
+    def test_connection_closed_while_idle_is_not_used_for_post(self) -> None:
+        self.assertEqual(request_bytes(url=f"{self.base}/drop"), b"dropped")
+        time.sleep(0.2)  # let the server's FIN arrive while the connection sits idle
+        self.assertEqual(request_json(url=f"{self.base}/echo", method="POST", json_payload={"n": 1})["echo"], {"n": 1})
+        stats = self.pool.stats()
+        self.assertEqual(stats["connections_opened"], 2)
+        self.assertEqual(stats["connections_reused"], 0)
+
+    def test_connections_idle_past_keepalive_window_are_dropped(self) -> None:
+        pool = ConnectionPool(maxsize=2, idle_seconds=0.0)
+        self.addCleanup(pool.close)
+        with mock.patch("toc.http._POOL", pool):
+            request_bytes(url=f"{self.base}/a")
+            request_json(url=f"{self.base}/echo", method="POST", json_payload={})
+        self.assertEqual(pool.stats()["connections_opened"], 2)
+
+    def test_large_files_are_streamed_into_json_body(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            ref = Path(td) / "ref.png"
+            ref.write_bytes(MEDIA[:100_001])
+            small = Path(td) / "small.png"
+            small.write_bytes(b"tiny")
+            with mock.patch.dict("os.environ", {"TOC_HTTP_STREAM_MIN_BYTES": "1000"}):
+                streamed = inline_file_base64(ref, prefix="data:image/png;base64,")
+                inline = inline_file_base64(small)
+            self.assertIsInstance(streamed, Base64File)
+            self.assertEqual(inline, base64.b64encode(b"tiny").decode("ascii"))
+
+            payload = {"parts": [{"text": "p\u00e9"}, {"data": streamed}, {"data": inline}], "again": streamed}
+            body = encode_json_body(payload)
+            self.assertIsInstance(body, StreamingJsonBody)
+            encoded = b"".join(body)
+            self.assertEqual(len(body), len(encoded))
+            expected = {**payload, "again": "data:image/png;base64," + base64.b64encode(ref.read_bytes()).decode("ascii")}
+            expected["parts"][1] = {"data": expected["again"]}
+            self.assertEqual(json.loads(encoded), expected)
+            self.assertEqual(b"".join(body), encoded)  # re-iterable for retries / 307 redirects
+
+            for pooled in ("1", "0"):
+                with mock.patch.dict("os.environ", {"TOC_HTTP_POOL": pooled}):
+                    resp = request_json(url=f"{self.base}/echo", method="POST", json_payload=payload)
+                self.assertEqual(resp["echo"], expected)
+
+    def test_stream_to_file_resumes_with_range(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            out = Path(td) / "clip.mp4"
+            with mock.patch("toc.http.time.sleep"):
+                digest = stream_to_file(
+                    url=f"{self.base}/media.mp4",
+                    out_path=out,
+                    chunk_bytes=64 * 1024,
+                    expected_sha256=hashlib.sha256(MEDIA).hexdigest(),
+                )
+            self.assertEqual(out.read_bytes(), MEDIA)
+            self.assertEqual(digest, hashlib.sha256(MEDIA).hexdigest())
+            self.assertFalse((Path(td) / "clip.mp4.part").exists())
+
+    def test_stream_to_file_hash_mismatch_keeps_destination(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            out = Path(td) / "a.bin"
+            out.write_bytes(b"previous")
+            with self.assertRaises(ValueError):
+                stream_to_file(url=f"{self.base}/a", out_path=out, expected_sha256="0" * 64)
+            self.assertEqual(out.read_bytes(), b"previous")
+
+
+if __name__ == "__main__":
+    unittest.main()
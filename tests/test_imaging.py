@@ -0,0 +1,88 @@
+import struct
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+
+from toc.imaging import (
+    Raster,
+    decode_png,
+    encode_png,
+    hstack,
+    hstack_files,
+    parse_color,
+    resize,
+    save_image_bytes,
+    solid,
+    write_solid_image,
+)
+from toc.mock_providers import PNG_BYTES
+
+
+def _png_up_filtered(width: int, rows: list[bytes]) -> bytes:
+    """RGB PNG whose rows after the first use the Up filter."""
+    raw = bytearray()
+    prev = bytes(width * 3)
+    for i, row in enumerate(rows):
+        if i == 0:
+            raw += b"\x00" + row
+        else:
+            raw += b"\x02" + bytes((a - b) & 0xFF for a, b in zip(row, prev))
+        prev = row
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+    ihdr = struct.pack(">IIBBBBB", width, len(rows), 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(bytes(raw))) + chunk(b"IEND", b"")
+
+
+class TestImaging(unittest.TestCase):
+    def test_png_round_trip_and_up_filter(self) -> None:
+        raster = Raster(2, 2, 4, bytearray(range(16)))
+        again = decode_png(encode_png(raster))
+        self.assertEqual((again.width, again.height, again.channels, again.pixels), (2, 2, 4, raster.pixels))
+
+        rows = [bytes([10, 20, 30, 250, 251, 252]), bytes([5, 200, 30, 1, 2, 3]), bytes([255, 0, 128, 7, 8, 9])]
+        decoded = decode_png(_png_up_filtered(2, rows))
+        self.assertEqual(bytes(decoded.pixels), b"".join(rows))
+
+        one = decode_png(PNG_BYTES)
+        self.assertEqual((one.width, one.height), (1, 1))
+
+    def test_hstack_resize_and_solid(self) -> None:
+        gray = Raster(1, 2, 1, bytearray([0, 255]))
+        rgba = Raster(2, 2, 4, bytearray([1, 2, 3, 4] * 4))
+        strip = hstack([gray, rgba])
+        self.assertEqual((strip.width, strip.height, strip.channels), (3, 2, 4))
+        self.assertEqual(bytes(strip.row(1)[:4]), bytes([255, 255, 255, 255]))
+        with self.assertRaises(ValueError):
+            hstack([gray, Raster(1, 3, 1, bytearray(3))])
+
+        self.assertEqual(parse_color("#1f2937"), (0x1F, 0x29, 0x37))
+        self.assertEqual(parse_color("0xFF0000"), (255, 0, 0))
+        block = solid(4, 2, "white")
+        half = resize(block, 2, 1)
+        self.assertEqual((half.width, half.height, bytes(half.pixels)), (2, 1, b"\xff" * 6))
+
+    def test_file_helpers_stay_in_process(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            out = root / "a" / "still.png"
+            save_image_bytes(PNG_BYTES, out)
+            self.assertEqual(out.read_bytes(), PNG_BYTES)
+
+            paths = []
+            for i, color in enumerate(["#000000", "#ffffff", "#ff0000"]):
+                p = root / f"view{i}.png"
+                write_solid_image(p, 3, 4, color)
+                paths.append(p)
+            strip_path = root / "strip.png"
+            hstack_files(paths, strip_path)
+            strip = decode_png(strip_path.read_bytes())
+            self.assertEqual((strip.width, strip.height), (9, 4))
+            self.assertEqual(bytes(strip.row(0)), b"\x00" * 9 + b"\xff" * 9 + b"\xff\x00\x00" * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from toc.benchmark import synthetic_manifest
+from toc.http import HttpError
+from toc.journal import JobJournal
+from toc.mock_providers import MockBehavior, MockProviderServer
+
+
+def _load_generate_assets_module(repo_root: Path):
+    script = repo_root / "scripts" / "generate-assets-from-manifest.py"
+    spec = importlib.util.spec_from_file_location("generate_assets_from_manifest", script)
+    assert spec and spec.loader
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = mod
+    spec.loader.exec_module(mod)  # type: ignore[assignment]
+    return mod
+
+
+class TestJobJournal(unittest.TestCase):
+    def test_open_jobs_and_torn_lines(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "jobs.jsonl"
+            journal = JobJournal(path)
+            journal.record_submitted(job="a.mp4", provider="kling", request_key="k1", operation_id="op1")
+            journal.record_submitted(job="b.mp4", provider="kling", request_key="k2", operation_id="op2")
+            journal.record_closed(job="b.mp4", event="done")
+            with path.open("a", encoding="utf-8") as f:
+                f.write('{"event": "submitted", "job": "c.mp4"')
+
+            self.assertEqual(set(journal.open_jobs()), {"a.mp4"})
+            self.assertEqual(journal.resumable("a.mp4", "k1")["operation_id"], "op1")
+            self.assertIsNone(journal.resumable("a.mp4", "changed-inputs"))
+            self.assertIsNone(JobJournal(path, reattach=False).resumable("a.mp4", "k1"))
+
+
+class TestKlingResume(unittest.TestCase):
+    def setUp(self) -> None:
+        repo_root = Path(__file__).resolve().parents[1]
+        self.mod = _load_generate_assets_module(repo_root)
+
+    def _run(self, client, out: Path, journal: JobJournal) -> None:
+        self.mod.generate_kling_video(
+            client=client,
+            model="kling-v3",
+            prompt="walk",
+            negative_prompt="",
+            duration_seconds=5,
+            aspect_ratio="9:16",
+            resolution="720p",
+            input_image=None,
+            last_frame_image=None,
+            extra_payload=None,
+            out_path=out,
+            poll_every=0.01,
+            timeout_seconds=1.0,
+            force=False,
+            log_path=None,
+            dry_run=False,
+            journal=journal,
+        )
+
+    def _request_key(self, out: Path) -> str:
+        return self.mod.generation_key(
+            kind="video/kling",
+            model="kling-v3",
+            prompt="walk",
+            params={
+                "negative_prompt": "",
+                "duration_seconds": 5,
+                "aspect_ratio": "9:16",
+                "resolution": "720p",
+                "suffix": out.suffix,
+            },
+            reference_files=[None, None],
+            extra=None,
+        )
+
+    def test_reattaches_to_journaled_operation(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            out = Path(td) / "scene1.mp4"
+            journal = JobJournal(Path(td) / "jobs.jsonl")
+            journal.record_submitted(
+                job=str(out), provider="kling", request_key=self._request_key(out), operation_id="op1", poll_ref="https://k/op1"
+            )
+            client = mock.Mock()
+            client.poll_operation.return_value = {"data": {"task_status": "succeed"}}
+            client.is_failed_operation.return_value = False
+            client.extract_video_uri.return_value = "https://cdn/v.mp4"
+
+            self._run(client, out, journal)
+
+            client.start_video_generation.assert_not_called()
+            self.assertEqual(client.poll_operation.call_args.kwargs["operation_id_or_url"], "https://k/op1")
+            client.download_to_file.assert_called_once_with(uri="https://cdn/v.mp4", out_path=out)
+            self.assertEqual(journal.latest()[str(out)]["event"], "done")
+
+    def test_lost_operation_is_resubmitted(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            out = Path(td) / "scene1.mp4"
+            journal = JobJournal(Path(td) / "jobs.jsonl")
+            journal.record_submitted(job=str(out), provider="kling", request_key=self._request_key(out), operation_id="gone")
+            client = mock.Mock()
+            client.poll_operation.side_effect = [
+                HttpError(status=404, reason="Not Found", body="", url="u"),
+                {"data": {"task_status": "succeed"}},
+            ]
+            client.start_video_generation.return_value = {"data": {"task_id": "op2"}}
+            client.extract_operation_id.return_value = "op2"
+            client.operation_status_url.return_value = "https://k/op2"
+            client.is_failed_operation.return_value = False
+            client.extract_video_uri.return_value = "https://cdn/v.mp4"
+
+            self._run(client, out, journal)
+
+            client.start_video_generation.assert_called_once()
+            events = [r["event"] for r in journal.records()]
+            self.assertEqual(events, ["submitted", "lost", "submitted", "done"])
+
+
+class TestGeminiImageBatch(unittest.TestCase):
+    def test_scene_images_go_through_one_journaled_batch(self) -> None:
+        repo_root = Path(__file__).resolve().parents[1]
+        with MockProviderServer(MockBehavior()) as server, tempfile.TemporaryDirectory() as td:
+            manifest = Path(td) / "video_manifest.md"
+            manifest.write_text(synthetic_manifest(3), encoding="utf-8")
+            env = {**os.environ, **server.env(), "TOC_GENERATION_CACHE_DIR": str(Path(td) / "cache"), "TOC_MANIFEST_CACHE": "0"}
+            cmd = [
+                sys.executable,
+                "scripts/generate-assets-from-manifest.py",
+                "--manifest",
+                str(manifest),
+                "--skip-videos",
+                "--skip-audio",
+                "--gemini-batch",
+                "--gemini-batch-poll-seconds",
+                "0.01",
+            ]
+            subprocess.run(cmd, cwd=str(repo_root), env=env, check=True, capture_output=True)
+            self.assertEqual(server.stats()["gemini.requests"], 2)  # one batch submit + one poll
+            images = sorted(p.name for p in (Path(td) / "assets" / "scenes").glob("*.png"))
+            self.assertEqual(len(images), 3)
+
+            journal = JobJournal(Path(td) / "logs" / "providers" / "jobs.jsonl")
+            self.assertEqual([r["event"] for r in journal.records()], ["submitted", "done"])
+            self.assertTrue(journal.records()[0]["operation_id"].startswith("batches/"))
+
+            subprocess.run(cmd, cwd=str(repo_root), env=env, check=True, capture_output=True)
+            self.assertEqual(server.stats()["gemini.requests"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
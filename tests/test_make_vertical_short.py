@@ -0,0 +1,98 @@
+import importlib.util
+import json
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+def _load_script():
+    spec = importlib.util.spec_from_file_location("make_vertical_short", Path("scripts/make-vertical-short.py"))
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestMakeVerticalShort(unittest.TestCase):
+    def test_specs_dry_run_plans_shared_decode_passes(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="toc_short_test_") as td:
+            run_dir = Path(td) / "run"
+            run_dir.mkdir()
+            (run_dir / "state.txt").write_text("review.video.status=approved\n---\n", encoding="utf-8")
+            (run_dir / "video.mp4").write_bytes(b"")
+            scenes = "\n".join(f'  - scene_id: {i * 10}\n    timestamp: "00:{(i - 1) * 10:02d}-00:{i * 10:02d}"' for i in range(1, 6))
+            (run_dir / "video_manifest.md").write_text(f"```yaml\nscenes:\n{scenes}\n```\n", encoding="utf-8")
+            specs = run_dir / "shorts.json"
+            specs.write_text(
+                json.dumps(
+                    [
+                        {"scene_ids": [10, 30]},
+                        {"scene_ids": "30,50", "duration_seconds": 15, "out": "shorts/teaser.mp4"},
+                        {"scene_ids": [40, 20]},
+                    ]
+                ),
+                encoding="utf-8",
+            )
+
+            r = subprocess.run(
+                [
+                    sys.executable,
+                    "scripts/make-vertical-short.py",
+                    "--run-dir",
+                    str(run_dir),
+                    "--specs",
+                    str(specs),
+                    "--max-branches",
+                    "3",
+                    "--dry-run",
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            payload = json.loads(r.stdout)
+
+            shorts = payload["shorts"]
+            self.assertEqual([Path(s["out"]).name for s in shorts], ["short01.mp4", "teaser.mp4", "short03.mp4"])
+            self.assertEqual([(seg["start"], seg["end"]) for seg in shorts[1]["segments"]], [(20, 30), (40, 45)])
+            # Scene 30 is shared by two shorts but cut once; segments are grouped in timeline order.
+            self.assertEqual(
+                payload["passes"],
+                [
+                    {"seek": 0, "duration": 30, "segments": [[0, 10], [10, 20], [20, 30]]},
+                    {"seek": 30, "duration": 15, "segments": [[30, 40], [40, 45]]},
+                ],
+            )
+
+    def test_pass_command_seeks_input_and_fans_out(self) -> None:
+        module = _load_script()
+        plan = {"seek": 30, "duration": 15, "segments": [[30, 40], [40, 45]]}
+        cmd = module.build_pass_command(Path("video.mp4"), plan, [Path("a.mp4"), Path("b.mp4")], has_audio=True)
+
+        self.assertLess(cmd.index("-ss"), cmd.index("-i"))
+        self.assertEqual(cmd[cmd.index("-ss") + 1], "30")
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertEqual(graph.count("crop="), 1)
+        self.assertIn("split=2[c0][c1]", graph)
+        self.assertIn("[c1]trim=start=10:end=15,setpts=PTS-STARTPTS[v1]", graph)
+        self.assertIn("[d0]atrim=start=0:end=10,asetpts=PTS-STARTPTS[a0]", graph)
+        self.assertEqual(cmd.count("-map"), 4)
+        self.assertEqual(cmd[-1], "b.mp4")
+
+    def test_has_audio_asks_ffmpeg_without_ffprobe(self) -> None:
+        module = _load_script()
+        no_ffprobe = mock.Mock()
+        no_ffprobe.probe.side_effect = FileNotFoundError("ffprobe")
+        silent = "Input #0, mov,mp4\n  Stream #0:0[0x1](und): Video: h264, yuv420p, 1920x1080\n"
+        with mock.patch.object(module.MediaInfoCache, "from_env", return_value=no_ffprobe):
+            for stderr, expected in ((silent, False), (silent + "  Stream #0:1[0x2](und): Audio: aac, 48000 Hz\n", True)):
+                done = subprocess.CompletedProcess([], 1, stdout="", stderr=stderr)
+                with mock.patch.object(module.subprocess, "run", return_value=done):
+                    self.assertEqual(module._has_audio(Path("video.mp4")), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
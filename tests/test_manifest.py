@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from toc.manifest import load_manifest, load_manifest_data, sidecar_path
+
+
+MANIFEST = """# Video Manifest
+
+```yaml
+video_metadata:
+  topic: "t"
+  resolution: "720x1280"
+scenes:
+  - scene_id: 10
+    timestamp: "00:00-00:10"
+    cuts:
+      - cut_id: 1
+        video_generation:
+          duration_seconds: 6
+          output: "assets/scenes/scene10_cut1_video.mp4"
+        audio:
+          narration:
+            output: "assets/audio/scene10_cut1_narration.mp3"
+      - cut_id: 2
+        image_generation:
+          output: "assets/scenes/scene10_cut2_base.png"
+  - scene_id: 20
+    duration_seconds: 4
+    narration:
+      output: "assets/audio/scene20_narration.mp3"
+```
+"""
+
+
+class TestManifest(unittest.TestCase):
+    def test_typed_model(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "video_manifest.md"
+            path.write_text(MANIFEST, encoding="utf-8")
+            manifest = load_manifest(path)
+            cuts = list(manifest.iter_cuts())
+            self.assertEqual([c.synthetic_id for c in cuts], [1001, 1002, 20])
+            self.assertEqual(cuts[0].duration_seconds, 6)
+            self.assertEqual(cuts[0].narration_output, "assets/audio/scene10_cut1_narration.mp3")
+            self.assertEqual(cuts[1].timestamp, "00:00-00:10")
+            self.assertEqual(cuts[2].narration_output, "assets/audio/scene20_narration.mp3")
+            self.assertEqual(manifest.resolution, (720, 1280))
+
+    def test_sidecar_is_keyed_by_content(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "video_manifest.md"
+            path.write_text(MANIFEST, encoding="utf-8")
+            first = load_manifest_data(path)
+            sidecar = sidecar_path(path)
+            self.assertTrue(sidecar.exists())
+
+            with mock.patch("toc.manifest.load_yaml", side_effect=AssertionError("should use sidecar")):
+                self.assertEqual(load_manifest_data(path), first)
+
+            path.write_text(MANIFEST.replace('topic: "t"', 'topic: "changed"'), encoding="utf-8")
+            self.assertEqual(load_manifest_data(path)["video_metadata"]["topic"], "changed")
+            self.assertEqual(json.loads(sidecar.read_text(encoding="utf-8"))["data"]["video_metadata"]["topic"], "changed")
+
+    def test_cache_can_be_disabled_and_errors_surface(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "video_manifest.md"
+            path.write_text(MANIFEST, encoding="utf-8")
+            with mock.patch.dict(os.environ, {"TOC_MANIFEST_CACHE": "0"}):
+                load_manifest_data(path)
+            self.assertFalse(sidecar_path(path).exists())
+
+            path.write_text("no yaml here\n", encoding="utf-8")
+            with self.assertRaises(ValueError):
+                load_manifest_data(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import struct
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from toc.mediacheck import (
+    SAMPLE_HEIGHT,
+    SAMPLE_WIDTH,
+    MediaCheckCache,
+    analyze_video,
+    check_media_files,
+    container_problems,
+    luma_stats,
+    rms_dbfs,
+)
+from toc.mock_providers import MP3_FRAME
+
+
+FAKE_FFMPEG = """#!{python}
+import pathlib, sys
+with pathlib.Path({log!r}).open("a") as f:
+    f.write(sys.argv[sys.argv.index("-i") + 1] + "\\n")
+if "rawvideo" in sys.argv:
+    sys.stdout.buffer.write(bytes({frame_bytes}) * 10)
+else:
+    sys.stdout.buffer.write(bytes(2 * 8000))
+"""
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def _mp4(seconds: int) -> bytes:
+    mvhd = _box(b"mvhd", b"\x00" * 12 + struct.pack(">II", 1000, seconds * 1000) + b"\x00" * 80)
+    return _box(b"ftyp", b"isom\x00\x00\x00\x00") + _box(b"moov", mvhd) + _box(b"mdat", b"\x00" * 32)
+
+
+def _mp4_av(*, video_seconds: int, audio_seconds: int) -> bytes:
+    def trak(handler: bytes, seconds: int) -> bytes:
+        mdhd = _box(b"mdhd", b"\x00" * 12 + struct.pack(">II", 1000, seconds * 1000) + b"\x00" * 4)
+        return _box(b"trak", _box(b"mdia", mdhd + _box(b"hdlr", b"\x00" * 8 + handler + b"\x00" * 12)))
+
+    mvhd = _box(b"mvhd", b"\x00" * 12 + struct.pack(">II", 1000, max(video_seconds, audio_seconds) * 1000) + b"\x00" * 80)
+    moov = _box(b"moov", mvhd + trak(b"vide", video_seconds) + trak(b"soun", audio_seconds))
+    return _box(b"ftyp", b"isom\x00\x00\x00\x00") + moov + _box(b"mdat", b"\x00" * 32)
+
+
+class TestMediaCheck(unittest.TestCase):
+    def test_luma_and_rms(self) -> None:
+        n = SAMPLE_WIDTH * SAMPLE_HEIGHT
+        means, diffs = luma_stats(bytes(n) + bytes([200]) * n + bytes([200]) * n)
+        self.assertEqual([round(m) for m in means], [0, 200, 200])
+        self.assertEqual([round(d) for d in diffs], [200, 0])
+
+        self.assertEqual(rms_dbfs(bytes(100)), float("-inf"))
+        full_scale = struct.pack("<2h", 32767, -32767) * 50
+        self.assertAlmostEqual(rms_dbfs(full_scale), 0.0, places=2)
+
+    def test_container_problems(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            ok = root / "ok.mp4"
+            ok.write_bytes(_mp4(5))
+            self.assertEqual(container_problems(ok), [])
+
+            truncated = root / "truncated.mp4"
+            truncated.write_bytes(_mp4(5)[:-10])
+            self.assertIn("truncated", container_problems(truncated)[0])
+
+            no_moov = root / "no_moov.mp4"
+            no_moov.write_bytes(_box(b"ftyp", b"isom\x00\x00\x00\x00") + _box(b"mdat", b"\x00" * 32))
+            self.assertEqual(container_problems(no_moov), ["missing moov atom"])
+
+            empty = root / "empty.mp3"
+            empty.write_bytes(b"")
+            self.assertEqual(container_problems(empty), ["empty file"])
+
+    def test_decode_checks_are_cached_by_content(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            log = root / "calls.log"
+            fake = root / "ffmpeg"
+            fake.write_text(
+                FAKE_FFMPEG.format(python=sys.executable, log=str(log), frame_bytes=SAMPLE_WIDTH * SAMPLE_HEIGHT),
+                encoding="utf-8",
+            )
+            fake.chmod(0o755)
+
+            clip = root / "clip.mp4"
+            clip.write_bytes(_mp4(5))
+            narration = root / "n.mp3"
+            narration.write_bytes(MP3_FRAME * 40)
+            broken = root / "broken.mp4"
+            broken.write_bytes(_mp4(5)[:-10])
+            items = [(clip, "video"), (narration, "audio"), (broken, "video"), (root / "missing.mp3", "audio")]
+            cache = MediaCheckCache(root / "cache")
+
+            first = check_media_files(items, cache=cache, max_workers=2, ffmpeg=str(fake))
+            self.assertEqual([r["status"] for r in first], ["failed"] * 4)
+            problems = " ".join(first[0]["problems"])
+            self.assertIn("black", problems)
+            self.assertIn("frozen", problems)
+            self.assertIn("silent", first[1]["problems"][0])
+            self.assertEqual(first[3]["problems"], ["missing file"])
+            # The truncated clip fails on the container check without being decoded.
+            self.assertEqual(sorted(log.read_text().splitlines()), sorted([str(clip), str(narration)]))
+
+            again = check_media_files(items, cache=cache, ffmpeg=str(fake))
+            self.assertEqual([r["status"] for r in again], ["failed"] * 4)
+            self.assertTrue(again[0]["cached"])
+            self.assertEqual(len(log.read_text().splitlines()), 2)
+
+    def test_video_duration_is_checked_against_the_video_track(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            fake = root / "ffmpeg"
+            fake.write_text(
+                FAKE_FFMPEG.format(python=sys.executable, log=str(root / "calls.log"), frame_bytes=SAMPLE_WIDTH * SAMPLE_HEIGHT),
+                encoding="utf-8",
+            )
+            fake.chmod(0o755)  # decodes 10 samples = 5s of video
+
+            long_audio = root / "long_audio.mp4"
+            long_audio.write_bytes(_mp4_av(video_seconds=5, audio_seconds=8))
+            result = analyze_video(long_audio, ffmpeg=str(fake))
+            self.assertEqual(result["header_seconds"], 5.0)
+            self.assertFalse([p for p in result["problems"] if "duration" in p])
+
+            truncated_video = root / "truncated_video.mp4"
+            truncated_video.write_bytes(_mp4_av(video_seconds=8, audio_seconds=5))
+            self.assertIn("duration mismatch", " ".join(analyze_video(truncated_video, ffmpeg=str(fake))["problems"]))
+
+    def test_missing_ffmpeg_skips_decode(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            clip = Path(td) / "clip.mp4"
+            clip.write_bytes(_mp4(5))
+            cache = MediaCheckCache(Path(td) / "cache")
+            result = check_media_files([(clip, "video")], cache=cache, ffmpeg=str(Path(td) / "no-ffmpeg"))
+            self.assertEqual(result[0]["status"], "skipped")
+            self.assertFalse((Path(td) / "cache").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from toc.mediainfo import MediaInfoCache, parse_ffprobe_json
+
+
+FAKE_FFPROBE = """#!{python}
+import json, pathlib, sys
+log = pathlib.Path({log!r})
+with log.open("a") as f:
+    f.write(sys.argv[-1] + "\\n")
+size = pathlib.Path(sys.argv[-1]).stat().st_size
+print(json.dumps({{"format": {{"duration": str(size / 10), "format_name": "mp3"}},
+                  "streams": [{{"codec_type": "audio", "codec_name": "mp3", "sample_rate": "44100", "channels": 2}}]}}))
+"""
+
+
+class TestMediaInfo(unittest.TestCase):
+    def test_parse_ffprobe_json(self) -> None:
+        info = parse_ffprobe_json(
+            {
+                "format": {"duration": "5.041", "format_name": "mov,mp4"},
+                "streams": [
+                    {"codec_type": "video", "codec_name": "h264", "width": 1080, "height": 1920, "avg_frame_rate": "30000/1001"},
+                    {"codec_type": "audio", "codec_name": "aac", "sample_rate": "48000", "channels": 2},
+                ],
+            }
+        )
+        self.assertEqual((info.duration_seconds, info.width, info.height), (5.041, 1080, 1920))
+        self.assertAlmostEqual(info.fps or 0, 29.97, places=2)
+        self.assertEqual((info.audio_codec, info.sample_rate), ("aac", 48000))
+
+    def test_cache_probes_only_new_or_changed_files(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            log = root / "calls.log"
+            fake = root / "ffprobe"
+            fake.write_text(FAKE_FFPROBE.format(python=sys.executable, log=str(log)), encoding="utf-8")
+            fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+
+            files = [root / f"a{i}.mp3" for i in range(3)]
+            for i, f in enumerate(files):
+                f.write_bytes(b"x" * (10 * (i + 1)))
+            cache = MediaInfoCache(root / "media.sqlite3")
+
+            first = cache.probe_many(files + [root / "missing.mp3"], ffprobe=str(fake))
+            self.assertEqual([first[f].duration_seconds for f in files], [1.0, 2.0, 3.0])
+            self.assertNotIn(root / "missing.mp3", first)
+            self.assertEqual(len(log.read_text().splitlines()), 3)
+
+            files[1].write_bytes(b"x" * 50)
+            os.utime(files[1], ns=(1, 1))
+            again = cache.probe_many(files, ffprobe=str(fake))
+            self.assertEqual(again[files[1]].duration_seconds, 5.0)
+            self.assertEqual(again[files[0]].sample_rate, 44100)
+            self.assertEqual(len(log.read_text().splitlines()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from toc.http import HttpError
+from toc.mock_providers import PNG_BYTES, Latency, MockBehavior, MockProviderServer
+from toc.providers.elevenlabs import ElevenLabsClient
+from toc.providers.gemini import GeminiClient
+from toc.providers.kling import KlingClient
+from toc.providers.seedance import SeedanceClient
+from toc.ratelimit import reset_limiters
+
+
+class TestMockProviders(unittest.TestCase):
+    def _serve(self, behavior: MockBehavior) -> MockProviderServer:
+        server = MockProviderServer(behavior).start()
+        self.addCleanup(server.stop)
+        env = {**server.env(), "TOC_RATE_LIMIT_GEMINI_RPM": "60000", "TOC_RATE_LIMIT_KLING_RPM": "60000"}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_limiters()
+        self.addCleanup(reset_limiters)
+        return server
+
+    def test_clients_run_end_to_end(self) -> None:
+        self._serve(MockBehavior(job_seconds=0.05, video_bytes=4096))
+        with tempfile.TemporaryDirectory() as td:
+            gemini = GeminiClient.from_env()
+            image, mime, _ = gemini.generate_image(prompt="castle")
+            self.assertEqual((image, mime), (PNG_BYTES, "image/png"))
+
+            kling = KlingClient.from_env()
+            op = kling.start_video_generation(prompt="walk", duration_seconds=5)
+            done = kling.poll_operation(operation_id_or_url=kling.extract_operation_id(op), poll_every_seconds=0.01)
+            out = Path(td) / "kling.mp4"
+            kling.download_to_file(uri=kling.extract_video_uri(done), out_path=out)
+            self.assertEqual(out.stat().st_size, 4096)
+
+            seedance = SeedanceClient.from_env()
+            task = seedance.poll_task(
+                task_id=seedance.extract_task_id(seedance.create_task(payload={"model": "m"})), poll_every_seconds=0.01
+            )
+            self.assertTrue(seedance.extract_video_url(task).endswith(".mp4"))
+
+            audio = ElevenLabsClient.from_env().tts(text="hello")
+            self.assertTrue(audio.startswith(b"\xff\xfb"))
+
+    def test_gemini_files_api_and_batch(self) -> None:
+        server = self._serve(MockBehavior(job_seconds=0.05))
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(os.environ, {"GEMINI_FILES_API": "1"}):
+            ref = Path(td) / "char.png"
+            ref.write_bytes(PNG_BYTES)
+            gemini = GeminiClient.from_env()
+            requests = {
+                f"scene{i}": gemini.build_image_request(prompt=f"p{i}", reference_images=[ref]) for i in (1, 2)
+            }
+            file_part = requests["scene1"]["contents"][0]["parts"][1]["fileData"]
+            self.assertEqual(file_part, requests["scene2"]["contents"][0]["parts"][1]["fileData"])
+            self.assertEqual(server.stats()["gemini.requests"], 2)  # one resumable upload: start + finalize
+
+            batch = gemini.submit_image_batch(requests=requests)
+            raw = gemini.poll_image_batch(name=batch["name"], poll_every_seconds=0.01)
+            images: dict[str, tuple[bytes, str | None, dict]] = {}
+            errors = gemini.read_image_batch(raw, on_image=lambda key, *result: images.__setitem__(key, result))
+        self.assertEqual(errors, {})
+        self.assertEqual({k: v[:2] for k, v in images.items()}, {k: (PNG_BYTES, "image/png") for k in requests})
+        logged = images["scene1"][2]["candidates"][0]["content"]["parts"][0]["inlineData"]["data"]
+        self.assertTrue(logged.startswith("<redacted"))
+
+    def test_injected_429_burst_is_retried(self) -> None:
+        server = self._serve(MockBehavior(burst_every=2, burst_length=1, retry_after_seconds=0.01))
+        gemini = GeminiClient.from_env()
+        gemini.generate_image(prompt="a")
+        gemini.generate_image(prompt="b")
+        self.assertEqual(server.stats()["gemini.requests"], 3)
+        self.assertEqual(server.stats()["gemini.429"], 1)
+
+    def test_error_rate_and_latency_spec(self) -> None:
+        self._serve(MockBehavior(error_rate=1.0, seed=1))
+        with self.assertRaises(HttpError) as ctx:
+            ElevenLabsClient.from_env().tts(text="hello")
+        self.assertEqual(ctx.exception.status, 503)
+
+        self.assertEqual(Latency.parse("uniform:10,20"), Latency("uniform", 10.0, 20.0))
+        with self.assertRaises(ValueError):
+            Latency.parse("gamma:1")
+
+
+if __name__ == "__main__":
+    unittest.main()
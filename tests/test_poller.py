@@ -0,0 +1,77 @@
+import threading
+import unittest
+
+from toc.poller import AsyncPoller, PollJob, next_interval
+
+
+class TestAsyncPoller(unittest.TestCase):
+    def setUp(self) -> None:
+        self.poller = AsyncPoller(max_fetch_workers=4)
+
+    def tearDown(self) -> None:
+        self.poller.shutdown()
+
+    def test_many_jobs_resolve_with_callbacks(self) -> None:
+        lock = threading.Lock()
+        finished: list[str] = []
+
+        def make_fetch(name: str, polls_needed: int):
+            count = {"n": 0}
+
+            def fetch() -> dict:
+                count["n"] += 1
+                return {"name": name, "done": count["n"] >= polls_needed}
+
+            return fetch
+
+        def on_done(fut) -> None:
+            with lock:
+                finished.append(fut.result()["name"])
+
+        futures = [
+            self.poller.submit(
+                PollJob(
+                    label=f"job{i}",
+                    fetch=make_fetch(f"job{i}", 1 + (i % 3)),
+                    is_finished=lambda r: r["done"] is True,
+                    poll_every_seconds=0.01,
+                    timeout_seconds=5.0,
+                ),
+                on_done=on_done,
+            )
+            for i in range(50)
+        ]
+        results = [f.result(timeout=10) for f in futures]
+
+        self.assertEqual([r["name"] for r in results], [f"job{i}" for i in range(50)])
+        self.assertEqual(sorted(finished), sorted(f"job{i}" for i in range(50)))
+
+    def test_timeout_raises(self) -> None:
+        fut = self.poller.submit(
+            PollJob(
+                label="operation: never",
+                fetch=lambda: {"done": False},
+                is_finished=lambda r: False,
+                poll_every_seconds=0.01,
+                timeout_seconds=0.05,
+            )
+        )
+        with self.assertRaises(TimeoutError):
+            fut.result(timeout=5)
+
+    def test_fetch_errors_propagate(self) -> None:
+        def fetch() -> dict:
+            raise ValueError("bad status")
+
+        fut = self.poller.submit(PollJob(label="x", fetch=fetch, is_finished=lambda r: True))
+        with self.assertRaises(ValueError):
+            fut.result(timeout=5)
+
+    def test_backoff_is_capped(self) -> None:
+        job = PollJob(label="x", fetch=dict, is_finished=bool, poll_every_seconds=5.0, backoff=2.0, max_interval_seconds=12.0)
+        self.assertEqual(next_interval(job, 5.0), 10.0)
+        self.assertEqual(next_interval(job, 10.0), 12.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
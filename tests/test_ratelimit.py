@@ -0,0 +1,87 @@
+import os
+import unittest
+from unittest import mock
+
+from toc import ratelimit
+from toc.http import HttpError
+from toc.ratelimit import ProviderLimiter, RateLimit, call_with_rate_limit, resolve_rate_limit
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRateLimit(unittest.TestCase):
+    def setUp(self) -> None:
+        ratelimit.reset_limiters()
+
+    def tearDown(self) -> None:
+        ratelimit.reset_limiters()
+
+    def test_resolve_prefers_model_env_then_provider_env_then_config(self) -> None:
+        config = {
+            "providers": {
+                "rate_limits": {
+                    "default": {"concurrency": 3},
+                    "kling": {"rpm": 10, "models": {"kling-v3": {"rpm": 20}}},
+                }
+            }
+        }
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("TOC_RATE_LIMIT_KLING_RPM", None)
+            os.environ.pop("TOC_RATE_LIMIT_KLING_KLING_V3_RPM", None)
+            self.assertEqual(resolve_rate_limit("kling", "kling-v3", config=config), RateLimit(rpm=20.0, concurrency=3))
+            self.assertEqual(resolve_rate_limit("kling", "other", config=config), RateLimit(rpm=10.0, concurrency=3))
+
+            os.environ["TOC_RATE_LIMIT_KLING_RPM"] = "5"
+            self.assertEqual(resolve_rate_limit("kling", "other", config=config).rpm, 5.0)
+            os.environ["TOC_RATE_LIMIT_KLING_KLING_V3_RPM"] = "7"
+            self.assertEqual(resolve_rate_limit("kling", "kling-v3", config=config).rpm, 7.0)
+
+    def test_token_bucket_spacing_and_penalty(self) -> None:
+        clock = FakeClock()
+        limiter = ProviderLimiter("gemini:m", RateLimit(rpm=60), clock=clock)
+        self.assertEqual(limiter._reserve(), 0.0)
+        self.assertAlmostEqual(limiter._reserve(), 1.0)
+        clock.now += 1.0
+        self.assertEqual(limiter._reserve(), 0.0)
+
+        pause = limiter.penalize(12.0)
+        self.assertEqual(pause, 12.0)
+        self.assertAlmostEqual(limiter._reserve(), 12.0)
+        self.assertAlmostEqual(limiter.effective_rpm or 0.0, 30.0)
+        limiter.record_success()
+        self.assertAlmostEqual(limiter.effective_rpm or 0.0, 37.5)
+
+    def test_call_retries_on_429_using_retry_after(self) -> None:
+        calls: list[int] = []
+
+        def fn() -> str:
+            calls.append(1)
+            if len(calls) == 1:
+                raise HttpError(status=429, reason="Too Many Requests", body="", url="u", headers={"Retry-After": "0"})
+            return "ok"
+
+        with mock.patch.dict(os.environ, {"TOC_RATE_LIMIT_MAX_RETRIES": "2", "TOC_RATE_LIMIT_TEST_PROVIDER_RPM": "6000"}):
+            self.assertEqual(call_with_rate_limit("test_provider", "m", fn), "ok")
+        self.assertEqual(len(calls), 2)
+
+    def test_non_429_errors_propagate(self) -> None:
+        def fn() -> str:
+            raise HttpError(status=500, reason="boom", body="", url="u")
+
+        with self.assertRaises(HttpError):
+            call_with_rate_limit("test_provider", "m", fn)
+
+    def test_retry_after_http_date(self) -> None:
+        err = HttpError(status=429, reason="", body="", url="u", headers={"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        self.assertEqual(err.retry_after_seconds, 0.0)
+        self.assertIsNone(HttpError(status=429, reason="", body="", url="u").retry_after_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import base64
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from toc.providers.evolink import EvoLinkClient, EvoLinkConfig
+from toc.refcache import UploadCache, encode_file_base64, file_digest
+
+
+class TestRefCache(unittest.TestCase):
+    def test_digest_and_base64_track_file_changes(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "ref.png"
+            p.write_bytes(b"one")
+            d1 = file_digest(p)
+            self.assertEqual(encode_file_base64(p), base64.b64encode(b"one").decode("ascii"))
+
+            p.write_bytes(b"two!")
+            self.assertNotEqual(file_digest(p), d1)
+            self.assertEqual(encode_file_base64(p), base64.b64encode(b"two!").decode("ascii"))
+
+    def test_upload_cache_single_flight_ttl_and_persistence(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            ref = root / "char.png"
+            ref.write_bytes(b"char")
+            store = root / "uploads.json"
+            cache = UploadCache(ttl_seconds=60, persist_path=store)
+            calls: list[int] = []
+
+            def upload() -> str:
+                calls.append(1)
+                time.sleep(0.05)
+                return "https://files.example/char.png"
+
+            threads = [threading.Thread(target=cache.get_or_upload, args=("evolink", ref, upload)) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(calls), 1)
+
+            reloaded = UploadCache(ttl_seconds=60, persist_path=store)
+            self.assertEqual(reloaded.get_or_upload("evolink", ref, upload), "https://files.example/char.png")
+            self.assertEqual(len(calls), 1)
+
+            expired = UploadCache(ttl_seconds=0, persist_path=store)
+            with mock.patch("toc.refcache.time.time", return_value=time.time() + 1):
+                expired.get_or_upload("evolink", ref, upload)
+            self.assertEqual(len(calls), 2)
+
+    def test_evolink_uploads_each_reference_once(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            ref = Path(td) / "char.png"
+            ref.write_bytes(b"\x89PNG\r\n\x1a\nchar")
+            client = EvoLinkClient(EvoLinkConfig(api_key="k", files_api_base=f"https://files.test/{td}"))
+            with mock.patch(
+                "toc.providers.evolink.request_json", return_value={"file_url": "https://files.test/u.png"}
+            ) as req:
+                urls = {client.upload_image_base64(path=ref) for _ in range(5)}
+            self.assertEqual(urls, {"https://files.test/u.png"})
+            self.assertEqual(req.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
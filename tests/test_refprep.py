@@ -0,0 +1,114 @@
+import base64
+import json
+import os
+import struct
+import sys
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from unittest import mock
+
+from toc.gencache import GenerationCache
+from toc.imaging import Raster, encode_png
+from toc.mock_providers import PNG_BYTES
+from toc.providers.gemini import GeminiClient, GeminiConfig
+from toc.refprep import PROFILES, prepare_reference
+
+
+FAKE_FFMPEG = """#!{python}
+import pathlib, sys
+with pathlib.Path({log!r}).open("a") as f:
+    f.write(" ".join(sys.argv[1:]) + "\\n")
+pathlib.Path(sys.argv[-1]).write_bytes(b"\\xff\\xd8\\xff" + b"j" * 16)
+"""
+
+
+def _png_chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+class TestRefPrep(unittest.TestCase):
+    def setUp(self) -> None:
+        self._td = tempfile.TemporaryDirectory()
+        self.root = Path(self._td.name)
+        self.log = self.root / "ffmpeg.log"
+        bin_dir = self.root / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "ffmpeg"
+        fake.write_text(FAKE_FFMPEG.format(python=sys.executable, log=str(self.log)), encoding="utf-8")
+        fake.chmod(0o755)
+        self.env = {
+            "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            "TOC_REFPREP_CACHE_DIR": str(self.root / "cache"),
+            "TOC_PREPARE_REFERENCES": "1",
+        }
+        self.ref = self.root / "char.png"
+        self.ref.write_bytes(PNG_BYTES + b"\x00" * 4096)  # a "large" source
+
+    def tearDown(self) -> None:
+        self._td.cleanup()
+
+    def test_prepared_variant_is_cached_by_content(self) -> None:
+        with mock.patch.dict(os.environ, self.env), mock.patch("toc.refprep.Image", None):
+            first = prepare_reference(self.ref, "gemini")
+            again = prepare_reference(self.ref, "gemini")
+            kling = prepare_reference(self.ref, "kling")
+        self.assertEqual(first.suffix, ".jpg")
+        self.assertEqual(first, again)
+        self.assertIn(PROFILES["gemini"].name, first.name)
+        self.assertNotEqual(first, kling)
+        calls = self.log.read_text().splitlines()
+        self.assertEqual(len(calls), 2)
+        self.assertIn("min(1536,iw)", calls[0])
+
+    def test_transparent_reference_stays_png_with_ffmpeg(self) -> None:
+        rgba = encode_png(Raster(2, 2, 4, bytearray(16)))
+        ihdr_end = 8 + 12 + 13
+        # Palette PNGs: transparency comes from a tRNS chunk between IHDR and IDAT.
+        plte = _png_chunk(b"PLTE", b"\x00\x00\x00\xff\xff\xff")
+        palette = rgba[:24] + bytes([8, 3]) + rgba[26:ihdr_end]
+        cases = {
+            "object.png": (rgba, True),
+            "palette_trns.png": (palette + plte + _png_chunk(b"tRNS", b"\x00") + rgba[ihdr_end:], True),
+            "palette.png": (palette + plte + rgba[ihdr_end:], False),
+        }
+        for name, (data, transparent) in cases.items():
+            with self.subTest(name):
+                src = self.root / name
+                src.write_bytes(data + b"\x00" * 4096)
+                self.log.unlink(missing_ok=True)
+                with mock.patch.dict(os.environ, self.env), mock.patch("toc.refprep.Image", None):
+                    prepared = prepare_reference(src, "kling")
+                self.assertEqual(prepared.suffix, ".png" if transparent else ".jpg")
+                self.assertEqual("-c:v png" in self.log.read_text(), transparent)
+
+    def test_disabled_or_not_smaller_keeps_original(self) -> None:
+        with mock.patch.dict(os.environ, {**self.env, "TOC_PREPARE_REFERENCES": "0"}):
+            self.assertEqual(prepare_reference(self.ref, "gemini"), self.ref)
+        tiny = self.root / "tiny.png"
+        tiny.write_bytes(PNG_BYTES[:12])
+        with mock.patch.dict(os.environ, self.env), mock.patch("toc.refprep.Image", None):
+            self.assertEqual(prepare_reference(tiny, "gemini"), tiny)
+            self.assertEqual(prepare_reference(self.ref, "unknown-provider"), self.ref)
+
+    def test_gemini_sends_prepared_reference_and_cache_key_tracks_profile(self) -> None:
+        cache = GenerationCache(self.root / "gen")
+        inputs = {"kind": "image/gemini", "model": "m", "prompt": "p", "reference_files": [self.ref]}
+        with mock.patch.dict(os.environ, {**self.env, "TOC_PREPARE_REFERENCES": "0"}):
+            plain_key = cache.key(**inputs)
+
+        image = base64.b64encode(PNG_BYTES).decode("ascii")
+        resp = {"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": image}}]}}]}
+        client = GeminiClient(GeminiConfig(api_key="k", api_base="https://gemini.test", image_model="m", video_model="v"))
+        with mock.patch.dict(os.environ, self.env), mock.patch("toc.refprep.Image", None):
+            self.assertNotEqual(cache.key(**inputs), plain_key)
+            with mock.patch("toc.providers.gemini.request_bytes", return_value=json.dumps(resp).encode()) as req:
+                client.generate_image(prompt="p", reference_images=[self.ref])
+        part = req.call_args.kwargs["json_payload"]["contents"][0]["parts"][1]["inlineData"]
+        self.assertEqual(part["mimeType"], "image/jpeg")
+        self.assertEqual(base64.b64decode(part["data"]), b"\xff\xd8\xff" + b"j" * 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from toc.render import (
+    RenderSpec,
+    SegmentCache,
+    build_normalize_command,
+    build_render_command,
+    escape_filter_path,
+    read_concat_list,
+    segment_render_spec,
+    supports_incremental,
+    write_concat_list,
+)
+
+
+class TestRenderCommand(unittest.TestCase):
+    def test_stream_copy_when_no_filter(self) -> None:
+        cmd = build_render_command(RenderSpec(clip_list=Path("clips.txt"), out=Path("out.mp4")))
+        self.assertEqual(cmd.count("-i"), 1)
+        self.assertNotIn("-filter_complex", cmd)
+        self.assertIn("copy", cmd[cmd.index("-c:v") + 1])
+
+    def test_single_pass_graph_with_mix_and_filters(self) -> None:
+        spec = RenderSpec(
+            clip_list=Path("clips.txt"),
+            out=Path("out.mp4"),
+            narration_list=Path("narration.txt"),
+            bgm=Path("bgm.mp3"),
+            bgm_volume="0.25",
+            srt=Path("subs.srt"),
+            fps="24",
+            size="1280x720",
+            reencode=True,
+        )
+        cmd = build_render_command(spec)
+        self.assertEqual(cmd.count("-i"), 3)
+        self.assertEqual(cmd.count("libx264"), 1)
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertIn("[0:v]scale=1280:720,fps=24,subtitles=subs.srt:force_style=", graph)
+        self.assertIn("[2:a]volume=0.25[bgm]", graph)
+        self.assertIn("[1:a][bgm]amix=inputs=2:duration=first", graph)
+        self.assertEqual([cmd[i + 1] for i, a in enumerate(cmd) if a == "-map"], ["[v]", "[a]"])
+        self.assertIn("-shortest", cmd)
+        self.assertEqual(cmd[-1], "out.mp4")
+
+    def test_audio_overrides_narration(self) -> None:
+        spec = RenderSpec(
+            clip_list=Path("clips.txt"),
+            out=Path("out.mp4"),
+            audio=Path("mix.m4a"),
+            narration=Path("n.mp3"),
+            bgm=Path("b.mp3"),
+        )
+        cmd = build_render_command(spec)
+        self.assertEqual(cmd.count("-i"), 2)
+        self.assertEqual([cmd[i + 1] for i, a in enumerate(cmd) if a == "-map"], ["0:v:0", "1:a:0"])
+
+    def test_rejects_both_narration_flags_and_escapes_paths(self) -> None:
+        with self.assertRaises(ValueError):
+            build_render_command(
+                RenderSpec(clip_list=Path("c"), out=Path("o"), narration=Path("n"), narration_list=Path("l"))
+            )
+        self.assertEqual(escape_filter_path("C:/a,b.srt"), "C\\\\:/a\\,b.srt")
+
+
+class TestIncrementalRender(unittest.TestCase):
+    def test_concat_list_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            (root / "clips.txt").write_text("file 'a.mp4'\n# note\nfile '/abs/b.mp4'\n", encoding="utf-8")
+            self.assertEqual(read_concat_list(root / "clips.txt"), [root / "a.mp4", Path("/abs/b.mp4")])
+
+            write_concat_list([root / "it's.mp4"], root / "out.txt")
+            self.assertEqual(read_concat_list(root / "out.txt"), [(root / "it's.mp4").resolve()])
+
+    def test_segment_key_tracks_content_and_settings(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            clip = Path(td) / "a.mp4"
+            clip.write_bytes(b"v1")
+            cache = SegmentCache(Path(td) / "segments")
+            spec = RenderSpec(clip_list=Path("c"), out=Path("o"), narration=Path("n"), size="1280x720", fps="24")
+
+            seg, cached = cache.lookup(clip, spec)
+            self.assertFalse(cached)
+            seg.parent.mkdir(parents=True)
+            seg.write_bytes(b"segment")
+            self.assertEqual(cache.lookup(clip, spec), (seg, True))
+
+            other = RenderSpec(clip_list=Path("c"), out=Path("o"), narration=Path("n"), size="1920x1080", fps="24")
+            self.assertNotEqual(cache.segment_key(clip, other), cache.segment_key(clip, spec))
+            clip.write_bytes(b"v2-regenerated")
+            self.assertFalse(cache.lookup(clip, spec)[1])
+
+    def test_segment_cache_evicts_least_recently_used(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            cache = SegmentCache(Path(td) / "segments", max_bytes=16)
+            segs = [cache.segment_path(f"{c}{c}" + "0" * 62) for c in "abc"]
+            for i, seg in enumerate(segs):
+                seg.parent.mkdir(parents=True)
+                seg.write_bytes(b"12345678")
+                os.utime(seg, (i + 1, i + 1))
+            (segs[0].parent / ".tmp-x.mp4").write_bytes(b"partial")
+
+            self.assertEqual(cache.evict(keep={segs[0]}), 8)
+            self.assertEqual([s.exists() for s in segs], [True, False, True])
+            self.assertTrue((segs[0].parent / ".tmp-x.mp4").exists())
+            self.assertEqual(SegmentCache(Path(td) / "segments", max_bytes=0).evict(), 0)
+
+    def test_segment_commands(self) -> None:
+        spec = RenderSpec(clip_list=Path("c"), out=Path("o.mp4"), narration=Path("n.mp3"), size="1280x720", fps="24")
+        norm = build_normalize_command(Path("a.mp4"), Path("seg.mp4"), spec)
+        self.assertEqual(norm[norm.index("-vf") + 1], "scale=1280:720,fps=24")
+        self.assertIn("-an", norm)
+
+        final = build_render_command(segment_render_spec(spec, Path("segments.txt")))
+        self.assertEqual(final[final.index("-c:v") + 1], "copy")
+        self.assertNotIn("-filter_complex", final)
+
+        self.assertTrue(supports_incremental(spec))
+        self.assertFalse(supports_incremental(RenderSpec(clip_list=Path("c"), out=Path("o"))))
+        self.assertFalse(supports_incremental(RenderSpec(clip_list=Path("c"), out=Path("o"), audio=Path("a"), srt=Path("s"))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+
+from toc.scheduler import TaskGraph
+
+
+class TestTaskGraph(unittest.TestCase):
+    def test_topological_order_is_stable_and_respects_deps(self) -> None:
+        graph = TaskGraph()
+        graph.add("video:1", lambda: None, deps=["image:ref"])
+        graph.add("image:ref", lambda: None)
+        graph.add("audio:1", lambda: None)
+        graph.add("video:2", lambda: None, deps=["video:1", "missing:ignored"])
+
+        self.assertEqual(graph.topological_order(), ["image:ref", "video:1", "audio:1", "video:2"])
+        self.assertEqual(graph.critical_path_length(), 3)
+
+    def test_cycle_is_rejected(self) -> None:
+        graph = TaskGraph()
+        graph.add("a", lambda: None, deps=["b"])
+        graph.add("b", lambda: None, deps=["a"])
+        with self.assertRaises(ValueError):
+            graph.topological_order()
+
+    def test_parallel_run_overlaps_independent_nodes_and_waits_for_deps(self) -> None:
+        graph = TaskGraph()
+        lock = threading.Lock()
+        events: list[str] = []
+        active = 0
+        peak = 0
+
+        def job(name: str) -> None:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+                events.append(name)
+
+        graph.add("ref", lambda: job("ref"))
+        graph.add("a", lambda: job("a"), deps=["ref"])
+        graph.add("b", lambda: job("b"), deps=["ref"])
+        graph.add("audio", lambda: job("audio"))
+        graph.run(max_workers=4)
+
+        self.assertEqual(sorted(events), ["a", "audio", "b", "ref"])
+        self.assertLess(events.index("ref"), events.index("a"))
+        self.assertLess(events.index("ref"), events.index("b"))
+        self.assertGreaterEqual(peak, 2)
+
+    def test_failure_stops_dependents_and_reraises(self) -> None:
+        graph = TaskGraph()
+        ran: list[str] = []
+
+        def boom() -> None:
+            raise SystemExit("scene1: failed")
+
+        graph.add("image", boom)
+        graph.add("video", lambda: ran.append("video"), deps=["image"])
+        with self.assertRaises(SystemExit):
+            graph.run(max_workers=2)
+        self.assertEqual(ran, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
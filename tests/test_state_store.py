@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from toc.harness import append_state_snapshot, parse_state_file
+from toc.state_store import StateStore
+
+
+class TestStateStore(unittest.TestCase):
+    def test_update_mirrors_state_txt_and_run_status(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            state_path = Path(td) / "state.txt"
+            store = StateStore(state_path)
+            store.update({"topic": "t", "runtime.stage": "init"})
+            merged = store.update({"runtime.stage": "render"})
+
+            self.assertEqual(parse_state_file(state_path), merged)
+            self.assertEqual(merged["status"], "INIT")
+            self.assertTrue(merged["job_id"].startswith("JOB_"))
+            status = json.loads((Path(td) / "run_status.json").read_text(encoding="utf-8"))
+            self.assertEqual(status["state_flat"]["runtime.stage"], "render")
+            self.assertEqual([c.value for c in store.history("runtime.stage")], ["render", "init"])
+
+    def test_imports_blocks_written_by_other_tools(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            state_path = Path(td) / "state.txt"
+            state_path.write_text("topic=old\nstatus=STORY\n---\n", encoding="utf-8")
+            store = StateStore(state_path)
+            self.assertEqual(store.current()["topic"], "old")
+
+            with state_path.open("a", encoding="utf-8") as f:
+                f.write("topic=edited\n---\n")
+            self.assertEqual(store.update({"runtime.stage": "x"})["topic"], "edited")
+
+            text = state_path.read_text(encoding="utf-8")
+            state_path.write_text(text.replace("topic=edited", "topic=EDITED"), encoding="utf-8")
+            self.assertEqual(store.current()["topic"], "EDITED")
+
+            # Same-length edit inside the last block (e.g. a human rejecting a review gate).
+            store.update({"gate.video_review": "approved", "review.note": "n" * 100})
+            text = state_path.read_text(encoding="utf-8")
+            head, _, last = text[:-1].rpartition("---\n")
+            state_path.write_text(head + "---\n" + last.replace("=approved", "=rejected") + "\n", encoding="utf-8")
+            self.assertEqual(len(state_path.read_text(encoding="utf-8")), len(text))
+            self.assertEqual(store.current()["gate.video_review"], "rejected")
+            self.assertEqual(store.update({"runtime.stage": "y"})["gate.video_review"], "rejected")
+
+            state_path.write_text("topic=rewritten\n---\n", encoding="utf-8")
+            self.assertEqual(store.current(), {"topic": "rewritten"})
+
+            store.update({"status": "DONE"})
+            state_path.unlink()
+            exported, _ = store.export()
+            self.assertEqual(parse_state_file(exported)["status"], "DONE")
+
+    def test_concurrent_writers_do_not_lose_updates(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            state_path = Path(td) / "state.txt"
+
+            def writer(n: int) -> None:
+                for i in range(10):
+                    append_state_snapshot(state_path, {f"worker.{n}": str(i)})
+
+            threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            state = parse_state_file(state_path)
+            self.assertEqual([state[f"worker.{n}"] for n in range(4)], ["9"] * 4)
+            self.assertEqual(state_path.read_text(encoding="utf-8").count("---"), 40)
+
+    def test_text_fallback_when_disabled(self) -> None:
+        with tempfile.TemporaryDirectory() as td, mock.patch.dict(os.environ, {"TOC_STATE_STORE": "0"}):
+            state_path = Path(td) / "state.txt"
+            append_state_snapshot(state_path, {"topic": "t"})
+            self.assertEqual(parse_state_file(state_path)["topic"], "t")
+            self.assertFalse((Path(td) / "state.sqlite3").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
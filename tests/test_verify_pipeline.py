@@ -174,6 +174,35 @@ class TestVerifyPipeline(unittest.TestCase):
             self.assertIn("overall", payload)
             self.assertTrue(payload["overall"]["passed"])
 
+    def test_deep_mode_flags_broken_clips(self) -> None:
+        import importlib.util
+        import os
+        import tempfile
+        from unittest import mock
+
+        spec = importlib.util.spec_from_file_location("verify_pipeline", Path("scripts/verify-pipeline.py"))
+        module = importlib.util.module_from_spec(spec)
+        assert spec.loader is not None
+        spec.loader.exec_module(module)
+
+        with tempfile.TemporaryDirectory(prefix="toc_verify_deep_") as td:
+            run_dir = Path(td) / "run"
+            (run_dir / "assets").mkdir(parents=True)
+            (run_dir / "state.txt").write_text("status=DONE\nruntime.render.status=success\nreview.video.status=pending\n---\n", encoding="utf-8")
+            (run_dir / "video.mp4").write_bytes(b"placeholder")
+            (run_dir / "assets" / "clip.mp4").write_bytes(b"\x00\x00\x00\x10ftypisom\x00\x00\x00\x00\x00\x00\x01\x00mdat")
+            (run_dir / "video_clips.txt").write_text("file 'assets/clip.mp4'\n", encoding="utf-8")
+
+            with mock.patch.dict(os.environ, {"TOC_MEDIACHECK_CACHE_DIR": "0"}):
+                stage, _ = module.check_video_single(run_dir, deep=True)
+                shallow, _ = module.check_video_single(run_dir)
+
+            deep = {c["id"]: c for c in stage["checks"]}["video.deep.clips"]
+            self.assertFalse(deep["passed"])
+            self.assertIn("truncated", deep["message"])
+            self.assertFalse(stage["passed"])
+            self.assertTrue(shallow["passed"])
+
 
 if __name__ == "__main__":
     unittest.main()
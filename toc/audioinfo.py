@@ -0,0 +1,236 @@
+"""
+In-process duration readers for the narration/clip formats the pipeline produces.
+
+- MP3: Xing/Info or VBRI frame count when present, otherwise every frame header is
+  walked (exact for CBR and VBR files without a TOC). ID3v2 tags are skipped and an
+  ID3v1 tag / trailing garbage ends the walk.
+- WAV: `fmt ` byte rate and `data` chunk size (RIFF/RF64 headers).
+- MP4/M4A/MOV: `mdhd` of the first sound track (falls back to `mvhd`).
+  `read_video_duration` reads the first video track instead.
+
+Files are read through `mmap`, so only the header pages are touched for WAV/MP4 and
+Xing-tagged MP3s. `read_duration` returns None for anything it does not recognize;
+callers fall back to ffprobe (`toc.mediainfo`).
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+
+
+# MPEG audio: version bits -> (bitrate table row, samples/frame per layer, sample rates)
+_MPEG_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),  # MPEG-2.5
+}
+_BITRATES_V1 = {
+    1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+}
+_BITRATES_V2 = {
+    1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Give up on a "frame" walk that keeps hitting garbage (not an MPEG stream).
+_MAX_RESYNC_BYTES = 64 * 1024
+
+
+def _mp3_frame(buf: mmap.mmap, pos: int) -> tuple[int, int, int, int, int] | None:
+    """(frame length, samples per frame, sample rate, version, channel mode) for a header at pos."""
+    if pos + 4 > len(buf):
+        return None
+    b1, b2, b3 = buf[pos + 1], buf[pos + 2], buf[pos + 3]
+    if buf[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_idx = (b2 >> 4) & 0x0F
+    sr_idx = (b2 >> 2) & 0x03
+    if version == 1 or layer_bits == 0 or bitrate_idx in (0, 15) or sr_idx == 3:
+        return None
+    layer = 4 - layer_bits
+    padding = (b2 >> 1) & 0x01
+    sample_rate = _MPEG_SAMPLE_RATES[version][sr_idx]
+    bitrate = (_BITRATES_V1 if version == 3 else _BITRATES_V2)[layer][bitrate_idx] * 1000
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or version == 3) else 576
+        length = (samples // 8) * bitrate // sample_rate + padding
+    if length < 4:
+        return None
+    return length, samples, sample_rate, version, (b3 >> 6) & 0x03
+
+
+def _id3v2_end(buf: mmap.mmap) -> int:
+    pos = 0
+    while pos + 10 <= len(buf) and buf[pos : pos + 3] == b"ID3":
+        size = 0
+        for b in buf[pos + 6 : pos + 10]:
+            size = (size << 7) | (b & 0x7F)
+        footer = 10 if buf[pos + 5] & 0x10 else 0
+        pos += 10 + size + footer
+    return pos
+
+
+def _mp3_duration(buf: mmap.mmap) -> float | None:
+    start = _id3v2_end(buf)
+    limit = min(len(buf), start + _MAX_RESYNC_BYTES)
+    pos = start
+    first = None
+    while pos < limit:
+        first = _mp3_frame(buf, pos)
+        if first is not None and (pos + first[0] >= len(buf) or _mp3_frame(buf, pos + first[0]) is not None):
+            break
+        first = None
+        pos += 1
+    if first is None:
+        return None
+    length, samples, sample_rate, version, mode = first
+
+    # Xing/Info: after the side info (size depends on version and mono/stereo).
+    side = (32 if mode != 3 else 17) if version == 3 else (17 if mode != 3 else 9)
+    tag = pos + 4 + side
+    if buf[tag : tag + 4] in (b"Xing", b"Info") and tag + 12 <= len(buf):
+        flags = struct.unpack(">I", buf[tag + 4 : tag + 8])[0]
+        if flags & 0x1:
+            frames = struct.unpack(">I", buf[tag + 8 : tag + 12])[0]
+            return frames * samples / sample_rate
+    # VBRI: fixed 32 bytes after the header.
+    vbri = pos + 36
+    if buf[vbri : vbri + 4] == b"VBRI" and vbri + 18 <= len(buf):
+        frames = struct.unpack(">I", buf[vbri + 14 : vbri + 18])[0]
+        return frames * samples / sample_rate
+
+    total_samples = 0
+    end = len(buf)
+    if end >= 128 and buf[end - 128 : end - 125] == b"TAG":
+        end -= 128
+    while pos < end:
+        frame = _mp3_frame(buf, pos)
+        if frame is None or pos + frame[0] > end:
+            break
+        total_samples += frame[1]
+        pos += frame[0]
+    return total_samples / sample_rate if total_samples else None
+
+
+def _wav_duration(buf: mmap.mmap) -> float | None:
+    riff = buf[0:4]
+    if riff not in (b"RIFF", b"RF64") or buf[8:12] != b"WAVE":
+        return None
+    pos = 12
+    byte_rate = 0
+    data_size: int | None = None
+    ds64_data: int | None = None
+    while pos + 8 <= len(buf):
+        cid = buf[pos : pos + 4]
+        size = struct.unpack("<I", buf[pos + 4 : pos + 8])[0]
+        body = pos + 8
+        if cid == b"ds64" and body + 16 <= len(buf):
+            ds64_data = struct.unpack("<Q", buf[body + 8 : body + 16])[0]
+        elif cid == b"fmt " and body + 12 <= len(buf):
+            byte_rate = struct.unpack("<I", buf[body + 8 : body + 12])[0]
+        elif cid == b"data":
+            if size == 0xFFFFFFFF:
+                data_size = ds64_data if ds64_data is not None else len(buf) - body
+            else:
+                data_size = min(size, len(buf) - body)
+            break
+        pos = body + size + (size & 1)
+    if not byte_rate or data_size is None:
+        return None
+    return data_size / byte_rate
+
+
+def _mp4_boxes(buf: mmap.mmap, start: int, end: int):
+    pos = start
+    while pos + 8 <= end:
+        size = struct.unpack(">I", buf[pos : pos + 4])[0]
+        kind = bytes(buf[pos + 4 : pos + 8])
+        header = 8
+        if size == 1 and pos + 16 <= end:
+            size = struct.unpack(">Q", buf[pos + 8 : pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _mp4_time(buf: mmap.mmap, body: int, end: int) -> tuple[int, int] | None:
+    """(timescale, duration) from an mvhd/mdhd full box body."""
+    version = buf[body]
+    if version == 1 and body + 32 <= end:
+        return struct.unpack(">IQ", buf[body + 20 : body + 32])
+    if version == 0 and body + 20 <= end:
+        return struct.unpack(">II", buf[body + 12 : body + 20])
+    return None
+
+
+def _mp4_duration(buf: mmap.mmap, handler_type: bytes = b"soun") -> float | None:
+    """`mdhd` duration of the first track with `handler_type` (`soun`/`vide`), else `mvhd`."""
+    if buf[4:8] != b"ftyp":
+        return None
+    movie: tuple[int, int] | None = None
+    track: tuple[int, int] | None = None
+    for kind, body, end in _mp4_boxes(buf, 0, len(buf)):
+        if kind != b"moov":
+            continue
+        for k, b, e in _mp4_boxes(buf, body, end):
+            if k == b"mvhd":
+                movie = _mp4_time(buf, b, e)
+            elif k == b"trak" and track is None:
+                for mk, mb, me in _mp4_boxes(buf, b, e):
+                    if mk != b"mdia":
+                        continue
+                    handler = mdhd = None
+                    for ck, cb, ce in _mp4_boxes(buf, mb, me):
+                        if ck == b"hdlr" and cb + 12 <= ce:
+                            handler = bytes(buf[cb + 8 : cb + 12])
+                        elif ck == b"mdhd":
+                            mdhd = _mp4_time(buf, cb, ce)
+                    if handler == handler_type and mdhd is not None:
+                        track = mdhd
+        break
+    for found in (track, movie):
+        if found is not None and found[0]:
+            return found[1] / found[0]
+    return None
+
+
+def read_duration(path: Path) -> float | None:
+    """Duration in seconds for MP3/WAV/MP4-family files, or None if unrecognized."""
+    try:
+        with path.open("rb") as f:
+            if f.seek(0, 2) == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if buf[0:4] in (b"RIFF", b"RF64"):
+                    return _wav_duration(buf)
+                if buf[4:8] == b"ftyp":
+                    return _mp4_duration(buf)
+                return _mp3_duration(buf)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def read_video_duration(path: Path) -> float | None:
+    """Duration of the first video track of an MP4-family file (`mvhd` fallback), or None."""
+    try:
+        with path.open("rb") as f:
+            if f.seek(0, 2) == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _mp4_duration(buf, b"vide")
+    except (OSError, ValueError, struct.error):
+        return None
@@ -0,0 +1,250 @@
+"""
+Helpers for `scripts/benchmark-pipeline.py`.
+
+- `synthetic_manifest`: a video_manifest.md with N cuts (no character/object refs, so
+  no local image processing is needed) for scaling runs.
+- `run_stage`: run one pipeline command and measure wall-clock, peak RSS of the whole
+  process tree, processes seen in the tree and bytes added under the run dir.
+  On Linux the tree is sampled from /proc every `SAMPLE_INTERVAL_SECONDS`; elsewhere
+  only the direct child is counted and peak RSS comes from its rusage.
+  `sampled_process_count` is a lower bound: processes that start and exit between two
+  samples (e.g. quick per-file ffprobe calls) are missed, so it shows long-lived
+  fan-out but is no exact fork count.
+- `find_regressions`: compare a result against a stored baseline.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+
+SAMPLE_INTERVAL_SECONDS = 0.05
+
+
+def synthetic_manifest(cuts: int, *, topic: str = "benchmark", cuts_per_scene: int = 5, seconds: int = 5) -> str:
+    lines = [
+        "# Video Manifest (benchmark)",
+        "",
+        "```yaml",
+        "video_metadata:",
+        f'  topic: "{topic}"',
+        f"  duration_seconds: {cuts * seconds}",
+        '  aspect_ratio: "9:16"',
+        '  resolution: "1080x1920"',
+        "",
+        "scenes:",
+    ]
+    scene_count = (cuts + cuts_per_scene - 1) // cuts_per_scene
+    n = 0
+    for scene_id in range(1, scene_count + 1):
+        lines.append(f"  - scene_id: {scene_id}")
+        lines.append("    cuts:")
+        for cut_id in range(1, cuts_per_scene + 1):
+            if n >= cuts:
+                break
+            n += 1
+            stem = f"scene{scene_id}_cut{cut_id}"
+            lines.extend(
+                [
+                    f"      - cut_id: {cut_id}",
+                    '        cut_role: "main"',
+                    "        image_generation:",
+                    '          tool: "google_nanobanana_pro"',
+                    "          character_ids: []",
+                    "          object_ids: []",
+                    f'          prompt: "benchmark scene {scene_id} cut {cut_id}"',
+                    f'          output: "assets/scenes/{stem}_base.png"',
+                    "        video_generation:",
+                    '          tool: "kling_3_0"',
+                    f"          duration_seconds: {seconds}",
+                    f'          input_image: "assets/scenes/{stem}_base.png"',
+                    '          motion_prompt: "slow pan"',
+                    f'          output: "assets/scenes/{stem}_video.mp4"',
+                    "        audio:",
+                    "          narration:",
+                    f'            text: "benchmark narration {n}"',
+                    '            tool: "elevenlabs"',
+                    f'            output: "assets/audio/{stem}_narration.mp3"',
+                ]
+            )
+    lines.append("```")
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str  # ok | failed | skipped
+    wall_seconds: float = 0.0
+    peak_rss_bytes: int = 0
+    sampled_process_count: int = 0  # lower bound, see module docstring
+    bytes_written: int = 0
+    returncode: int | None = None
+    note: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def tree_size(root: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _proc_table() -> dict[int, tuple[int, int]]:
+    """pid -> (ppid, rss bytes) from /proc (Linux only)."""
+    page = os.sysconf("SC_PAGE_SIZE")
+    table: dict[int, tuple[int, int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                raw = f.read().decode("ascii", "replace")
+        except OSError:
+            continue
+        # Fields after the parenthesized comm: state ppid ... rss is field 24 overall.
+        rest = raw.rsplit(")", 1)[-1].split()
+        try:
+            table[int(entry)] = (int(rest[1]), int(rest[21]) * page)
+        except (IndexError, ValueError):
+            continue
+    return table
+
+
+class ProcessTreeSampler:
+    def __init__(self, root_pid: int, *, interval_seconds: float = SAMPLE_INTERVAL_SECONDS):
+        self.root_pid = root_pid
+        self.interval_seconds = interval_seconds
+        self.enabled = sys.platform.startswith("linux") and os.path.isdir("/proc")
+        self.seen: set[int] = {root_pid}
+        self.peak_rss_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="bench-sampler", daemon=True)
+
+    def _sample(self) -> None:
+        table = _proc_table()
+        tree = {self.root_pid}
+        changed = True
+        while changed:
+            changed = False
+            for pid, (ppid, _) in table.items():
+                if ppid in tree and pid not in tree:
+                    tree.add(pid)
+                    changed = True
+        self.seen |= tree & table.keys()
+        rss = sum(table[pid][1] for pid in tree if pid in table)
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self.enabled:
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self.enabled:
+            self._stop.set()
+            self._thread.join()
+
+
+def run_stage(
+    name: str,
+    cmd: list[str],
+    *,
+    cwd: Path,
+    env: dict[str, str] | None = None,
+    measure_dir: Path | None = None,
+    log_path: Path | None = None,
+    ok_returncodes: tuple[int, ...] = (0,),
+) -> StageResult:
+    before = tree_size(measure_dir) if measure_dir and measure_dir.exists() else 0
+    log = log_path.open("ab") if log_path else subprocess.DEVNULL
+    try:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=str(cwd), env=env, stdout=log, stderr=subprocess.STDOUT)
+        sampler = ProcessTreeSampler(proc.pid)
+        sampler.start()
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            sampler.stop()
+        wall = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        if log_path:
+            log.close()  # type: ignore[union-attr]
+    after = tree_size(measure_dir) if measure_dir and measure_dir.exists() else 0
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    child_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return StageResult(
+        name=name,
+        status="ok" if proc.returncode in ok_returncodes else "failed",
+        wall_seconds=round(wall, 4),
+        peak_rss_bytes=max(sampler.peak_rss_bytes, child_rss),
+        sampled_process_count=len(sampler.seen),
+        bytes_written=max(0, after - before),
+        returncode=proc.returncode,
+    )
+
+
+def find_regressions(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    tolerance: float = 0.2,
+    min_seconds: float = 0.5,
+    min_rss_bytes: int = 16 * 1024 * 1024,
+) -> list[str]:
+    """Stages (per cut count) that got slower / fatter than baseline beyond the tolerance."""
+    out: list[str] = []
+    base_runs = {str(r.get("cuts")): r for r in baseline.get("runs") or []}
+    for run in current.get("runs") or []:
+        base = base_runs.get(str(run.get("cuts")))
+        if not base:
+            continue
+        base_stages = {s["name"]: s for s in base.get("stages") or [] if s.get("status") == "ok"}
+        for stage in run.get("stages") or []:
+            ref = base_stages.get(stage["name"])
+            if not ref or stage.get("status") != "ok":
+                continue
+            label = f"{run['cuts']} cuts / {stage['name']}"
+            dt = stage["wall_seconds"] - ref["wall_seconds"]
+            if dt > min_seconds and stage["wall_seconds"] > ref["wall_seconds"] * (1.0 + tolerance):
+                out.append(f"{label}: wall {ref['wall_seconds']:.2f}s -> {stage['wall_seconds']:.2f}s")
+            drss = stage["peak_rss_bytes"] - ref["peak_rss_bytes"]
+            if drss > min_rss_bytes and stage["peak_rss_bytes"] > ref["peak_rss_bytes"] * (1.0 + tolerance):
+                out.append(
+                    f"{label}: peak RSS {ref['peak_rss_bytes'] / 2**20:.0f}MiB -> {stage['peak_rss_bytes'] / 2**20:.0f}MiB"
+                )
+    return out
+
+
+def append_history(path: Path, record: dict[str, Any]) -> None:
+    history: list[Any] = []
+    if path.exists():
+        try:
+            loaded = json.loads(path.read_text(encoding="utf-8"))
+            history = loaded if isinstance(loaded, list) else []
+        except ValueError:
+            history = []
+    history.append(record)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(history, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
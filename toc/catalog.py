@@ -0,0 +1,285 @@
+"""
+Cross-run catalog of `output/<topic>_<timestamp>` runs (SQLite).
+
+One row per run dir with its merged state (topic, status, stage, timestamps), pending
+gates and artifact sizes, so status queries over hundreds of runs are a single indexed
+lookup instead of a scan of every state.txt:
+
+    <output>/.cache/catalog.sqlite3     (override: TOC_CATALOG_PATH)
+
+`refresh` is incremental: a run is re-read only when the mtime/size of its state.txt
+or the mtime of the run dir itself (artifact added/removed) changed; runs whose dir
+disappeared are dropped.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from toc.harness import artifact_inventory, parse_state_file, pending_gates
+
+try:
+    import sqlite3
+except Exception:  # pragma: no cover - optional import fallback (Python built without sqlite)
+    sqlite3 = None  # type: ignore[assignment]
+
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs(
+    run_dir TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    topic TEXT,
+    job_id TEXT,
+    status TEXT,
+    stage TEXT,
+    render_status TEXT,
+    started_at TEXT,
+    updated_at TEXT,
+    elapsed_seconds REAL,
+    artifact_count INTEGER NOT NULL DEFAULT 0,
+    artifact_bytes INTEGER NOT NULL DEFAULT 0,
+    video_bytes INTEGER,
+    state_mtime_ns INTEGER NOT NULL,
+    state_size INTEGER NOT NULL,
+    dir_mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_status ON runs(status);
+CREATE INDEX IF NOT EXISTS runs_stage ON runs(stage);
+CREATE TABLE IF NOT EXISTS gates(run_dir TEXT NOT NULL, gate TEXT NOT NULL, PRIMARY KEY(run_dir, gate));
+CREATE INDEX IF NOT EXISTS gates_gate ON gates(gate);
+CREATE TABLE IF NOT EXISTS artifacts(
+    run_dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    present INTEGER NOT NULL,
+    bytes INTEGER,
+    PRIMARY KEY(run_dir, name)
+);
+"""
+
+
+@dataclass(frozen=True)
+class RunEntry:
+    run_dir: str
+    name: str
+    topic: str | None
+    job_id: str | None
+    status: str | None
+    stage: str | None
+    render_status: str | None
+    started_at: str | None
+    updated_at: str | None
+    elapsed_seconds: float | None
+    artifact_count: int
+    artifact_bytes: int
+    video_bytes: int | None
+    pending_gates: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+
+@dataclass(frozen=True)
+class RefreshStats:
+    scanned: int
+    updated: int
+    removed: int
+
+
+def default_catalog_path(output_root: Path) -> Path:
+    raw = (os.environ.get("TOC_CATALOG_PATH") or "").strip()
+    return Path(raw).expanduser() if raw else (output_root / ".cache" / "catalog.sqlite3")
+
+
+def _parse_ts(value: str | None) -> dt.datetime | None:
+    if not value:
+        return None
+    try:
+        return dt.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _first_timestamp(state_path: Path) -> str | None:
+    with state_path.open("r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = raw.strip()
+            if line.startswith("timestamp="):
+                return line.split("=", 1)[1].strip() or None
+    return None
+
+
+class RunCatalog:
+    def __init__(self, output_root: Path, *, db_path: Path | None = None):
+        self.output_root = output_root
+        self.db_path = db_path or default_catalog_path(output_root)
+
+    @contextmanager
+    def _connect(self) -> Iterator["sqlite3.Connection"]:
+        if sqlite3 is None:
+            raise RuntimeError("sqlite3 is not available in this Python build.")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.executescript("DROP TABLE IF EXISTS runs; DROP TABLE IF EXISTS gates; DROP TABLE IF EXISTS artifacts;")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+            yield conn
+        finally:
+            conn.close()
+
+    def _run_dirs(self) -> Iterator[tuple[Path, os.stat_result, os.stat_result]]:
+        try:
+            entries = list(os.scandir(self.output_root))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                state_st = os.stat(os.path.join(entry.path, "state.txt"))
+            except OSError:
+                continue
+            yield Path(entry.path), entry.stat(follow_symlinks=False), state_st
+
+    def _index_run(self, conn: "sqlite3.Connection", run_dir: Path, dir_st: os.stat_result, state_st: os.stat_result) -> None:
+        key = str(run_dir.resolve())
+        state_path = run_dir / "state.txt"
+        state = parse_state_file(state_path)
+        started_at = _first_timestamp(state_path)
+        updated_at = state.get("timestamp") or None
+        start, end = _parse_ts(started_at), _parse_ts(updated_at)
+        elapsed = (end - start).total_seconds() if start and end else None
+
+        artifacts: list[tuple[str, str, int, int | None]] = []
+        for name, info in artifact_inventory(run_dir, state).items():
+            size: int | None = None
+            if info["exists"]:
+                try:
+                    size = os.stat(info["path"]).st_size
+                except OSError:
+                    size = None
+            artifacts.append((name, info["path"], int(size is not None), size))
+        video_path = run_dir / "video.mp4"
+        video_bytes = next((a[3] for a in artifacts if a[0] == "video"), None)
+        if video_bytes is None and video_path.exists():
+            video_bytes = video_path.stat().st_size
+
+        conn.execute("DELETE FROM gates WHERE run_dir = ?", (key,))
+        conn.execute("DELETE FROM artifacts WHERE run_dir = ?", (key,))
+        conn.execute(
+            "INSERT OR REPLACE INTO runs VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                run_dir.name,
+                state.get("topic"),
+                state.get("job_id"),
+                state.get("status"),
+                state.get("runtime.stage"),
+                state.get("runtime.render.status"),
+                started_at,
+                updated_at,
+                elapsed,
+                sum(a[2] for a in artifacts),
+                sum(a[3] or 0 for a in artifacts),
+                video_bytes,
+                state_st.st_mtime_ns,
+                state_st.st_size,
+                dir_st.st_mtime_ns,
+            ),
+        )
+        conn.executemany("INSERT INTO gates(run_dir, gate) VALUES(?, ?)", [(key, g) for g in pending_gates(state)])
+        conn.executemany(
+            "INSERT INTO artifacts(run_dir, name, path, present, bytes) VALUES(?, ?, ?, ?, ?)",
+            [(key, *a) for a in artifacts],
+        )
+
+    def refresh(self, *, rebuild: bool = False) -> RefreshStats:
+        scanned = updated = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if rebuild:
+                    conn.execute("DELETE FROM runs")
+                    conn.execute("DELETE FROM gates")
+                    conn.execute("DELETE FROM artifacts")
+                known = {
+                    row[0]: tuple(row[1:])
+                    for row in conn.execute("SELECT run_dir, state_mtime_ns, state_size, dir_mtime_ns FROM runs")
+                }
+                seen: set[str] = set()
+                for run_dir, dir_st, state_st in self._run_dirs():
+                    scanned += 1
+                    key = str(run_dir.resolve())
+                    seen.add(key)
+                    if known.get(key) == (state_st.st_mtime_ns, state_st.st_size, dir_st.st_mtime_ns):
+                        continue
+                    self._index_run(conn, run_dir, dir_st, state_st)
+                    updated += 1
+                gone = [k for k in known if k not in seen]
+                for table in ("runs", "gates", "artifacts"):
+                    conn.executemany(f"DELETE FROM {table} WHERE run_dir = ?", [(k,) for k in gone])
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return RefreshStats(scanned=scanned, updated=updated, removed=len(gone))
+
+    def query(
+        self,
+        *,
+        status: str | None = None,
+        stage: str | None = None,
+        pending_gate: str | None = None,
+        topic: str | None = None,
+        limit: int | None = None,
+    ) -> list[RunEntry]:
+        sql = "SELECT r.* FROM runs r"
+        where: list[str] = []
+        params: list[Any] = []
+        if pending_gate:
+            sql += " JOIN gates g ON g.run_dir = r.run_dir AND g.gate = ?"
+            params.append(pending_gate)
+        if status:
+            where.append("r.status = ?")
+            params.append(status)
+        if stage:
+            where.append("r.stage = ?")
+            params.append(stage)
+        if topic:
+            where.append("r.topic LIKE ?")
+            params.append(f"%{topic}%")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.updated_at DESC, r.name"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            gates: dict[str, list[str]] = {}
+            for run_dir, gate in conn.execute("SELECT run_dir, gate FROM gates ORDER BY gate"):
+                gates.setdefault(run_dir, []).append(gate)
+        return [RunEntry(*row[:13], pending_gates=gates.get(row[0], [])) for row in rows]
+
+    def artifacts(self, run_dir: Path) -> list[dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, path, present, bytes FROM artifacts WHERE run_dir = ? ORDER BY name", (str(run_dir.resolve()),)
+            ).fetchall()
+        return [{"name": n, "path": p, "exists": bool(e), "bytes": b} for n, p, e, b in rows]
+
+
+def entries_to_json(entries: list[RunEntry]) -> str:
+    return json.dumps([e.to_dict() for e in entries], ensure_ascii=False, indent=2)
@@ -0,0 +1,87 @@
+"""
+Per-output input records for incremental regeneration.
+
+Each generated output gets a sidecar holding the hash of its effective inputs
+(resolved prompt, tool/model, duration, payload overrides and reference/first-frame
+files by content):
+
+    <dir>/.<output name>.inputs.json   {"version", "key"}
+
+On a rerun an output whose recorded key differs from the current one is stale and
+is regenerated. Because upstream files enter the key by content, a regenerated
+reference image or chained first frame makes its dependents stale in turn.
+
+An output without a sidecar (produced before tracking existed) is adopted as-is:
+its current key is recorded and it is not regenerated.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable
+
+from toc.gencache import generation_key
+
+
+FORMAT_VERSION = 1
+
+
+def inputs_path(out_path: Path) -> Path:
+    return out_path.parent / f".{out_path.name}.inputs.json"
+
+
+def inputs_key(
+    *,
+    kind: str,
+    tool: str,
+    prompt: str,
+    params: dict[str, Any] | None = None,
+    input_files: list[Path | None] | None = None,
+    extra: Any = None,
+) -> str:
+    return generation_key(kind=kind, model=tool, prompt=prompt, params=params, reference_files=input_files, extra=extra)
+
+
+def recorded_key(out_path: Path) -> str | None:
+    try:
+        doc = json.loads(inputs_path(out_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(doc, dict) or doc.get("version") != FORMAT_VERSION:
+        return None
+    key = doc.get("key")
+    return key if isinstance(key, str) else None
+
+
+def record_inputs(out_path: Path, key: str) -> None:
+    path = inputs_path(out_path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".inputs-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "key": key}, f)
+        os.replace(tmp, path)
+    except OSError:
+        return
+
+
+def is_stale(out_path: Path, key: str) -> bool:
+    """True when `out_path` exists and was recorded with different inputs."""
+    if not out_path.exists():
+        return False
+    recorded = recorded_key(out_path)
+    return recorded is not None and recorded != key
+
+
+def invalidate(paths: Iterable[Path]) -> list[Path]:
+    """Remove outputs (and their records) so the generators produce them again."""
+    removed: list[Path] = []
+    for p in paths:
+        if p.exists():
+            p.unlink()
+            removed.append(p)
+        inputs_path(p).unlink(missing_ok=True)
+    return removed
@@ -0,0 +1,166 @@
+"""
+Content-addressed cache for paid generation outputs.
+
+Entries are keyed by a sha256 over everything that determines a provider result
+(kind, model, prompt, generation parameters, reference image bytes, extra payload)
+and live under a shared root, so identical requests across runs reuse one file:
+
+    <root>/<key[:2]>/<key><suffix>
+
+- Root: `TOC_GENERATION_CACHE_DIR` (default: `<repo>/output/.cache/generations`).
+- Size cap: `TOC_GENERATION_CACHE_MAX_BYTES` (default 20 GiB; 0 disables eviction).
+  Least-recently-used entries (by mtime, refreshed on every hit) are evicted first.
+- Materialization tries a reflink (copy-on-write), then a plain copy. Outputs never
+  share an inode with their entry, so tools that rewrite an output in place (e.g.
+  `ffmpeg -y`) cannot corrupt the cache, and refreshing an entry's recency leaves the
+  output's mtime alone.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+from toc.refcache import file_digest
+from toc.refprep import prep_signature
+
+
+DEFAULT_MAX_BYTES = 20 * 1024**3
+
+_FICLONE = 0x40049409  # Linux ioctl: share extents (btrfs/xfs reflink).
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - non-POSIX
+        return False
+    try:
+        with src.open("rb") as s, dst.open("wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+
+
+def generation_key(
+    *,
+    kind: str,
+    model: str,
+    prompt: str,
+    params: dict[str, Any] | None = None,
+    reference_files: list[Path | None] | None = None,
+    extra: Any = None,
+) -> str:
+    """sha256 over everything that determines a provider result (reference files by content)."""
+    refs: list[str | None] = []
+    for ref in reference_files or []:
+        if ref is None:
+            refs.append(None)
+        elif ref.exists():
+            refs.append(file_digest(ref))
+        else:
+            refs.append(f"missing:{ref}")
+    doc = {
+        "kind": kind,
+        "model": model,
+        "prompt": prompt,
+        "params": params or {},
+        "references": refs,
+        "extra": extra,
+    }
+    blob = json.dumps(doc, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    def __init__(self, root: Path, *, max_bytes: int | None = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes if max_bytes and max_bytes > 0 else None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_env(repo_root: Path) -> "GenerationCache":
+        raw_root = (os.environ.get("TOC_GENERATION_CACHE_DIR") or "").strip()
+        root = Path(raw_root).expanduser() if raw_root else (repo_root / "output" / ".cache" / "generations")
+        raw_max = (os.environ.get("TOC_GENERATION_CACHE_MAX_BYTES") or "").strip()
+        try:
+            max_bytes = int(raw_max) if raw_max else DEFAULT_MAX_BYTES
+        except ValueError:
+            max_bytes = DEFAULT_MAX_BYTES
+        return GenerationCache(root, max_bytes=max_bytes)
+
+    def key(self, **inputs: Any) -> str:
+        # Prepared (downscaled/re-encoded) references can change provider results, so the
+        # active preparation profile is part of cached entries' identity. Dirty tracking
+        # (`toc.dirty`) deliberately ignores it: toggling it does not force regeneration.
+        signature = prep_signature()
+        if signature is not None:
+            inputs["extra"] = {"extra": inputs.get("extra"), "reference_prep": signature}
+        return generation_key(**inputs)
+
+    def entry_path(self, key: str, suffix: str) -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def contains(self, key: str, suffix: str) -> bool:
+        entry = self.entry_path(key, suffix)
+        return entry.exists() and entry.stat().st_size > 0
+
+    def materialize(self, key: str, out_path: Path) -> bool:
+        """Place the cached entry at `out_path`. Returns False on a miss."""
+        entry = self.entry_path(key, out_path.suffix)
+        if not entry.exists() or entry.stat().st_size == 0:
+            return False
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.unlink(missing_ok=True)
+        if not _reflink(entry, out_path):
+            shutil.copy2(entry, out_path)
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return True
+
+    def store(self, key: str, src_path: Path) -> Path | None:
+        """Copy a freshly generated output into the cache (best-effort)."""
+        if not src_path.exists() or src_path.stat().st_size == 0:
+            return None
+        entry = self.entry_path(key, src_path.suffix)
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(entry.parent), prefix=".tmp-", suffix=src_path.suffix)
+            os.close(fd)
+            shutil.copyfile(src_path, tmp)
+            os.replace(tmp, entry)
+        except OSError:
+            return None
+        self.evict()
+        return entry
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until the cache fits `max_bytes`. Returns bytes freed."""
+        if self.max_bytes is None:
+            return 0
+        with self._lock:
+            entries: list[tuple[float, int, Path]] = []
+            total = 0
+            for p in self.root.glob("*/*"):
+                if p.name.startswith(".tmp-") or not p.is_file():
+                    continue
+                st = p.stat()
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+            freed = 0
+            for _, size, p in sorted(entries):
+                if total - freed <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                freed += size
+            return freed
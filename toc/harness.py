@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import datetime as dt
 import json
+import os
 import re
 from pathlib import Path
 from typing import Any
@@ -110,6 +111,11 @@ def _order_keys(state: dict[str, str]) -> list[str]:
     return out
 
 
+def format_state_block(state: dict[str, str]) -> str:
+    lines = [f"{key}={state[key]}" for key in _order_keys(state)]
+    return "\n".join(lines) + "\n---\n"
+
+
 def _nested_set(target: dict[str, Any], dotted_key: str, value: Any) -> None:
     parts = dotted_key.split(".")
     cur = target
@@ -202,14 +208,30 @@ def sync_run_status(run_dir: Path, state: dict[str, str] | None = None) -> Path:
             payload["eval_report"] = {"error": f"Failed to parse {eval_path.name}"}
 
     output_path = run_status_path(run_dir)
-    output_path.write_text(
+    # Replace atomically so readers never see a half-written file.
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(
         json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
         encoding="utf-8",
     )
+    os.replace(tmp_path, output_path)
     return output_path
 
 
 def append_state_snapshot(state_path: Path, updates: dict[str, str]) -> dict[str, str]:
+    """
+    Merge `updates` into the run state, append the snapshot to state.txt and refresh
+    run_status.json. Goes through the per-run SQLite store (`toc.state_store`) unless
+    `TOC_STATE_STORE=0` or sqlite3 is unavailable.
+    """
+    from toc.state_store import StateStore, store_enabled
+
+    if store_enabled():
+        return StateStore(state_path).update(updates)
+    return _append_state_snapshot_text(state_path, updates)
+
+
+def _append_state_snapshot_text(state_path: Path, updates: dict[str, str]) -> dict[str, str]:
     state_path.parent.mkdir(parents=True, exist_ok=True)
     merged = parse_state_file(state_path)
 
@@ -222,10 +244,8 @@ def append_state_snapshot(state_path: Path, updates: dict[str, str]) -> dict[str
     merged.update(cleaned)
     merged["timestamp"] = now_iso()
 
-    lines = [f"{key}={merged[key]}" for key in _order_keys(merged)]
-    block = "\n".join(lines) + "\n---\n"
     with state_path.open("a", encoding="utf-8") as handle:
-        handle.write(block)
+        handle.write(format_state_block(merged))
 
     sync_run_status(state_path.parent, merged)
     return merged
@@ -1,10 +1,45 @@
+"""
+Minimal HTTP helpers shared by provider clients.
+
+Requests go through a small keep-alive connection pool (one set of persistent
+HTTP(S) connections per scheme+host+port) so frequent polls and submits to the
+same provider skip the TCP/TLS handshake. Set `TOC_HTTP_POOL=0` to fall back to
+plain `urllib.request.urlopen`; the fallback is also used automatically when a
+proxy applies to the target host. `TOC_HTTP_POOL_MAXSIZE` (default 10) caps the
+connections (and concurrent requests) per host. An idle connection is only reused
+within `TOC_HTTP_POOL_IDLE_SECONDS` (default 5) of its last response and while the
+server has not closed it, since a POST cannot be resent safely once it failed.
+
+Large media is fetched with `stream_to_file`, which never buffers the whole body.
+Large uploads work the same way in reverse: providers embed `inline_file_base64(path)`
+in a JSON payload, and files of at least `TOC_HTTP_STREAM_MIN_BYTES` (default 1 MiB)
+are base64-encoded chunk by chunk while the body is written to the socket (with a
+precomputed Content-Length) instead of being materialized as one string.
+"""
+
 from __future__ import annotations
 
+import base64
+import contextlib
+import email.utils
+import hashlib
+import http.client
 import json
+import os
+import re
+import select
+import ssl
+import sys
+import threading
+import time
 import urllib.error
+import urllib.parse
 import urllib.request
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from toc.refcache import encode_file_base64
 
 
 @dataclass(frozen=True)
@@ -13,6 +48,25 @@ class HttpError(Exception):
     reason: str
     body: str
     url: str
+    headers: dict[str, str] | None = field(default=None, compare=False)
+
+    @property
+    def retry_after_seconds(self) -> float | None:
+        """Parse `Retry-After` (delta-seconds or HTTP-date), if the server sent one."""
+        for key, value in (self.headers or {}).items():
+            if key.lower() != "retry-after":
+                continue
+            raw = str(value).strip()
+            try:
+                return max(0.0, float(raw))
+            except ValueError:
+                pass
+            try:
+                parsed = email.utils.parsedate_to_datetime(raw)
+            except (TypeError, ValueError):
+                return None
+            return max(0.0, parsed.timestamp() - time.time())
+        return None
 
     def __str__(self) -> str:  # noqa: D105
         body = self.body.strip()
@@ -28,6 +82,430 @@ def _read_http_error_body(e: urllib.error.HTTPError) -> str:
         return ""
 
 
+DEFAULT_STREAM_MIN_BYTES = 1 << 20
+STREAM_CHUNK_BYTES = 3 * 64 * 1024  # multiple of 3: chunks encode without padding
+
+
+@dataclass(frozen=True)
+class Base64File:
+    """JSON payload value standing for the string `prefix + base64(<file contents>)`."""
+
+    path: Path
+    prefix: str = ""
+
+    def __str__(self) -> str:
+        return f"<base64 file: {self.path.name}, {self.path.stat().st_size} bytes>"
+
+
+Body = bytes | Iterable[bytes] | None
+
+
+def _stream_min_bytes() -> int:
+    try:
+        return max(0, int(os.environ.get("TOC_HTTP_STREAM_MIN_BYTES") or DEFAULT_STREAM_MIN_BYTES))
+    except ValueError:
+        return DEFAULT_STREAM_MIN_BYTES
+
+
+def inline_file_base64(path: Path, *, prefix: str = "") -> str | Base64File:
+    """
+    Base64 of `path` (after `prefix`, e.g. a `data:` URL header) for a JSON payload.
+
+    Small files return the memoized string; large ones return a `Base64File` that
+    `request_bytes` encodes while sending.
+    """
+    if path.stat().st_size < _stream_min_bytes():
+        return prefix + encode_file_base64(path)
+    return Base64File(path=path, prefix=prefix)
+
+
+def json_default(obj: Any) -> Any:
+    """`json.dumps(..., default=json_default)` renders `Base64File` values as a short placeholder."""
+    if isinstance(obj, Base64File):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StreamingJsonBody:
+    """
+    Re-iterable JSON request body whose `Base64File` values are encoded on the fly.
+
+    Only one `STREAM_CHUNK_BYTES` slice of each file is held in memory at a time;
+    `len()` is the exact encoded size, known before anything is read.
+    """
+
+    def __init__(self, parts: list[bytes | tuple[Base64File, int]]):
+        self._parts = parts
+
+    def __len__(self) -> int:
+        total = 0
+        for part in self._parts:
+            if isinstance(part, bytes):
+                total += len(part)
+            else:
+                ref, size = part
+                total += len(_quoted_prefix(ref)) + 4 * ((size + 2) // 3) + 1
+        return total
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            ref, size = part
+            yield _quoted_prefix(ref)
+            sent = 0
+            with ref.path.open("rb") as f:
+                for chunk in iter(lambda: f.read(STREAM_CHUNK_BYTES), b""):
+                    sent += len(chunk)
+                    if sent > size:
+                        break
+                    yield base64.b64encode(chunk)
+            if sent != size:
+                # The declared Content-Length can no longer be honoured.
+                raise OSError(f"{ref.path} changed size while being sent ({size} -> {sent} bytes)")
+            yield b'"'
+
+
+class FileBody:
+    """Re-iterable raw request body read from `path` in `STREAM_CHUNK_BYTES` chunks."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._size = path.stat().st_size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[bytes]:
+        with self.path.open("rb") as f:
+            yield from iter(lambda: f.read(STREAM_CHUNK_BYTES), b"")
+
+
+def _quoted_prefix(ref: Base64File) -> bytes:
+    # Opening quote + JSON-escaped prefix; the base64 alphabet itself needs no escaping.
+    return json.dumps(ref.prefix).encode("utf-8")[:-1]
+
+
+def encode_json_body(payload: Any) -> bytes | StreamingJsonBody:
+    """UTF-8 JSON for `payload`; a `StreamingJsonBody` when it contains `Base64File` values."""
+    refs: list[Base64File] = []
+    token = f"@@toc-base64-{os.urandom(8).hex()}-"
+
+    def placeholder(obj: Any) -> Any:
+        if isinstance(obj, Base64File):
+            refs.append(obj)
+            return f"{token}{len(refs) - 1}@@"
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    text = json.dumps(payload, default=placeholder)
+    if not refs:
+        return text.encode("utf-8")
+    parts: list[bytes | tuple[Base64File, int]] = []
+    pieces = re.split(f'"{re.escape(token)}(\\d+)@@"', text)
+    for i, piece in enumerate(pieces):
+        if i % 2 == 0:
+            if piece:
+                parts.append(piece.encode("utf-8"))
+        else:
+            ref = refs[int(piece)]
+            parts.append((ref, ref.path.stat().st_size))
+    return StreamingJsonBody(parts)
+
+
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_POOL_IDLE_SECONDS = 5.0
+_DEFAULT_USER_AGENT = f"Python-urllib/{sys.version_info.major}.{sys.version_info.minor}"
+MAX_REDIRECTS = 10
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+# Only these are resent on a fresh connection when a reused one still turns out to be stale
+# (the server closed it between `acquire`'s check and the send); a POST may already have
+# reached the server.
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+def _pool_enabled() -> bool:
+    return (os.environ.get("TOC_HTTP_POOL") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _pool_maxsize() -> int:
+    try:
+        return max(1, int(os.environ.get("TOC_HTTP_POOL_MAXSIZE") or DEFAULT_POOL_MAXSIZE))
+    except ValueError:
+        return DEFAULT_POOL_MAXSIZE
+
+
+def _pool_idle_seconds() -> float:
+    try:
+        return max(0.0, float(os.environ.get("TOC_HTTP_POOL_IDLE_SECONDS") or DEFAULT_POOL_IDLE_SECONDS))
+    except ValueError:
+        return DEFAULT_POOL_IDLE_SECONDS
+
+
+def _connection_alive(conn: http.client.HTTPConnection) -> bool:
+    """False if the server closed the idle socket (EOF) or sent something unsolicited."""
+    sock = conn.sock
+    if sock is None:
+        return False
+    if isinstance(sock, ssl.SSLSocket) and sock.pending():
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable
+
+
+@dataclass
+class _HostPool:
+    slots: threading.BoundedSemaphore
+    # (connection, time.monotonic() at release), most recently released last.
+    idle: list[tuple[http.client.HTTPConnection, float]] = field(default_factory=list)
+    requests: int = 0
+    opened: int = 0
+    reused: int = 0
+
+
+class ConnectionPool:
+    """Thread-safe keep-alive connections keyed by (scheme, host, port)."""
+
+    def __init__(self, *, maxsize: int | None = None, idle_seconds: float | None = None):
+        self._maxsize = maxsize
+        self._idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._hosts: dict[tuple[str, str, int], _HostPool] = {}
+        self._ssl_context: ssl.SSLContext | None = None
+
+    def _host(self, key: tuple[str, str, int]) -> _HostPool:
+        with self._lock:
+            pool = self._hosts.get(key)
+            if pool is None:
+                size = self._maxsize or _pool_maxsize()
+                pool = _HostPool(slots=threading.BoundedSemaphore(size))
+                self._hosts[key] = pool
+            return pool
+
+    def _new_connection(self, key: tuple[str, str, int], timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def acquire(self, key: tuple[str, str, int], timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        """
+        Hand out an idle connection, or a new one. Idle connections older than the keep-alive
+        window, or already closed by the server, are discarded rather than handed out.
+        """
+        pool = self._host(key)
+        pool.slots.acquire()
+        idle_seconds = self._idle_seconds if self._idle_seconds is not None else _pool_idle_seconds()
+        conn: http.client.HTTPConnection | None = None
+        stale: list[http.client.HTTPConnection] = []
+        with self._lock:
+            pool.requests += 1
+            now = time.monotonic()
+            while pool.idle and conn is None:
+                candidate, released_at = pool.idle.pop()
+                if now - released_at <= idle_seconds and _connection_alive(candidate):
+                    conn = candidate
+                else:
+                    stale.append(candidate)
+            if conn is not None:
+                pool.reused += 1
+            else:
+                pool.opened += 1
+        for old in stale:
+            old.close()
+        if conn is None:
+            return self._new_connection(key, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def reopen(self, key: tuple[str, str, int], conn: http.client.HTTPConnection, timeout: float) -> http.client.HTTPConnection:
+        """Replace a stale reused connection (the slot stays held)."""
+        conn.close()
+        pool = self._host(key)
+        with self._lock:
+            pool.opened += 1
+        return self._new_connection(key, timeout)
+
+    def release(self, key: tuple[str, str, int], conn: http.client.HTTPConnection, *, reusable: bool) -> None:
+        pool = self._host(key)
+        if reusable and conn.sock is not None:
+            with self._lock:
+                pool.idle.append((conn, time.monotonic()))
+        else:
+            conn.close()
+        pool.slots.release()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hosts = {
+                f"{scheme}://{host}:{port}": {
+                    "requests": p.requests,
+                    "connections_opened": p.opened,
+                    "connections_reused": p.reused,
+                    "idle": len(p.idle),
+                }
+                for (scheme, host, port), p in self._hosts.items()
+            }
+        total_requests = sum(h["requests"] for h in hosts.values())
+        total_reused = sum(h["connections_reused"] for h in hosts.values())
+        return {
+            "requests": total_requests,
+            "connections_opened": sum(h["connections_opened"] for h in hosts.values()),
+            "connections_reused": total_reused,
+            "reuse_rate": (total_reused / total_requests) if total_requests else 0.0,
+            "hosts": hosts,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for pool in self._hosts.values():
+                for conn, _ in pool.idle:
+                    conn.close()
+                pool.idle.clear()
+
+
+_POOL = ConnectionPool()
+
+
+def pool_stats() -> dict[str, Any]:
+    """Request/connection counters for the shared pool (reuse_rate = reused / requests)."""
+    return _POOL.stats()
+
+
+def _pool_key(parsed: urllib.parse.SplitResult) -> tuple[str, str, int] | None:
+    scheme = parsed.scheme.lower()
+    if scheme not in {"http", "https"} or not parsed.hostname:
+        return None
+    port = parsed.port or (443 if scheme == "https" else 80)
+    return scheme, parsed.hostname, port
+
+
+def _uses_proxy(parsed: urllib.parse.SplitResult) -> bool:
+    proxies = urllib.request.getproxies()
+    if not proxies or parsed.scheme.lower() not in proxies:
+        return False
+    return not urllib.request.proxy_bypass(parsed.hostname or "")
+
+
+def _error_from_response(url: str, status: int, reason: str, body: bytes, headers: Any) -> HttpError:
+    return HttpError(
+        status=int(status or 0),
+        reason=str(reason or ""),
+        body=body.decode("utf-8", errors="replace"),
+        url=url,
+        headers=dict(headers.items()) if headers is not None else None,
+    )
+
+
+def _redirect(
+    url: str, location: str, status: int, method: str, headers: dict[str, str], body: Body
+) -> tuple[str, str, dict[str, str], Body]:
+    new_url = urllib.parse.urljoin(url, location)
+    if status in {307, 308}:
+        return new_url, method, headers, body
+    # Same as urllib: 301/302/303 are re-issued as GET without a body.
+    new_method = "HEAD" if method.upper() == "HEAD" else "GET"
+    dropped = {"content-type", "content-length"}
+    return new_url, new_method, {k: v for k, v in headers.items() if k.lower() not in dropped}, None
+
+
+@contextlib.contextmanager
+def _urllib_response(
+    *, url: str, method: str, headers: dict[str, str], body: Body, timeout_seconds: float
+) -> Iterator[Any]:
+    req = urllib.request.Request(url, data=body, method=method, headers=headers)
+    try:
+        resp = urllib.request.urlopen(req, timeout=timeout_seconds)
+    except urllib.error.HTTPError as e:
+        raise HttpError(
+            status=int(getattr(e, "code", 0) or 0),
+            reason=str(getattr(e, "reason", "") or ""),
+            body=_read_http_error_body(e),
+            url=url,
+            headers=dict(e.headers.items()) if getattr(e, "headers", None) is not None else None,
+        ) from e
+    with resp:
+        yield resp
+
+
+@contextlib.contextmanager
+def open_response(
+    *,
+    url: str,
+    method: str = "GET",
+    headers: dict[str, str] | None = None,
+    body: Body = None,
+    timeout_seconds: float = 180.0,
+) -> Iterator[Any]:
+    """
+    Open a successful (2xx) response, following redirects.
+
+    The yielded object has `.status`, `.headers` and `.read(n)`. HTTP errors raise
+    `HttpError`. A pooled connection goes back to the pool only if the body was
+    fully read. An iterable `body` must be re-iterable (it is resent on retries and
+    307/308 redirects) and needs a Content-Length header to avoid chunked encoding.
+    """
+    hdrs = dict(headers or {})
+    if not any(k.lower() == "user-agent" for k in hdrs):
+        hdrs["User-Agent"] = _DEFAULT_USER_AGENT
+    for _ in range(MAX_REDIRECTS + 1):
+        parsed = urllib.parse.urlsplit(url)
+        key = _pool_key(parsed)
+        if key is None or not _pool_enabled() or _uses_proxy(parsed):
+            with _urllib_response(url=url, method=method, headers=hdrs, body=body, timeout_seconds=timeout_seconds) as resp:
+                yield resp
+            return
+
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        conn, reused = _POOL.acquire(key, timeout_seconds)
+        reusable = False
+        try:
+            try:
+                conn.request(method, path, body=body, headers=hdrs)
+                resp = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                if not reused or method.upper() not in _IDEMPOTENT_METHODS:
+                    raise
+                # The server closed an idle keep-alive connection; retry once on a fresh one.
+                conn = _POOL.reopen(key, conn, timeout_seconds)
+                conn.request(method, path, body=body, headers=hdrs)
+                resp = conn.getresponse()
+
+            location = resp.getheader("location")
+            if resp.status in _REDIRECT_STATUSES and location:
+                resp.read()
+                reusable = not resp.will_close
+                url, method, hdrs, body = _redirect(url, location, resp.status, method, hdrs, body)
+                continue
+            if resp.status >= 400:
+                data = resp.read()
+                reusable = not resp.will_close
+                raise _error_from_response(url, resp.status, resp.reason, data, resp.headers)
+
+            yield resp
+            reusable = resp.isclosed() and not resp.will_close
+            return
+        finally:
+            _POOL.release(key, conn, reusable=reusable)
+    raise HttpError(status=0, reason="Too many redirects", body="", url=url)
+
+
 def request_bytes(
     *,
     url: str,
@@ -36,20 +514,17 @@ def request_bytes(
     json_payload: dict[str, Any] | None = None,
     timeout_seconds: float = 180.0,
 ) -> bytes:
-    body: bytes | None = None
+    body: bytes | StreamingJsonBody | None = None
+    hdrs = dict(headers or {})
     if json_payload is not None:
-        body = json.dumps(json_payload).encode("utf-8")
-    req = urllib.request.Request(url, data=body, method=method, headers=headers or {})
-    try:
-        with urllib.request.urlopen(req, timeout=timeout_seconds) as resp:
-            return resp.read()
-    except urllib.error.HTTPError as e:
-        raise HttpError(
-            status=int(getattr(e, "code", 0) or 0),
-            reason=str(getattr(e, "reason", "") or ""),
-            body=_read_http_error_body(e),
-            url=url,
-        ) from e
+        body = encode_json_body(json_payload)
+        if not any(k.lower() == "content-type" for k in hdrs):
+            hdrs["content-type"] = "application/json"
+        if isinstance(body, StreamingJsonBody):
+            hdrs = {k: v for k, v in hdrs.items() if k.lower() != "content-length"}
+            hdrs["Content-Length"] = str(len(body))
+    with open_response(url=url, method=method, headers=hdrs, body=body, timeout_seconds=timeout_seconds) as resp:
+        return resp.read()
 
 
 def request_json(
@@ -69,3 +544,103 @@ def request_json(
     )
     return json.loads(raw.decode("utf-8"))
 
+
+DOWNLOAD_CHUNK_BYTES = 1 << 20
+_RETRYABLE_DOWNLOAD_ERRORS = (OSError, http.client.HTTPException)
+
+
+def _content_range_start(value: str | None) -> int | None:
+    # "bytes 1000-1999/2000"
+    if not value or not value.strip().lower().startswith("bytes "):
+        return None
+    try:
+        return int(value.strip()[6:].split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+def stream_to_file(
+    *,
+    url: str,
+    out_path: Path,
+    headers: dict[str, str] | None = None,
+    timeout_seconds: float = 600.0,
+    expected_sha256: str | None = None,
+    attempts: int = 3,
+    chunk_bytes: int = DOWNLOAD_CHUNK_BYTES,
+) -> str:
+    """
+    Download `url` to `out_path` in chunks and return the body's sha256 (hex).
+
+    - Writes to `<out_path>.part` and renames atomically on success.
+    - On a dropped connection / 5xx, retries with `Range: bytes=<n>-` and appends when the
+      server answers 206 (restarts from zero otherwise).
+    - `expected_sha256` mismatches raise ValueError and leave `out_path` untouched.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    part = out_path.with_name(out_path.name + ".part")
+    part.unlink(missing_ok=True)
+    digest = hashlib.sha256()
+    offset = 0
+    last_error: BaseException | None = None
+
+    for attempt in range(max(1, int(attempts))):
+        req_headers = dict(headers or {})
+        if offset > 0:
+            req_headers["Range"] = f"bytes={offset}-"
+        try:
+            with open_response(url=url, method="GET", headers=req_headers, timeout_seconds=timeout_seconds) as resp:
+                status = int(getattr(resp, "status", 200) or 200)
+                if offset > 0 and (status != 206 or _content_range_start(resp.headers.get("content-range")) != offset):
+                    # Server ignored the range: start over.
+                    offset = 0
+                    digest = hashlib.sha256()
+                mode = "ab" if offset > 0 else "wb"
+                expected = resp.headers.get("content-length")
+                received = 0
+                with part.open(mode) as f:
+                    while True:
+                        chunk = resp.read(chunk_bytes)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        digest.update(chunk)
+                        offset += len(chunk)
+                        received += len(chunk)
+                # http.client returns b"" on an early close instead of raising.
+                if expected is not None and expected.isdigit() and received < int(expected):
+                    raise http.client.IncompleteRead(b"", int(expected) - received)
+            last_error = None
+            break
+        except HttpError as e:
+            if e.status == 416 and offset > 0:
+                offset = 0
+                digest = hashlib.sha256()
+                last_error = e
+                continue
+            if e.status < 500:
+                part.unlink(missing_ok=True)
+                raise
+            last_error = e
+        except _RETRYABLE_DOWNLOAD_ERRORS as e:
+            last_error = e
+            # Keep what was flushed to disk; the next attempt resumes from there.
+            offset = part.stat().st_size if part.exists() else 0
+            digest = hashlib.sha256()
+            if offset:
+                with part.open("rb") as f:
+                    for chunk in iter(lambda: f.read(chunk_bytes), b""):
+                        digest.update(chunk)
+        if attempt + 1 < attempts:
+            time.sleep(min(10.0, 1.0 * (2**attempt)))
+
+    if last_error is not None:
+        part.unlink(missing_ok=True)
+        raise last_error
+
+    hexdigest = digest.hexdigest()
+    if expected_sha256 and hexdigest.lower() != expected_sha256.strip().lower():
+        part.unlink(missing_ok=True)
+        raise ValueError(f"sha256 mismatch for {url}: expected {expected_sha256}, got {hexdigest}")
+    os.replace(part, out_path)
+    return hexdigest
@@ -0,0 +1,397 @@
+"""
+In-process still-image helpers (format normalization, reference strips, placeholders).
+
+Images are handled as `Raster` buffers (8-bit, row-major, 1/3/4 channels):
+
+- Provider bytes already in the format the output suffix names are written as-is (no
+  decode at all); that is the common case for generated stills.
+- PNG is encoded with a built-in codec (zlib), so reference strips and solid placeholder
+  stills need no subprocess. Decoding uses Pillow when installed; without it, the
+  built-in decoder covers 8-bit non-interlaced PNGs using the None/Up row filters.
+- JPEG/WebP decode/encode needs Pillow.
+- Only when none of that applies do the file helpers (`save_image_bytes`, `hstack_files`,
+  `write_solid_image`) fall back to spawning ffmpeg, matching the previous behavior.
+
+`UnsupportedImage` (a ValueError) marks "cannot do this in-process"; other ValueErrors
+(e.g. strips of different heights) are real input errors.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import struct
+import subprocess
+import tempfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+try:
+    from PIL import Image  # type: ignore
+except Exception:  # pragma: no cover - optional import fallback
+    Image = None
+
+
+class UnsupportedImage(ValueError):
+    pass
+
+
+@dataclass
+class Raster:
+    width: int
+    height: int
+    channels: int  # 1 = gray, 3 = RGB, 4 = RGBA
+    pixels: bytearray
+
+    @property
+    def stride(self) -> int:
+        return self.width * self.channels
+
+    def row(self, y: int) -> bytearray:
+        return self.pixels[y * self.stride : (y + 1) * self.stride]
+
+
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+_SUFFIX_FORMATS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".webp": "webp"}
+_PIL_FORMATS = {"jpeg": "JPEG", "webp": "WEBP"}
+_PIL_MODES = {1: "L", 3: "RGB", 4: "RGBA"}
+_NAMED_COLORS = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "gray": (128, 128, 128),
+    "red": (255, 0, 0),
+    "green": (0, 128, 0),
+    "blue": (0, 0, 255),
+}
+
+
+def sniff_format(data: bytes) -> str | None:
+    if data.startswith(_PNG_SIG):
+        return "png"
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def format_for_path(path: Path) -> str | None:
+    return _SUFFIX_FORMATS.get(path.suffix.lower())
+
+
+def png_has_alpha(f: BinaryIO) -> bool:
+    """
+    True for a PNG with transparency: gray+alpha / RGBA color types, or a palette with a
+    `tRNS` chunk before the first IDAT. Reads chunk headers from `f`, seeking past bodies.
+    """
+    if f.read(8) != _PNG_SIG:
+        return False
+    color_type: int | None = None
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            return False
+        length, kind = struct.unpack(">I4s", head)
+        if kind == b"IHDR":
+            body = f.read(length)
+            if len(body) < 10:
+                return False
+            color_type = body[9]
+            if color_type in (4, 6):
+                return True
+            if color_type != 3:
+                return False
+            f.seek(4, 1)
+        elif kind == b"tRNS":
+            return color_type == 3
+        elif kind in (b"IDAT", b"IEND"):
+            return False
+        else:
+            f.seek(length + 4, 1)
+
+
+# --- PNG codec ---
+
+
+def _add_bytes(a: bytes, b: bytes) -> bytes:
+    """Bytewise (a + b) mod 256 for equal-length buffers, as one big-int operation (SWAR)."""
+    n = len(a)
+    low = int.from_bytes(b"\x7f" * n, "big")
+    high = int.from_bytes(b"\x80" * n, "big")
+    x, y = int.from_bytes(a, "big"), int.from_bytes(b, "big")
+    return (((x & low) + (y & low)) ^ ((x ^ y) & high)).to_bytes(n, "big")
+
+
+def _unfilter(raw: bytes, width: int, height: int, bpp: int) -> bytearray:
+    """
+    Undo PNG row filters None/Up. Sub/Average/Paeth carry a per-byte dependency that is
+    too slow in pure Python; those images raise UnsupportedImage (Pillow/ffmpeg handle them).
+    """
+    stride = width * bpp
+    out = bytearray(stride * height)
+    prev = bytes(stride)
+    pos = 0
+    for y in range(height):
+        ftype = raw[pos]
+        line = raw[pos + 1 : pos + 1 + stride]
+        pos += 1 + stride
+        if ftype == 2:
+            line = _add_bytes(line, prev)
+        elif ftype != 0:
+            raise UnsupportedImage(f"PNG filter type {ftype} needs Pillow")
+        out[y * stride : (y + 1) * stride] = line
+        prev = line
+    return out
+
+
+def decode_png(data: bytes) -> Raster:
+    if not data.startswith(_PNG_SIG):
+        raise UnsupportedImage("not a PNG")
+    pos = len(_PNG_SIG)
+    header: tuple[int, ...] | None = None
+    palette = b""
+    trns = b""
+    idat: list[bytes] = []
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos : pos + 8])
+        body = data[pos + 8 : pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE":
+            palette = body
+        elif kind == b"tRNS":
+            trns = body
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+    if header is None:
+        raise ValueError("PNG without IHDR")
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or interlace:
+        raise UnsupportedImage(f"PNG bit depth {depth} / interlace {interlace}")
+    bpp = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type)
+    if bpp is None:
+        raise ValueError(f"Invalid PNG color type: {color_type}")
+    pixels = _unfilter(zlib.decompress(b"".join(idat)), width, height, bpp)
+
+    if color_type == 3:
+        channels = 4 if trns else 3
+        lut = []
+        for i in range(len(palette) // 3):
+            rgb = palette[i * 3 : i * 3 + 3]
+            lut.append(rgb + (bytes([trns[i] if i < len(trns) else 255]) if trns else b""))
+        return Raster(width, height, channels, bytearray(b"".join(lut[i] for i in pixels)))
+    if color_type == 4:  # gray + alpha -> RGBA
+        out = bytearray(width * height * 4)
+        out[0::4] = out[1::4] = out[2::4] = pixels[0::2]
+        out[3::4] = pixels[1::2]
+        return Raster(width, height, 4, out)
+    return Raster(width, height, bpp, pixels)
+
+
+def encode_png(raster: Raster, *, level: int = 6) -> bytes:
+    color_type = {1: 0, 3: 2, 4: 6}[raster.channels]
+    stride = raster.stride
+    raw = bytearray()
+    for y in range(raster.height):
+        raw.append(0)
+        raw += raster.pixels[y * stride : (y + 1) * stride]
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+    ihdr = struct.pack(">IIBBBBB", raster.width, raster.height, 8, color_type, 0, 0, 0)
+    return _PNG_SIG + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(bytes(raw), level)) + chunk(b"IEND", b"")
+
+
+# --- generic decode/encode ---
+
+
+def decode(data: bytes) -> Raster:
+    if Image is None and sniff_format(data) == "png":
+        return decode_png(data)
+    if Image is None:
+        raise UnsupportedImage(f"decoding {sniff_format(data) or 'unknown'} images needs Pillow")
+    with Image.open(io.BytesIO(data)) as im:
+        im.load()
+        if im.mode not in ("L", "RGB", "RGBA"):
+            im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+        channels = {"L": 1, "RGB": 3, "RGBA": 4}[im.mode]
+        return Raster(im.width, im.height, channels, bytearray(im.tobytes()))
+
+
+def encode(raster: Raster, fmt: str, *, quality: int = 90) -> bytes:
+    if fmt == "png":
+        return encode_png(raster)
+    if Image is None:
+        raise UnsupportedImage(f"encoding {fmt} needs Pillow")
+    im = Image.frombytes(_PIL_MODES[raster.channels], (raster.width, raster.height), bytes(raster.pixels))
+    if fmt == "jpeg" and raster.channels == 4:
+        im = im.convert("RGB")
+    buf = io.BytesIO()
+    im.save(buf, format=_PIL_FORMATS[fmt], quality=int(quality))
+    return buf.getvalue()
+
+
+def with_channels(raster: Raster, channels: int) -> Raster:
+    if raster.channels == channels:
+        return raster
+    n = raster.width * raster.height
+    src = raster.pixels
+    if raster.channels == 1:
+        rgb = bytearray(n * 3)
+        rgb[0::3] = rgb[1::3] = rgb[2::3] = src
+        raster = Raster(raster.width, raster.height, 3, rgb)
+        if channels == 3:
+            return raster
+        src = raster.pixels
+    if raster.channels == 3 and channels == 4:
+        out = bytearray(b"\xff" * (n * 4))
+        for c in range(3):
+            out[c::4] = src[c::3]
+        return Raster(raster.width, raster.height, 4, out)
+    if raster.channels == 4 and channels == 3:
+        out = bytearray(n * 3)
+        for c in range(3):
+            out[c::3] = src[c::4]
+        return Raster(raster.width, raster.height, 3, out)
+    raise ValueError(f"Unsupported channel conversion: {raster.channels} -> {channels}")
+
+
+def resize(raster: Raster, width: int, height: int) -> Raster:
+    """Resample to width x height (Pillow Lanczos when installed, else nearest neighbor)."""
+    if (width, height) == (raster.width, raster.height):
+        return raster
+    if Image is not None:
+        im = Image.frombytes(_PIL_MODES[raster.channels], (raster.width, raster.height), bytes(raster.pixels))
+        im = im.resize((width, height), Image.LANCZOS)
+        return Raster(width, height, raster.channels, bytearray(im.tobytes()))
+    ch = raster.channels
+    xs = [min(raster.width - 1, (x * raster.width) // width) * ch for x in range(width)]
+    out = bytearray(width * height * ch)
+    pos = 0
+    for y in range(height):
+        row = raster.row(min(raster.height - 1, (y * raster.height) // height))
+        if ch == 1:
+            line = bytes(row[x] for x in xs)
+        else:
+            line = b"".join(row[x : x + ch] for x in xs)
+        out[pos : pos + len(line)] = line
+        pos += len(line)
+    return Raster(width, height, ch, out)
+
+
+def hstack(rasters: list[Raster]) -> Raster:
+    if not rasters:
+        raise ValueError("hstack requires at least 1 input")
+    heights = {r.height for r in rasters}
+    if len(heights) != 1:
+        raise ValueError(f"hstack inputs must share one height (got {sorted(heights)})")
+    channels = max(3 if r.channels == 1 else r.channels for r in rasters)
+    parts = [with_channels(r, channels) for r in rasters]
+    out = bytearray()
+    for y in range(rasters[0].height):
+        for r in parts:
+            out += r.row(y)
+    return Raster(sum(r.width for r in parts), rasters[0].height, channels, out)
+
+
+def parse_color(value: str) -> tuple[int, int, int]:
+    raw = value.strip().lower()
+    if raw in _NAMED_COLORS:
+        return _NAMED_COLORS[raw]
+    for prefix in ("#", "0x"):
+        if raw.startswith(prefix):
+            raw = raw[len(prefix) :]
+            break
+    if len(raw) == 6:
+        try:
+            return int(raw[0:2], 16), int(raw[2:4], 16), int(raw[4:6], 16)
+        except ValueError:
+            pass
+    raise UnsupportedImage(f"Unsupported color: {value}")
+
+
+def solid(width: int, height: int, color: str) -> Raster:
+    return Raster(width, height, 3, bytearray(bytes(parse_color(color)) * (width * height)))
+
+
+# --- file helpers with ffmpeg fallback ---
+
+
+def _write_atomic(out_path: Path, data: bytes) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(out_path.parent), prefix=f".{out_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, out_path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_raster(raster: Raster, out_path: Path, *, quality: int = 90) -> None:
+    fmt = format_for_path(out_path)
+    if fmt is None:
+        raise UnsupportedImage(f"unknown image suffix: {out_path.suffix}")
+    _write_atomic(out_path, encode(raster, fmt, quality=quality))
+
+
+def _ffmpeg(args: list[str]) -> None:
+    subprocess.run(["ffmpeg", "-hide_banner", "-y", *args], check=True)
+
+
+def save_image_bytes(data: bytes, out_path: Path) -> None:
+    """
+    Write provider image bytes to out_path in the format its suffix names. Same-format
+    bytes are written as-is; otherwise transcoded in-process, then via ffmpeg; if ffmpeg is
+    missing too, the raw bytes are written (previous behavior).
+    """
+    src_fmt = sniff_format(data)
+    dst_fmt = format_for_path(out_path)
+    if src_fmt is not None and (src_fmt == dst_fmt or dst_fmt is None):
+        _write_atomic(out_path, data)
+        return
+    try:
+        write_raster(decode(data), out_path)
+        return
+    except UnsupportedImage:
+        pass
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{src_fmt or 'bin'}") as tmp:
+        tmp_path = Path(tmp.name)
+        tmp.write(data)
+    try:
+        _ffmpeg(["-i", str(tmp_path), "-frames:v", "1", "-update", "1", str(out_path)])
+    except FileNotFoundError:
+        out_path.write_bytes(data)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def hstack_files(inputs: list[Path], out_path: Path) -> None:
+    try:
+        write_raster(hstack([decode(p.read_bytes()) for p in inputs]), out_path)
+        return
+    except UnsupportedImage:
+        pass
+    cmd: list[str] = []
+    for p in inputs:
+        cmd += ["-i", str(p)]
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    _ffmpeg(cmd + ["-filter_complex", f"hstack=inputs={len(inputs)}", "-frames:v", "1", "-update", "1", str(out_path)])
+
+
+def write_solid_image(out_path: Path, width: int, height: int, color: str) -> None:
+    try:
+        write_raster(solid(width, height, color), out_path)
+        return
+    except UnsupportedImage:
+        pass
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    _ffmpeg(["-f", "lavfi", "-i", f"color=c={color}:s={width}x{height}:d=1", "-frames:v", "1", str(out_path)])
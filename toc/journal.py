@@ -0,0 +1,111 @@
+"""
+Durable journal of remote generation jobs (append-only JSONL, fsync per record).
+
+A record is written as soon as a provider accepts a job, before any polling:
+
+    {"ts": ..., "event": "submitted", "job": "<output path>", "provider": "kling",
+     "request_key": "<sha256 of inputs>", "operation_id": "...", "poll_ref": "..."}
+
+and closed by a later `done` / `failed` / `lost` record for the same job. On rerun, an
+unfinished `submitted` record whose request_key still matches can be re-attached to
+(poll + download) instead of paying for a new generation.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+OPEN_EVENTS = {"submitted"}
+CLOSED_EVENTS = {"done", "failed", "lost"}
+
+
+class JobJournal:
+    def __init__(self, path: Path, *, reattach: bool = True):
+        self.path = path
+        self.reattach = reattach
+        self._lock = threading.Lock()
+
+    def _append(self, record: dict[str, Any]) -> None:
+        line = json.dumps({"ts": time.time(), **record}, ensure_ascii=False, sort_keys=True) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def records(self) -> list[dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        out: list[dict[str, Any]] = []
+        with self._lock:
+            text = self.path.read_text(encoding="utf-8")
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash; everything before it is intact.
+                continue
+            if isinstance(rec, dict) and rec.get("job"):
+                out.append(rec)
+        return out
+
+    def latest(self) -> dict[str, dict[str, Any]]:
+        state: dict[str, dict[str, Any]] = {}
+        for rec in self.records():
+            state[str(rec["job"])] = rec
+        return state
+
+    def open_jobs(self) -> dict[str, dict[str, Any]]:
+        return {job: rec for job, rec in self.latest().items() if rec.get("event") in OPEN_EVENTS}
+
+    def resumable(self, job: str, request_key: str) -> dict[str, Any] | None:
+        if not self.reattach:
+            return None
+        rec = self.latest().get(job)
+        if not rec or rec.get("event") not in OPEN_EVENTS:
+            return None
+        if rec.get("request_key") != request_key:
+            return None
+        return rec
+
+    def record_submitted(
+        self,
+        *,
+        job: str,
+        provider: str,
+        request_key: str,
+        operation_id: str,
+        poll_ref: str | None = None,
+        model: str | None = None,
+    ) -> None:
+        self._append(
+            {
+                "event": "submitted",
+                "job": job,
+                "provider": provider,
+                "model": model,
+                "request_key": request_key,
+                "operation_id": operation_id,
+                "poll_ref": poll_ref or operation_id,
+            }
+        )
+
+    def record_closed(self, *, job: str, event: str, detail: str | None = None) -> None:
+        if event not in CLOSED_EVENTS:
+            raise ValueError(f"Unsupported journal event: {event}")
+        rec: dict[str, Any] = {"event": event, "job": job}
+        if detail:
+            rec["detail"] = detail
+        self._append(rec)
@@ -0,0 +1,253 @@
+"""
+Shared video_manifest.md loader.
+
+- Parses the ```yaml block once, with libyaml's `CSafeLoader` when PyYAML was built
+  with it (falls back to the pure-Python `SafeLoader`).
+- Caches the parsed document in a sidecar next to the manifest, keyed by the sha256
+  of the manifest file, so later tools in the same run load JSON instead of YAML:
+
+      <dir>/.<manifest name>.compiled.json   {"version", "sha256", "data"}
+
+  Editing the manifest changes the hash, so a stale sidecar is simply rewritten.
+  Disable with `TOC_MANIFEST_CACHE=0`. Documents that do not survive a JSON round
+  trip (e.g. YAML dates) are not cached.
+- `load_manifest` returns a typed model (`Manifest` -> `ManifestScene` -> `ManifestCut`)
+  whose `synthetic_id` matches the scene numbering used by the generators
+  (scene 10 / cut 2 -> 1002; a scene without cuts keeps its own id).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from toc.harness import extract_yaml_block
+
+try:
+    import yaml  # type: ignore
+except Exception:  # pragma: no cover - optional import fallback
+    yaml = None
+
+
+FORMAT_VERSION = 1
+
+
+def yaml_loader() -> Any:
+    if yaml is None:
+        raise RuntimeError("PyYAML is not installed.")
+    return getattr(yaml, "CSafeLoader", None) or yaml.SafeLoader
+
+
+def load_yaml(text: str) -> Any:
+    return yaml.load(text, Loader=yaml_loader())  # noqa: S506 - safe loader
+
+
+def sidecar_path(manifest_path: Path) -> Path:
+    return manifest_path.parent / f".{manifest_path.name}.compiled.json"
+
+
+def _cache_enabled() -> bool:
+    return (os.environ.get("TOC_MANIFEST_CACHE") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _read_sidecar(path: Path, digest: str) -> dict[str, Any] | None:
+    try:
+        doc = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(doc, dict) or doc.get("version") != FORMAT_VERSION or doc.get("sha256") != digest:
+        return None
+    data = doc.get("data")
+    return data if isinstance(data, dict) else None
+
+
+def _write_sidecar(path: Path, digest: str, data: dict[str, Any]) -> None:
+    try:
+        blob = json.dumps({"version": FORMAT_VERSION, "sha256": digest, "data": data}, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return
+    if json.loads(blob)["data"] != data:
+        return
+    try:
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".manifest-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+    except OSError:
+        return
+
+
+def load_manifest_data(manifest_path: Path, *, use_cache: bool = True) -> dict[str, Any]:
+    """
+    Parsed YAML block of a manifest (a fresh dict on every call, safe to mutate).
+
+    Raises ValueError when there is no ```yaml block or the root is not a mapping,
+    and RuntimeError when PyYAML is missing and no valid sidecar exists.
+    """
+    raw = manifest_path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache = sidecar_path(manifest_path) if use_cache and _cache_enabled() else None
+    if cache is not None:
+        cached = _read_sidecar(cache, digest)
+        if cached is not None:
+            return cached
+    data = load_yaml(extract_yaml_block(raw.decode("utf-8")))
+    if not isinstance(data, dict):
+        raise ValueError("Manifest YAML must be a mapping at the root.")
+    if cache is not None:
+        _write_sidecar(cache, digest, data)
+    return data
+
+
+def _opt_int(value: Any) -> int | None:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _opt_str(value: Any) -> str | None:
+    if value is None:
+        return None
+    s = str(value).strip()
+    return s or None
+
+
+def _mapping(value: Any) -> dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+@dataclass(frozen=True)
+class ManifestCut:
+    scene_id: int
+    cut_id: int | None
+    synthetic_id: int
+    timestamp: str | None
+    duration_seconds: int | None
+    image_generation: dict[str, Any] = field(default_factory=dict)
+    video_generation: dict[str, Any] = field(default_factory=dict)
+    narration: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def image_output(self) -> str | None:
+        return _opt_str(self.image_generation.get("output"))
+
+    @property
+    def video_output(self) -> str | None:
+        return _opt_str(self.video_generation.get("output"))
+
+    @property
+    def narration_output(self) -> str | None:
+        return _opt_str(self.narration.get("output"))
+
+
+@dataclass(frozen=True)
+class ManifestScene:
+    scene_id: int
+    timestamp: str | None
+    duration_seconds: int | None
+    cuts: list[ManifestCut]
+    raw: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class Manifest:
+    metadata: dict[str, Any]
+    assets: dict[str, Any]
+    scenes: list[ManifestScene]
+    data: dict[str, Any]
+
+    def iter_cuts(self) -> Iterator[ManifestCut]:
+        for scene in self.scenes:
+            yield from scene.cuts
+
+    @property
+    def resolution(self) -> tuple[int, int] | None:
+        raw = _opt_str(self.metadata.get("resolution"))
+        if not raw or "x" not in raw:
+            return None
+        w, h = raw.split("x", 1)
+        w_i, h_i = _opt_int(w), _opt_int(h)
+        return (w_i, h_i) if w_i and h_i else None
+
+
+def _cut_narration(raw: dict[str, Any]) -> dict[str, Any]:
+    narration = _mapping(raw.get("audio")).get("narration")
+    if narration is None:
+        narration = raw.get("narration")
+    return _mapping(narration)
+
+
+def compile_manifest(data: dict[str, Any]) -> Manifest:
+    scenes: list[ManifestScene] = []
+    raw_scenes = data.get("scenes") or []
+    if not isinstance(raw_scenes, list):
+        raise ValueError("Manifest YAML scenes must be a list.")
+    for raw_scene in raw_scenes:
+        if not isinstance(raw_scene, dict):
+            continue
+        scene_id = _opt_int(raw_scene.get("scene_id"))
+        if scene_id is None:
+            continue
+        timestamp = _opt_str(raw_scene.get("timestamp"))
+        scene_duration = _opt_int(raw_scene.get("duration_seconds"))
+        cuts: list[ManifestCut] = []
+        raw_cuts = raw_scene.get("cuts")
+        if isinstance(raw_cuts, list) and raw_cuts:
+            for idx, raw_cut in enumerate(raw_cuts, start=1):
+                if not isinstance(raw_cut, dict):
+                    continue
+                cut_id = _opt_int(raw_cut.get("cut_id"))
+                if cut_id is None:
+                    cut_id = idx
+                vg = _mapping(raw_cut.get("video_generation"))
+                duration = _opt_int(raw_cut.get("duration_seconds"))
+                if duration is None:
+                    duration = _opt_int(vg.get("duration_seconds"))
+                cuts.append(
+                    ManifestCut(
+                        scene_id=scene_id,
+                        cut_id=cut_id,
+                        synthetic_id=scene_id * 100 + cut_id,
+                        timestamp=_opt_str(raw_cut.get("timestamp")) or timestamp,
+                        duration_seconds=duration if duration is not None else scene_duration,
+                        image_generation=_mapping(raw_cut.get("image_generation")),
+                        video_generation=vg,
+                        narration=_cut_narration(raw_cut),
+                    )
+                )
+        else:
+            vg = _mapping(raw_scene.get("video_generation"))
+            duration = scene_duration if scene_duration is not None else _opt_int(vg.get("duration_seconds"))
+            cuts.append(
+                ManifestCut(
+                    scene_id=scene_id,
+                    cut_id=None,
+                    synthetic_id=scene_id,
+                    timestamp=timestamp,
+                    duration_seconds=duration,
+                    image_generation=_mapping(raw_scene.get("image_generation")),
+                    video_generation=vg,
+                    narration=_cut_narration(raw_scene),
+                )
+            )
+        scenes.append(
+            ManifestScene(scene_id=scene_id, timestamp=timestamp, duration_seconds=scene_duration, cuts=cuts, raw=raw_scene)
+        )
+    return Manifest(
+        metadata=_mapping(data.get("video_metadata")),
+        assets=_mapping(data.get("assets")),
+        scenes=scenes,
+        data=data,
+    )
+
+
+def load_manifest(manifest_path: Path, *, use_cache: bool = True) -> Manifest:
+    return compile_manifest(load_manifest_data(manifest_path, use_cache=use_cache))
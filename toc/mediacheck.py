@@ -0,0 +1,300 @@
+"""
+Deep media checks for `verify-pipeline.py --deep`.
+
+Per file (clips and narration):
+
+- container: MP4 top-level boxes must include `moov` and must not run past EOF
+  (truncated download); the header duration must be readable (`toc.audioinfo`).
+- decode: ffmpeg decodes the whole stream; any decoder error fails the file.
+- video: frames sampled at `SAMPLE_FPS` as small grayscale images -> black (mean luma)
+  and frozen (no frame-to-frame change) detection; decoded length must match the
+  video track's header duration.
+- audio: mono 8 kHz PCM -> RMS level for silence detection.
+
+Sample analysis uses NumPy when available (pure-Python fallback otherwise). Results
+are cached by content hash + check version under `output/.cache/mediacheck/`
+(`TOC_MEDIACHECK_CACHE_DIR`), so unchanged files are never decoded twice, and files
+are checked in a process pool (`check_media_files`).
+"""
+
+from __future__ import annotations
+
+import array
+import json
+import math
+import os
+import shutil
+import struct
+import sys
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from toc.audioinfo import read_duration, read_video_duration
+from toc.refcache import file_digest
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional import fallback
+    np = None
+
+
+CHECK_VERSION = 2
+SAMPLE_FPS = 2
+SAMPLE_WIDTH = 64
+SAMPLE_HEIGHT = 36
+AUDIO_RATE = 8000
+
+BLACK_LUMA = 16.0  # mean luma (0-255) below which a frame counts as black
+BLACK_RATIO = 0.9  # share of black frames that fails the clip
+FROZEN_DIFF = 0.5  # mean abs luma change between samples below which frames are "the same"
+SILENCE_DBFS = -50.0
+DURATION_TOLERANCE_SECONDS = 1.0
+
+VIDEO_SUFFIXES = {".mp4", ".mov", ".m4v", ".mkv", ".webm"}
+
+
+def _mp4_structure_error(path: Path) -> str | None:
+    size = path.stat().st_size
+    seen: set[bytes] = set()
+    with path.open("rb") as f:
+        pos = 0
+        while pos + 8 <= size:
+            f.seek(pos)
+            header = f.read(16)
+            box_size, kind = struct.unpack(">I", header[:4])[0], header[4:8]
+            if box_size == 1 and len(header) >= 16:
+                box_size = struct.unpack(">Q", header[8:16])[0]
+            elif box_size == 0:
+                box_size = size - pos
+            if box_size < 8:
+                return f"invalid box size at offset {pos}"
+            if pos + box_size > size:
+                return f"truncated: '{kind.decode('latin-1')}' box ends past EOF ({pos + box_size} > {size})"
+            seen.add(kind)
+            pos += box_size
+    if b"moov" not in seen:
+        return "missing moov atom"
+    return None
+
+
+def container_problems(path: Path) -> list[str]:
+    """Problems detectable without decoding."""
+    problems: list[str] = []
+    if path.stat().st_size == 0:
+        return ["empty file"]
+    with path.open("rb") as f:
+        head = f.read(12)
+    if head[4:8] == b"ftyp":
+        err = _mp4_structure_error(path)
+        if err:
+            problems.append(err)
+    if not problems and read_duration(path) is None and path.suffix.lower() in {".mp3", ".wav", ".m4a", ".mp4"}:
+        problems.append("unreadable header duration")
+    return problems
+
+
+def luma_stats(frames: bytes, *, frame_bytes: int = SAMPLE_WIDTH * SAMPLE_HEIGHT) -> tuple[list[float], list[float]]:
+    """Per-frame mean luma and mean abs difference to the previous frame (gray8 raw video)."""
+    n = len(frames) // frame_bytes
+    if n == 0:
+        return [], []
+    if np is not None:
+        arr = np.frombuffer(frames[: n * frame_bytes], dtype=np.uint8).reshape(n, frame_bytes).astype(np.float32)
+        means = arr.mean(axis=1).tolist()
+        diffs = np.abs(np.diff(arr, axis=0)).mean(axis=1).tolist() if n > 1 else []
+        return means, diffs
+    means: list[float] = []
+    diffs: list[float] = []
+    prev: bytes | None = None
+    for i in range(n):
+        cur = frames[i * frame_bytes : (i + 1) * frame_bytes]
+        means.append(sum(cur) / frame_bytes)
+        if prev is not None:
+            diffs.append(sum(abs(a - b) for a, b in zip(cur, prev)) / frame_bytes)
+        prev = cur
+    return means, diffs
+
+
+def rms_dbfs(pcm: bytes) -> float:
+    """RMS level of signed 16-bit little-endian mono PCM in dBFS (-inf for digital silence)."""
+    count = len(pcm) // 2
+    if count == 0:
+        return float("-inf")
+    if np is not None:
+        samples = np.frombuffer(pcm[: count * 2], dtype="<i2").astype(np.float64)
+        mean_sq = float(np.mean(samples * samples))
+    else:
+        samples = array.array("h", pcm[: count * 2])
+        if samples.itemsize != 2:  # pragma: no cover - exotic platforms
+            return float("nan")
+        if sys.byteorder != "little":  # pragma: no cover
+            samples.byteswap()
+        mean_sq = sum(s * s for s in samples) / count
+    if mean_sq <= 0:
+        return float("-inf")
+    return 20.0 * math.log10(math.sqrt(mean_sq) / 32768.0)
+
+
+def _decode(cmd: list[str]) -> tuple[bytes, str]:
+    res = subprocess.run(cmd, capture_output=True, check=False)
+    stderr = res.stderr.decode("utf-8", "replace").strip()
+    if res.returncode != 0 and not stderr:
+        stderr = f"ffmpeg exited with {res.returncode}"
+    return res.stdout, stderr
+
+
+def analyze_video(path: Path, *, ffmpeg: str = "ffmpeg") -> dict[str, Any]:
+    raw, err = _decode(
+        [
+            ffmpeg, "-v", "error", "-nostdin", "-i", str(path), "-map", "0:v:0",
+            "-vf", f"fps={SAMPLE_FPS},scale={SAMPLE_WIDTH}:{SAMPLE_HEIGHT},format=gray",
+            "-f", "rawvideo", "-",
+        ]
+    )  # fmt: skip
+    means, diffs = luma_stats(raw)
+    problems: list[str] = []
+    if err:
+        problems.append(f"decode error: {err.splitlines()[0]}")
+    if not means:
+        problems.append("no decodable video frames")
+    else:
+        black = sum(1 for m in means if m < BLACK_LUMA)
+        if black >= BLACK_RATIO * len(means):
+            problems.append(f"black: {black}/{len(means)} sampled frames")
+        if len(means) >= 3 and diffs and max(diffs) < FROZEN_DIFF:
+            problems.append(f"frozen: no change across {len(means)} sampled frames")
+    decoded = len(means) / SAMPLE_FPS
+    # Not `read_duration`: for MP4s with sound that is the audio track's length.
+    header = read_video_duration(path)
+    if header is not None and means and decoded + DURATION_TOLERANCE_SECONDS < header:
+        problems.append(f"duration mismatch: header {header:.2f}s, decoded {decoded:.2f}s")
+    return {
+        "problems": problems,
+        "sampled_frames": len(means),
+        "decoded_seconds": decoded,
+        "header_seconds": header,
+        "mean_luma": round(sum(means) / len(means), 2) if means else None,
+        "max_frame_diff": round(max(diffs), 3) if diffs else None,
+    }
+
+
+def analyze_audio(path: Path, *, ffmpeg: str = "ffmpeg") -> dict[str, Any]:
+    pcm, err = _decode(
+        [ffmpeg, "-v", "error", "-nostdin", "-i", str(path), "-map", "0:a:0", "-ac", "1", "-ar", str(AUDIO_RATE), "-f", "s16le", "-"]
+    )
+    problems: list[str] = []
+    if err:
+        problems.append(f"decode error: {err.splitlines()[0]}")
+    level = rms_dbfs(pcm)
+    decoded = len(pcm) / 2 / AUDIO_RATE
+    if not pcm:
+        problems.append("no decodable audio")
+    elif level < SILENCE_DBFS:
+        problems.append(f"silent: RMS {level:.1f} dBFS")
+    header = read_duration(path)
+    if header is not None and pcm and decoded + DURATION_TOLERANCE_SECONDS < header:
+        problems.append(f"duration mismatch: header {header:.2f}s, decoded {decoded:.2f}s")
+    return {
+        "problems": problems,
+        "decoded_seconds": round(decoded, 3),
+        "header_seconds": header,
+        "rms_dbfs": None if math.isinf(level) else round(level, 2),
+    }
+
+
+def check_media_file(path: Path, kind: str, *, ffmpeg: str = "ffmpeg") -> dict[str, Any]:
+    """kind: 'video' | 'audio'. Result has `status` ok | failed | skipped and `problems`."""
+    if not path.exists():
+        return {"path": str(path), "kind": kind, "status": "failed", "problems": ["missing file"]}
+    problems = container_problems(path)
+    result: dict[str, Any] = {"path": str(path), "kind": kind}
+    if not problems:
+        if shutil.which(ffmpeg) is None:
+            result.update(status="skipped", problems=[], note="ffmpeg not found (container checks only)")
+            return result
+        detail = analyze_video(path, ffmpeg=ffmpeg) if kind == "video" else analyze_audio(path, ffmpeg=ffmpeg)
+        problems = detail.pop("problems")
+        result.update(detail)
+    result.update(status="failed" if problems else "ok", problems=problems)
+    return result
+
+
+class MediaCheckCache:
+    def __init__(self, root: Path | None):
+        self.root = root
+
+    @staticmethod
+    def from_env(repo_root: Path) -> "MediaCheckCache":
+        raw = (os.environ.get("TOC_MEDIACHECK_CACHE_DIR") or "").strip()
+        if raw.lower() in {"0", "off", "false", "no"}:
+            return MediaCheckCache(None)
+        return MediaCheckCache(Path(raw).expanduser() if raw else (repo_root / "output" / ".cache" / "mediacheck"))
+
+    def _entry(self, digest: str, kind: str) -> Path | None:
+        if self.root is None:
+            return None
+        return self.root / digest[:2] / f"{digest}-{kind}-v{CHECK_VERSION}.json"
+
+    def get(self, digest: str, kind: str) -> dict[str, Any] | None:
+        entry = self._entry(digest, kind)
+        if entry is None:
+            return None
+        try:
+            data = json.loads(entry.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def put(self, digest: str, kind: str, result: dict[str, Any]) -> None:
+        entry = self._entry(digest, kind)
+        if entry is None:
+            return
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(entry.parent), prefix=".check-", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp, entry)
+        except OSError:
+            return
+
+
+def check_media_files(
+    items: list[tuple[Path, str]],
+    *,
+    cache: MediaCheckCache | None = None,
+    max_workers: int | None = None,
+    ffmpeg: str = "ffmpeg",
+) -> list[dict[str, Any]]:
+    """Check (path, kind) pairs; cached results are reused, the rest run in a process pool."""
+    results: list[dict[str, Any] | None] = [None] * len(items)
+    todo: list[tuple[int, Path, str, str | None]] = []
+    for i, (path, kind) in enumerate(items):
+        digest = file_digest(path) if path.exists() else None
+        hit = cache.get(digest, kind) if cache is not None and digest else None
+        if hit is not None:
+            results[i] = {**hit, "path": str(path), "cached": True}
+        else:
+            todo.append((i, path, kind, digest))
+
+    if todo:
+        workers = max(1, min(max_workers or (os.cpu_count() or 2), len(todo)))
+        if workers == 1:
+            computed = [check_media_file(path, kind, ffmpeg=ffmpeg) for _, path, kind, _ in todo]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                computed = list(pool.map(partial(check_media_file, ffmpeg=ffmpeg), [t[1] for t in todo], [t[2] for t in todo]))
+        for (i, _, kind, digest), result in zip(todo, computed):
+            results[i] = result
+            # Skipped results depend on the environment, not the content: don't cache them.
+            if cache is not None and digest and result.get("status") in {"ok", "failed"}:
+                cache.put(digest, kind, result)
+    return [r for r in results if r is not None]
+
+
+def media_kind(path: Path) -> str:
+    return "video" if path.suffix.lower() in VIDEO_SUFFIXES else "audio"
@@ -0,0 +1,283 @@
+"""
+Shared media metadata cache (ffprobe results), keyed by path + size + mtime.
+
+    <repo>/output/.cache/mediainfo.sqlite3     (override: TOC_MEDIAINFO_CACHE_PATH)
+
+- `MediaInfoCache.probe_many` answers every unchanged file from the cache in one query
+  and runs ffprobe only for the misses, in parallel. A file that is rewritten gets a new
+  size/mtime and is probed again; stale rows for the same path are replaced.
+- Stored per file: duration, container, video codec/resolution/fps, audio codec/sample
+  rate/channels, and (only when requested, since it reads every packet) the keyframe
+  timestamps of the first video stream.
+- `durations` reads MP3/WAV/MP4 headers in-process first (`toc.audioinfo`) and only
+  falls back to (cached) ffprobe for files it cannot parse.
+- Disable with `TOC_MEDIAINFO_CACHE=0` (every call probes). If the cache cannot be
+  opened (e.g. read-only checkout) probing still works, just uncached.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from toc.audioinfo import read_duration
+
+try:
+    import sqlite3
+except Exception:  # pragma: no cover - optional import fallback (Python built without sqlite)
+    sqlite3 = None  # type: ignore[assignment]
+
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media(
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    info TEXT NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    duration_seconds: float | None = None
+    format_name: str | None = None
+    video_codec: str | None = None
+    width: int | None = None
+    height: int | None = None
+    fps: float | None = None
+    audio_codec: str | None = None
+    sample_rate: int | None = None
+    channels: int | None = None
+    keyframes: list[float] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> "MediaInfo":
+        fields = MediaInfo.__dataclass_fields__
+        return MediaInfo(**{k: v for k, v in data.items() if k in fields})
+
+
+def _opt_float(value: Any) -> float | None:
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
+        return None
+    return f if f == f else None  # drop NaN
+
+
+def _opt_int(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate(value: Any) -> float | None:
+    raw = str(value or "")
+    if "/" in raw:
+        num, den = raw.split("/", 1)
+        n, d = _opt_float(num), _opt_float(den)
+        return round(n / d, 6) if n is not None and d else None
+    return _opt_float(raw)
+
+
+def parse_ffprobe_json(doc: dict[str, Any], *, keyframes: list[float] | None = None) -> MediaInfo:
+    """MediaInfo from `ffprobe -print_format json -show_format -show_streams` output."""
+    fmt = doc.get("format") if isinstance(doc.get("format"), dict) else {}
+    streams = [s for s in doc.get("streams") or [] if isinstance(s, dict)]
+    video = next((s for s in streams if s.get("codec_type") == "video" and not (s.get("disposition") or {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    duration = _opt_float(fmt.get("duration"))
+    if duration is None:
+        duration = next((d for d in (_opt_float(s.get("duration")) for s in streams) if d is not None), None)
+    return MediaInfo(
+        duration_seconds=duration,
+        format_name=fmt.get("format_name"),
+        video_codec=video.get("codec_name") if video else None,
+        width=_opt_int(video.get("width")) if video else None,
+        height=_opt_int(video.get("height")) if video else None,
+        fps=(_rate(video.get("avg_frame_rate")) or _rate(video.get("r_frame_rate"))) if video else None,
+        audio_codec=audio.get("codec_name") if audio else None,
+        sample_rate=_opt_int(audio.get("sample_rate")) if audio else None,
+        channels=_opt_int(audio.get("channels")) if audio else None,
+        keyframes=keyframes,
+    )
+
+
+def ffprobe_available() -> bool:
+    return shutil.which("ffprobe") is not None
+
+
+def run_ffprobe(path: Path, *, keyframes: bool = False, ffprobe: str = "ffprobe") -> MediaInfo:
+    """Probe one file. Raises FileNotFoundError (no ffprobe) or RuntimeError (probe failed)."""
+    cmd = [ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", str(path)]
+    res = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    if res.returncode != 0:
+        raise RuntimeError((res.stderr or "").strip() or f"ffprobe failed for: {path}")
+    try:
+        doc = json.loads(res.stdout or "{}")
+    except ValueError as e:
+        raise RuntimeError(f"ffprobe returned invalid JSON for: {path}") from e
+    frames: list[float] | None = None
+    if keyframes:
+        kf = subprocess.run(
+            [
+                ffprobe,
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,flags",
+                "-of",
+                "csv=p=0",
+                str(path),
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if kf.returncode == 0:
+            frames = []
+            for line in kf.stdout.splitlines():
+                pts, _, flags = line.partition(",")
+                t = _opt_float(pts)
+                if t is not None and "K" in flags:
+                    frames.append(t)
+    return parse_ffprobe_json(doc if isinstance(doc, dict) else {}, keyframes=frames)
+
+
+def _cache_enabled() -> bool:
+    return (os.environ.get("TOC_MEDIAINFO_CACHE") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+class MediaInfoCache:
+    def __init__(self, db_path: Path | None, *, max_workers: int | None = None):
+        self.db_path = db_path if sqlite3 is not None else None
+        self.max_workers = max_workers or min(8, os.cpu_count() or 2)
+
+    @staticmethod
+    def from_env(repo_root: Path) -> "MediaInfoCache":
+        if not _cache_enabled():
+            return MediaInfoCache(None)
+        raw = (os.environ.get("TOC_MEDIAINFO_CACHE_PATH") or "").strip()
+        path = Path(raw).expanduser() if raw else (repo_root / "output" / ".cache" / "mediainfo.sqlite3")
+        return MediaInfoCache(path)
+
+    def _connect(self) -> "sqlite3.Connection | None":
+        if self.db_path is None:
+            return None
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS media")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+            return conn
+        except (OSError, sqlite3.Error):
+            return None
+
+    def probe_many(
+        self, paths: Iterable[Path], *, keyframes: bool = False, ffprobe: str = "ffprobe"
+    ) -> dict[Path, MediaInfo | None]:
+        """
+        MediaInfo per existing path (None when ffprobe fails on it). Missing files are
+        omitted. Raises FileNotFoundError when ffprobe is needed but not installed.
+        """
+        stats: dict[Path, tuple[str, int, int]] = {}
+        for p in dict.fromkeys(paths):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            stats[p] = (str(p.resolve()), st.st_size, st.st_mtime_ns)
+
+        out: dict[Path, MediaInfo | None] = {}
+        conn = self._connect()
+        try:
+            if conn is not None and stats:
+                keys = [s[0] for s in stats.values()]
+                rows: dict[str, tuple[int, int, str]] = {}
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i : i + 500]
+                    marks = ",".join("?" * len(chunk))
+                    for path, size, mtime_ns, info in conn.execute(
+                        f"SELECT path, size, mtime_ns, info FROM media WHERE path IN ({marks})", chunk
+                    ):
+                        rows[path] = (size, mtime_ns, info)
+                for p, (key, size, mtime_ns) in stats.items():
+                    row = rows.get(key)
+                    if row is None or row[:2] != (size, mtime_ns):
+                        continue
+                    info = MediaInfo.from_dict(json.loads(row[2]))
+                    if keyframes and info.keyframes is None:
+                        continue
+                    out[p] = info
+
+            misses = [p for p in stats if p not in out]
+            if misses:
+                if shutil.which(ffprobe) is None:
+                    raise FileNotFoundError("ffprobe not found. Please install ffmpeg (ffprobe).")
+
+                def probe_one(p: Path) -> MediaInfo | None:
+                    try:
+                        return run_ffprobe(p, keyframes=keyframes, ffprobe=ffprobe)
+                    except RuntimeError:
+                        return None
+
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(misses))) as pool:
+                    probed = list(pool.map(probe_one, misses))
+                fresh = []
+                for p, info in zip(misses, probed):
+                    out[p] = info
+                    if info is not None:
+                        key, size, mtime_ns = stats[p]
+                        fresh.append((key, size, mtime_ns, json.dumps(info.to_dict())))
+                if conn is not None and fresh:
+                    try:
+                        conn.executemany("INSERT OR REPLACE INTO media(path, size, mtime_ns, info) VALUES(?, ?, ?, ?)", fresh)
+                    except sqlite3.Error:
+                        pass
+        finally:
+            if conn is not None:
+                conn.close()
+        return out
+
+    def probe(self, path: Path, *, keyframes: bool = False) -> MediaInfo | None:
+        return self.probe_many([path], keyframes=keyframes).get(path)
+
+    def durations(self, paths: Iterable[Path], *, ffprobe: str = "ffprobe") -> dict[Path, float | None]:
+        """
+        Durations per existing path. MP3/WAV/MP4 headers are read in-process
+        (`toc.audioinfo`); only unrecognized files go through the cached ffprobe path.
+        """
+        out: dict[Path, float | None] = {}
+        rest: list[Path] = []
+        for p in dict.fromkeys(paths):
+            if not p.exists():
+                continue
+            native = read_duration(p)
+            if native is not None:
+                out[p] = native
+            else:
+                rest.append(p)
+        if rest:
+            for p, info in self.probe_many(rest, ffprobe=ffprobe).items():
+                out[p] = info.duration_seconds if info is not None else None
+        return out
+
+    def duration(self, path: Path) -> float | None:
+        return self.durations([path]).get(path)
@@ -0,0 +1,461 @@
+"""
+Local stand-in for the provider APIs used by `toc/providers/`.
+
+`MockProviderServer` answers the same endpoints our clients call, under one local
+base URL per provider (see `MockProviderServer.env()`):
+
+    Gemini      POST /gemini/v1beta/models/{model}:generateContent
+                POST /gemini/v1beta/models/{model}:predictLongRunning
+                GET  /gemini/v1beta/operations/{id}
+                POST /upload/gemini/v1beta/files                (Files API, resumable start + finalize)
+                POST /gemini/v1beta/models/{model}:batchGenerateContent
+                GET  /gemini/v1beta/batches/{id}
+    Kling       POST /kling/v1/videos/{image2video|text2video}
+                GET  /kling/v1/videos/{image2video|text2video}/{id}
+    Ark         POST /ark/api/v3/images/generations             (SeaDream)
+                POST /ark/api/v3/contents/generations/tasks     (Seedance)
+                GET  /ark/api/v3/contents/generations/tasks/{id}
+    EvoLink     POST /evolink-files/api/v1/files/upload/base64
+                POST /evolink/v1/videos/generations
+                GET  /evolink/v1/tasks/{id}
+    ElevenLabs  POST /elevenlabs/v1/text-to-speech/{voice_id}
+    media       GET  /media/{id}.{png|mp4|mp3}   (Range supported)
+
+Behavior is controlled by `MockBehavior`: a latency distribution per API request,
+a random 5xx error rate, deterministic 429 bursts and an optional per-provider RPM
+cap (both 429s carry Retry-After), and how long async jobs stay "running". Media are
+tiny synthetic payloads (a valid 1x1 PNG, silent MPEG audio frames, an mp4 header
+padded to `video_bytes`), so runs are cheap but downloads still move real bytes.
+"""
+
+from __future__ import annotations
+
+import base64
+import itertools
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+def _png_1x1() -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    ihdr = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    idat = zlib.compress(b"\x00\x80\x80\x80")
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", idat) + chunk(b"IEND", b"")
+
+
+PNG_BYTES = _png_1x1()
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding: 417-byte frames of silence (~26 ms each).
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+@dataclass(frozen=True)
+class Latency:
+    """Per-request latency in milliseconds: fixed:<ms> | uniform:<lo>,<hi> | lognormal:<median>,<sigma>."""
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @staticmethod
+    def parse(spec: str) -> "Latency":
+        kind, _, rest = spec.strip().partition(":")
+        nums = [float(x) for x in rest.split(",") if x.strip()] if rest else []
+        kind = kind.strip().lower()
+        if kind == "fixed" and len(nums) == 1:
+            return Latency("fixed", nums[0])
+        if kind == "uniform" and len(nums) == 2:
+            return Latency("uniform", nums[0], nums[1])
+        if kind == "lognormal" and len(nums) == 2:
+            return Latency("lognormal", nums[0], nums[1])
+        raise ValueError(f"Invalid latency spec: {spec} (fixed:<ms> | uniform:<lo>,<hi> | lognormal:<median>,<sigma>)")
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == "lognormal":
+            ms = rng.lognormvariate(0.0, self.b) * self.a if self.a > 0 else 0.0
+        else:
+            ms = self.a
+        return max(0.0, ms) / 1000.0
+
+
+@dataclass(frozen=True)
+class MockBehavior:
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    # The last `burst_length` of every `burst_every` API requests get 429 (0 disables).
+    burst_every: int = 0
+    burst_length: int = 0
+    # Sliding one-minute cap per provider (0 disables).
+    rpm: int = 0
+    retry_after_seconds: float = 1.0
+    job_seconds: float = 0.0
+    video_bytes: int = 64 * 1024
+    audio_frames: int = 40
+    seed: int | None = None
+
+
+class _State:
+    def __init__(self, behavior: MockBehavior):
+        self.behavior = behavior
+        self.rng = random.Random(behavior.seed)
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.request_count = 0
+        self.jobs: dict[str, float] = {}
+        self.batch_keys: dict[str, list[str]] = {}
+        self.windows: dict[str, deque[float]] = defaultdict(deque)
+        self.stats: dict[str, int] = defaultdict(int)
+
+    def new_job(self, prefix: str) -> str:
+        with self.lock:
+            job_id = f"{prefix}-{next(self.ids)}"
+            self.jobs[job_id] = time.monotonic()
+        return job_id
+
+    def job_state(self, job_id: str) -> str | None:
+        with self.lock:
+            started = self.jobs.get(job_id)
+        if started is None:
+            return None
+        return "done" if time.monotonic() - started >= self.behavior.job_seconds else "running"
+
+    def admit(self, provider: str) -> int | None:
+        """Apply injected latency/failures. Returns an error status, or None to serve normally."""
+        b = self.behavior
+        with self.lock:
+            delay = b.latency.sample_seconds(self.rng)
+            roll = self.rng.random()
+            n = self.request_count
+            self.request_count += 1
+        if delay:
+            time.sleep(delay)
+        status: int | None = None
+        if b.burst_every > 0 and n % b.burst_every >= b.burst_every - b.burst_length:
+            status = 429
+        elif b.rpm > 0:
+            now = time.monotonic()
+            with self.lock:
+                window = self.windows[provider]
+                while window and now - window[0] > 60.0:
+                    window.popleft()
+                if len(window) >= b.rpm:
+                    status = 429
+                else:
+                    window.append(now)
+        if status is None and roll < b.error_rate:
+            status = 503
+        with self.lock:
+            self.stats[f"{provider}.requests"] += 1
+            if status is not None:
+                self.stats[f"{provider}.{status}"] += 1
+        return status
+
+
+_GEMINI_CALL = re.compile(r"^/gemini/v1beta/models/[^/:]+:(generateContent|predictLongRunning|batchGenerateContent)$")
+_GEMINI_OP = re.compile(r"^/gemini/v1beta/operations/([^/]+)$")
+_GEMINI_BATCH = re.compile(r"^/gemini/v1beta/batches/([^/]+)$")
+_KLING = re.compile(r"^/kling/v1/videos/(image2video|text2video)(?:/([^/]+))?$")
+_ARK_TASK = re.compile(r"^/ark/api/v3/contents/generations/tasks(?:/([^/]+))?$")
+_EVOLINK_TASK = re.compile(r"^/evolink/v1/tasks/([^/]+)$")
+_ELEVENLABS = re.compile(r"^/elevenlabs/v1/text-to-speech/[^/]+$")
+_MEDIA = re.compile(r"^/media/([^/]+)\.(png|mp4|mp3)$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return
+
+    @property
+    def state(self) -> _State:
+        return self.server.state
+
+    def _base(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, obj: Any, status: int = 200) -> None:
+        self._send(status, json.dumps(obj).encode("utf-8"), {"Content-Type": "application/json"})
+
+    def _read_json(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            data = json.loads(raw.decode("utf-8")) if raw else {}
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _admit(self, provider: str) -> bool:
+        status = self.state.admit(provider)
+        if status is None:
+            return True
+        retry_after = f"{self.state.behavior.retry_after_seconds:g}"
+        message = "rate limited" if status == 429 else "injected failure"
+        self._send(status, json.dumps({"error": {"code": status, "message": message}}).encode("utf-8"), {"Retry-After": retry_after})
+        return False
+
+    def _gemini_image_response(self) -> dict[str, Any]:
+        b64 = base64.b64encode(PNG_BYTES).decode("ascii")
+        return {"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": b64}}]}}]}
+
+    def _media_url(self, job_id: str, ext: str) -> str:
+        return f"{self._base()}/media/{job_id}.{ext}"
+
+    def _media(self, ext: str) -> bytes:
+        b = self.state.behavior
+        if ext == "png":
+            return PNG_BYTES
+        if ext == "mp3":
+            return MP3_FRAME * max(1, b.audio_frames)
+        header = b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2"
+        return header + b"\x00" * max(0, b.video_bytes - len(header))
+
+    def _send_media(self, ext: str) -> None:
+        body = self._media(ext)
+        ctype = {"png": "image/png", "mp3": "audio/mpeg", "mp4": "video/mp4"}[ext]
+        rng = self.headers.get("Range") or ""
+        m = re.match(r"bytes=(\d+)-$", rng.strip())
+        if m and int(m.group(1)) < len(body):
+            start = int(m.group(1))
+            self._send(
+                206,
+                body[start:],
+                {"Content-Type": ctype, "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"},
+            )
+            return
+        self._send(200, body, {"Content-Type": ctype})
+
+    def do_GET(self) -> None:  # noqa: N802
+        path = self.path.split("?", 1)[0]
+        if m := _MEDIA.match(path):
+            self._send_media(m.group(2))
+            return
+        if m := _GEMINI_OP.match(path):
+            if not self._admit("gemini"):
+                return
+            state = self.state.job_state(m.group(1))
+            if state is None:
+                self._json({"error": {"code": 404, "message": "operation not found"}}, 404)
+            elif state == "running":
+                self._json({"name": f"operations/{m.group(1)}", "done": False})
+            else:
+                uri = self._media_url(m.group(1), "mp4")
+                self._json(
+                    {
+                        "name": f"operations/{m.group(1)}",
+                        "done": True,
+                        "response": {"generateVideoResponse": {"generatedSamples": [{"video": {"uri": uri}}]}},
+                    }
+                )
+            return
+        if m := _GEMINI_BATCH.match(path):
+            if not self._admit("gemini"):
+                return
+            state = self.state.job_state(m.group(1))
+            if state is None:
+                self._json({"error": {"code": 404, "message": "batch not found"}}, 404)
+            elif state == "running":
+                self._json({"name": f"batches/{m.group(1)}", "metadata": {"state": "BATCH_STATE_RUNNING"}, "done": False})
+            else:
+                with self.state.lock:
+                    keys = list(self.state.batch_keys.get(m.group(1), []))
+                responses = [
+                    {"response": self._gemini_image_response(), "metadata": {"key": key}} for key in keys
+                ]
+                output = {"inlinedResponses": {"inlinedResponses": responses}}
+                self._json(
+                    {
+                        "name": f"batches/{m.group(1)}",
+                        "metadata": {"state": "BATCH_STATE_SUCCEEDED", "output": output},
+                        "done": True,
+                        "response": output,
+                    }
+                )
+            return
+        if (m := _KLING.match(path)) and m.group(2):
+            if not self._admit("kling"):
+                return
+            state = self.state.job_state(m.group(2))
+            if state is None:
+                self._json({"code": 1201, "message": "task not found"}, 404)
+                return
+            data: dict[str, Any] = {"task_id": m.group(2), "task_status": "processing" if state == "running" else "succeed"}
+            if state == "done":
+                data["task_result"] = {"videos": [{"url": self._media_url(m.group(2), "mp4")}]}
+            self._json({"code": 0, "data": data})
+            return
+        if (m := _ARK_TASK.match(path)) and m.group(1):
+            if not self._admit("seedance"):
+                return
+            state = self.state.job_state(m.group(1))
+            if state is None:
+                self._json({"error": {"code": "NotFound"}}, 404)
+            elif state == "running":
+                self._json({"id": m.group(1), "status": "running"})
+            else:
+                self._json({"id": m.group(1), "status": "succeeded", "content": {"video_url": self._media_url(m.group(1), "mp4")}})
+            return
+        if m := _EVOLINK_TASK.match(path):
+            if not self._admit("evolink"):
+                return
+            state = self.state.job_state(m.group(1))
+            if state is None:
+                self._json({"error": "task not found"}, 404)
+            elif state == "running":
+                self._json({"id": m.group(1), "status": "processing"})
+            else:
+                self._json({"id": m.group(1), "status": "completed", "results": [self._media_url(m.group(1), "mp4")]})
+            return
+        self._json({"error": f"unknown route: GET {path}"}, 404)
+
+    def do_POST(self) -> None:  # noqa: N802
+        path, _, query = self.path.partition("?")
+        body = self._read_json()
+        if path == "/upload/gemini/v1beta/files":
+            if not self._admit("gemini"):
+                return
+            if self.headers.get("X-Goog-Upload-Command") == "start":
+                upload_url = f"{self._base()}{path}?upload_id={self.state.new_job('upload')}"
+                self._send(200, b"", {"X-Goog-Upload-URL": upload_url})
+            else:
+                upload_id = query.partition("upload_id=")[2] or "missing"
+                file_name = f"files/{upload_id}"
+                self._json({"file": {"name": file_name, "uri": f"{self._base()}/gemini/v1beta/{file_name}", "state": "ACTIVE"}})
+            return
+        if m := _GEMINI_CALL.match(path):
+            if not self._admit("gemini"):
+                return
+            if m.group(1) == "generateContent":
+                self._json(self._gemini_image_response())
+            elif m.group(1) == "batchGenerateContent":
+                batch_id = self.state.new_job("batch")
+                items = (((body.get("batch") or {}).get("input_config") or {}).get("requests") or {}).get("requests") or []
+                with self.state.lock:
+                    self.state.batch_keys[batch_id] = [str((i.get("metadata") or {}).get("key")) for i in items]
+                self._json({"name": f"batches/{batch_id}", "metadata": {"state": "BATCH_STATE_PENDING"}})
+            else:
+                self._json({"name": f"operations/{self.state.new_job('op')}", "done": False})
+            return
+        if (m := _KLING.match(path)) and not m.group(2):
+            if not self._admit("kling"):
+                return
+            self._json({"code": 0, "data": {"task_id": self.state.new_job("kling"), "task_status": "submitted"}})
+            return
+        if path == "/ark/api/v3/images/generations":
+            if not self._admit("seadream"):
+                return
+            self._json({"data": [{"b64_json": base64.b64encode(PNG_BYTES).decode("ascii")}]})
+            return
+        if _ARK_TASK.match(path):
+            if not self._admit("seedance"):
+                return
+            self._json({"id": self.state.new_job("cgt")})
+            return
+        if path == "/evolink-files/api/v1/files/upload/base64":
+            if not self._admit("evolink"):
+                return
+            self._json({"file_url": self._media_url(self.state.new_job("file"), "png")})
+            return
+        if path == "/evolink/v1/videos/generations":
+            if not self._admit("evolink"):
+                return
+            self._json({"task_id": self.state.new_job("evo")})
+            return
+        if _ELEVENLABS.match(path):
+            if not self._admit("elevenlabs"):
+                return
+            self._send(200, self._media("mp3"), {"Content-Type": "audio/mpeg"})
+            return
+        self._json({"error": f"unknown route: POST {path}"}, 404)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    state: _State
+
+
+class MockProviderServer:
+    def __init__(self, behavior: MockBehavior | None = None, *, host: str = "127.0.0.1", port: int = 0):
+        self._server = _Server((host, port), _Handler)
+        self._server.state = _State(behavior or MockBehavior())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockProviderServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="mock-providers", daemon=True)
+            self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockProviderServer":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def stats(self) -> dict[str, int]:
+        state = self._server.state
+        with state.lock:
+            return dict(state.stats)
+
+    def env(self) -> dict[str, str]:
+        """Environment that points every provider client at this server (with dummy keys)."""
+        return self.env_for(self.base_url)
+
+    @staticmethod
+    def env_for(base: str) -> dict[str, str]:
+        return {
+            "GEMINI_API_KEY": "mock",
+            "GEMINI_API_BASE": f"{base}/gemini/v1beta",
+            "KLING_API_KEY": "mock",
+            "KLING_ACCESS_KEY": "",
+            "KLING_SECRET_KEY": "",
+            "KLING_API_BASE": f"{base}/kling",
+            "ARK_API_KEY": "mock",
+            "ARK_API_BASE": f"{base}/ark/api/v3",
+            "SEADREAM_API_KEY": "mock",
+            "SEADREAM_API_BASE": f"{base}/ark/api/v3",
+            "EVOLINK_API_KEY": "mock",
+            "EVOLINK_API_BASE": f"{base}/evolink",
+            "EVOLINK_FILES_API_BASE": f"{base}/evolink-files",
+            "ELEVENLABS_API_KEY": "mock",
+            "ELEVENLABS_VOICE_ID": "mock-voice",
+            "ELEVENLABS_API_BASE": f"{base}/elevenlabs/v1",
+        }
@@ -0,0 +1,109 @@
+"""
+Shared asyncio poller for long-running provider jobs.
+
+One background event loop multiplexes every outstanding operation/task. Each job
+has its own backoff schedule (interval grows by `backoff` up to `max_interval_seconds`,
+with +/- `jitter` randomization) and resolves a `concurrent.futures.Future`, so
+callers can block on `.result()` or attach `add_done_callback` to start downloads
+as soon as a job finishes.
+
+The HTTP layer is blocking (urllib), so each status fetch runs on a small thread
+pool; waiting between fetches costs no thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import concurrent.futures
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class PollJob:
+    label: str
+    fetch: Callable[[], dict[str, Any]]
+    is_finished: Callable[[dict[str, Any]], bool]
+    poll_every_seconds: float = 5.0
+    timeout_seconds: float = 900.0
+    backoff: float = 1.5
+    max_interval_seconds: float | None = None
+    jitter: float = 0.2
+
+
+def next_interval(job: PollJob, current: float) -> float:
+    cap = job.max_interval_seconds if job.max_interval_seconds is not None else max(job.poll_every_seconds, 30.0)
+    return min(cap, current * max(1.0, float(job.backoff)))
+
+
+def jittered(interval: float, jitter: float) -> float:
+    if jitter <= 0:
+        return interval
+    return max(0.05, interval * random.uniform(1.0 - jitter, 1.0 + jitter))
+
+
+class AsyncPoller:
+    def __init__(self, *, max_fetch_workers: int = 8):
+        self._fetch_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, int(max_fetch_workers)),
+            thread_name_prefix="toc-poll",
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="toc-poller", daemon=True)
+        self._thread.start()
+        self._closed = False
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _poll(self, job: PollJob) -> dict[str, Any]:
+        deadline = time.monotonic() + float(job.timeout_seconds)
+        interval = max(0.0, float(job.poll_every_seconds))
+        while True:
+            result = await self._loop.run_in_executor(self._fetch_pool, job.fetch)
+            if job.is_finished(result):
+                return result
+            now = time.monotonic()
+            if now > deadline:
+                raise TimeoutError(f"Timed out waiting for {job.label}")
+            await asyncio.sleep(min(jittered(interval, job.jitter), max(0.0, deadline - now) + 0.01))
+            interval = next_interval(job, interval)
+
+    def submit(
+        self,
+        job: PollJob,
+        *,
+        on_done: Callable[[concurrent.futures.Future[dict[str, Any]]], Any] | None = None,
+    ) -> concurrent.futures.Future[dict[str, Any]]:
+        if self._closed:
+            raise RuntimeError("AsyncPoller is shut down")
+        future = asyncio.run_coroutine_threadsafe(self._poll(job), self._loop)
+        if on_done is not None:
+            future.add_done_callback(on_done)
+        return future
+
+    def shutdown(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5.0)
+        self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+
+
+_SHARED: AsyncPoller | None = None
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_poller() -> AsyncPoller:
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = AsyncPoller()
+            atexit.register(_SHARED.shutdown)
+        return _SHARED
@@ -6,6 +6,7 @@ from dataclasses import dataclass
 from typing import Any
 
 from toc.http import request_bytes
+from toc.ratelimit import call_with_rate_limit
 
 DEFAULT_ELEVENLABS_VOICE_ID = "JOcmGzB8OFjY8MhjHHEf"  # Jun - Calm, Clear and Husky (ja)
 
@@ -90,10 +91,14 @@ class ElevenLabsClient:
         if voice_settings is not None:
             payload["voice_settings"] = voice_settings
 
-        return request_bytes(
-            url=url,
-            method="POST",
-            headers=self._headers(),
-            json_payload=payload,
-            timeout_seconds=timeout_seconds,
+        return call_with_rate_limit(
+            "elevenlabs",
+            m_id,
+            lambda: request_bytes(
+                url=url,
+                method="POST",
+                headers=self._headers(),
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
         )
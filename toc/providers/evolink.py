@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-import base64
+import concurrent.futures
 import os
-import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from toc.http import request_bytes, request_json
+from toc.http import inline_file_base64, request_json, stream_to_file
+from toc.poller import PollJob, shared_poller
+from toc.ratelimit import call_with_rate_limit
+from toc.refcache import shared_upload_cache
+from toc.refprep import prepare_reference
 
 
 def _env(name: str, default: str | None = None) -> str | None:
@@ -90,15 +93,28 @@ class EvoLinkClient:
         return f"{self.config.files_api_base.rstrip('/')}/{path_or_url}"
 
     def upload_image_base64(self, *, path: Path, timeout_seconds: float = 180.0) -> str:
+        """Upload once per file content (per files API); repeated calls reuse the cached file_url."""
+        path = prepare_reference(path, "evolink")
+        return shared_upload_cache().get_or_upload(
+            f"evolink:{self.config.files_api_base.rstrip('/')}",
+            path,
+            lambda: self._upload_image_base64(path=path, timeout_seconds=timeout_seconds),
+        )
+
+    def _upload_image_base64(self, *, path: Path, timeout_seconds: float) -> str:
         mime = _guess_mime(path)
-        data_url = f"data:{mime};base64," + base64.b64encode(path.read_bytes()).decode("ascii")
+        data_url = inline_file_base64(path, prefix=f"data:{mime};base64,")
         payload = {"content_type": mime, "file_name": path.name, "base64": data_url}
-        resp = request_json(
-            url=self._resolve_files_url(self.config.file_upload_base64_path),
-            method="POST",
-            headers={"content-type": "application/json", **self._headers()},
-            json_payload=payload,
-            timeout_seconds=timeout_seconds,
+        resp = call_with_rate_limit(
+            "evolink",
+            "files",
+            lambda: request_json(
+                url=self._resolve_files_url(self.config.file_upload_base64_path),
+                method="POST",
+                headers={"content-type": "application/json", **self._headers()},
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
         )
         file_url = resp.get("file_url") or resp.get("url") or resp.get("data", {}).get("file_url")
         if not isinstance(file_url, str) or not file_url.strip():
@@ -106,18 +122,45 @@ class EvoLinkClient:
         return file_url.strip()
 
     def submit_video_task(self, *, payload: dict[str, Any], timeout_seconds: float = 180.0) -> dict[str, Any]:
-        return request_json(
-            url=self._resolve_api_url(self.config.video_submit_path),
-            method="POST",
-            headers={"content-type": "application/json", **self._headers()},
-            json_payload=payload,
-            timeout_seconds=timeout_seconds,
+        return call_with_rate_limit(
+            "evolink",
+            str(payload.get("model") or "") or None,
+            lambda: request_json(
+                url=self._resolve_api_url(self.config.video_submit_path),
+                method="POST",
+                headers={"content-type": "application/json", **self._headers()},
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
         )
 
     def get_task(self, *, task_id: str, timeout_seconds: float = 180.0) -> dict[str, Any]:
         url = self._resolve_api_url(self.config.task_status_path_template.format(task_id=task_id))
         return request_json(url=url, method="GET", headers=self._headers(), timeout_seconds=timeout_seconds)
 
+    def watch_task(
+        self,
+        *,
+        task_id: str,
+        poll_every_seconds: float = 5.0,
+        timeout_seconds: float = 900.0,
+    ) -> concurrent.futures.Future[dict[str, Any]]:
+        """Poll on the shared poller; the future resolves with the finished (or failed) task."""
+
+        def is_finished(task: dict[str, Any]) -> bool:
+            status = (task.get("status") or "").strip().lower()
+            return status in {"completed", "succeeded", "success", "done", "failed", "error", "canceled", "cancelled", "rejected"}
+
+        return shared_poller().submit(
+            PollJob(
+                label=f"EvoLink task: {task_id}",
+                fetch=lambda: self.get_task(task_id=task_id, timeout_seconds=180.0),
+                is_finished=is_finished,
+                poll_every_seconds=float(poll_every_seconds),
+                timeout_seconds=float(timeout_seconds),
+            )
+        )
+
     def poll_task(
         self,
         *,
@@ -125,17 +168,11 @@ class EvoLinkClient:
         poll_every_seconds: float = 5.0,
         timeout_seconds: float = 900.0,
     ) -> dict[str, Any]:
-        deadline = time.time() + float(timeout_seconds)
-        while True:
-            task = self.get_task(task_id=task_id, timeout_seconds=180.0)
-            status = (task.get("status") or "").strip().lower()
-            if status in {"completed", "succeeded", "success", "done"}:
-                return task
-            if status in {"failed", "error", "canceled", "cancelled", "rejected"}:
-                return task
-            if time.time() > deadline:
-                raise TimeoutError(f"Timed out waiting for EvoLink task: {task_id}")
-            time.sleep(float(poll_every_seconds))
+        return self.watch_task(
+            task_id=task_id,
+            poll_every_seconds=poll_every_seconds,
+            timeout_seconds=timeout_seconds,
+        ).result()
 
     def extract_task_id(self, submit_response: dict[str, Any]) -> str:
         task_id = submit_response.get("task_id") or submit_response.get("id") or submit_response.get("data", {}).get("task_id")
@@ -156,7 +193,5 @@ class EvoLinkClient:
         raise ValueError("EvoLink task missing results[0] URL")
 
     def download_to_file(self, *, url: str, out_path: Path, timeout_seconds: float = 600.0) -> None:
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        data = request_bytes(url=url, method="GET", headers=None, timeout_seconds=timeout_seconds)
-        out_path.write_bytes(data)
+        stream_to_file(url=url, out_path=out_path, headers=None, timeout_seconds=timeout_seconds)
 
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
 import base64
+import concurrent.futures
+import hashlib
+import json
 import os
-import time
+import re
+import tempfile
+import urllib.parse
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
-from toc.http import request_bytes, request_json
+from toc.http import FileBody, inline_file_base64, open_response, request_bytes, request_json, stream_to_file
+from toc.poller import PollJob, shared_poller
+from toc.ratelimit import call_with_rate_limit
+from toc.refcache import shared_upload_cache
+from toc.refprep import prepare_reference
 
 
 def _env(name: str, default: str | None = None) -> str | None:
@@ -17,12 +26,18 @@ def _env(name: str, default: str | None = None) -> str | None:
     return v
 
 
+def gemini_files_api_enabled() -> bool:
+    return (_env("GEMINI_FILES_API", "") or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
 @dataclass(frozen=True)
 class GeminiConfig:
     api_key: str
     api_base: str = "https://generativelanguage.googleapis.com/v1beta"
     image_model: str = "gemini-3-pro-image-preview"
     video_model: str = "veo-3.1-generate-preview"
+    # Send image references as Files API URIs (uploaded once per content) instead of inline base64.
+    upload_references: bool = False
 
     @staticmethod
     def from_env(
@@ -31,6 +46,7 @@ class GeminiConfig:
         api_base: str | None = None,
         image_model: str | None = None,
         video_model: str | None = None,
+        upload_references: bool | None = None,
     ) -> "GeminiConfig":
         key = api_key or _env("GEMINI_API_KEY")
         if not key:
@@ -40,6 +56,9 @@ class GeminiConfig:
             api_base=api_base or _env("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta") or "",
             image_model=image_model or _env("GEMINI_IMAGE_MODEL", "gemini-3-pro-image-preview") or "",
             video_model=video_model or _env("GEMINI_VIDEO_MODEL", "veo-3.1-generate-preview") or "",
+            upload_references=(
+                upload_references if upload_references is not None else gemini_files_api_enabled()
+            ),
         )
 
 
@@ -54,21 +73,103 @@ def _guess_mime(path: Path) -> str:
     return "application/octet-stream"
 
 
-def _extract_first_inline_image(resp: dict[str, Any]) -> tuple[bytes, str | None]:
-    candidates = resp.get("candidates") or []
-    for cand in candidates:
-        content = cand.get("content") or {}
-        parts = content.get("parts") or []
-        for part in parts:
-            inline = part.get("inlineData") or part.get("inline_data")
-            if not inline:
-                continue
-            b64 = inline.get("data")
-            if not b64:
-                continue
-            mime = inline.get("mimeType") or inline.get("mime_type")
-            return base64.b64decode(b64), mime
-    raise ValueError("No inline image found in Gemini response.")
+def _inline_nodes(obj: Any) -> Iterator[dict[str, Any]]:
+    """Every `inlineData` / `inline_data` object in a parsed response, in document order."""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in ("inlineData", "inline_data") and isinstance(value, dict):
+                yield value
+            else:
+                yield from _inline_nodes(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from _inline_nodes(value)
+
+
+def _redacted(chars: int) -> str:
+    return f"<redacted {chars} chars>"
+
+
+_INLINE_OBJECT = re.compile(rb'"(?:inlineData|inline_data)"\s*:\s*\{')
+_DATA_FIELD = re.compile(rb'"data"\s*:\s*"')
+# Placeholder for the k-th sliced blob; "\u0000" cannot occur in a real base64 value.
+_BLOB_REF = "\x00blob:"
+
+InlineBlob = tuple[dict[str, Any], "memoryview | str"]
+
+
+def _cut_inline_blobs(raw: bytes) -> tuple[Any, list[InlineBlob]]:
+    """
+    Parse `raw` with its base64 blobs sliced out first (no intermediate str or dict copy).
+
+    Returns the parsed body, whose inline `data` values read `<redacted N chars>`, and
+    each blob's owning inline object with its data: a memoryview into `raw`, or a str
+    when the body could not be sliced safely (e.g. escapes inside a blob) and went
+    through a plain `json.loads`.
+    """
+    view = memoryview(raw)
+    pieces: list[bytes | memoryview] = []
+    spans: list[tuple[int, int]] = []
+    pos = 0
+    sliced = True
+    for obj in _INLINE_OBJECT.finditer(raw):
+        if obj.start() < pos:
+            continue
+        field = _DATA_FIELD.search(raw, obj.end())
+        if field is None or raw.find(b"}", obj.end(), field.start()) != -1:
+            continue
+        start = field.end()
+        end = raw.find(b'"', start)
+        if end == -1 or raw.find(b"\\", start, end) != -1:
+            sliced = False
+            break
+        pieces += [view[pos:start], f"\\u0000blob:{len(spans)}".encode("ascii")]
+        spans.append((start, end))
+        pos = end
+    if sliced:
+        pieces.append(view[pos:])
+        body = json.loads(b"".join(pieces))
+    else:
+        body = json.loads(raw)
+    blobs: list[InlineBlob] = []
+    for inline in _inline_nodes(body):
+        data = inline.get("data")
+        if not isinstance(data, str) or not data:
+            continue
+        if sliced and data.startswith(_BLOB_REF):
+            start, end = spans[int(data[len(_BLOB_REF) :])]
+            blobs.append((inline, view[start:end]))
+            inline["data"] = _redacted(end - start)
+        else:
+            blobs.append((inline, data))
+            inline["data"] = _redacted(len(data))
+    return body, blobs
+
+
+def _decode_first_image(blobs: list[InlineBlob]) -> tuple[bytes, str | None]:
+    if not blobs:
+        raise ValueError("No inline image found in Gemini response.")
+    inline, data = blobs[0]
+    return base64.b64decode(data), inline.get("mimeType") or inline.get("mime_type")
+
+
+def parse_image_response(raw: bytes) -> tuple[bytes, str | None, dict[str, Any]]:
+    """
+    Decode the first inline image straight from the raw response body.
+
+    The returned response is already redacted for logging: each `data` holds
+    `<redacted N chars>` (see `_cut_inline_blobs`).
+    """
+    resp, blobs = _cut_inline_blobs(raw)
+    image, mime = _decode_first_image(blobs)
+    return image, mime, resp
+
+
+BATCH_FAILED_STATES = {"BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED"}
+
+
+def _batch_output(batch: dict[str, Any]) -> dict[str, Any]:
+    return batch.get("response") or (batch.get("metadata") or {}).get("output") or {}
 
 
 def _extract_video_uri(operation: dict[str, Any]) -> str:
@@ -94,6 +195,93 @@ class GeminiClient:
     def _headers(self) -> dict[str, str]:
         return {"x-goog-api-key": self.config.api_key}
 
+    def _api_url(self, prefix: str, suffix: str) -> str:
+        """`<scheme>://<host>/<prefix><api path>/<suffix>` (upload/download endpoints share the API version)."""
+        parsed = urllib.parse.urlsplit(self.config.api_base.rstrip("/"))
+        return f"{parsed.scheme}://{parsed.netloc}/{prefix}{parsed.path}/{suffix.lstrip('/')}"
+
+    def upload_file(self, path: Path, *, timeout_seconds: float = 180.0) -> str:
+        """Upload once per file content (Files API); repeated calls reuse the cached `fileUri`."""
+        account = hashlib.sha256(self.config.api_key.encode("utf-8")).hexdigest()[:12]
+        return shared_upload_cache().get_or_upload(
+            f"gemini-files:{self.config.api_base.rstrip('/')}:{account}",
+            path,
+            lambda: self._upload_file(path=path, timeout_seconds=timeout_seconds),
+        )
+
+    def _upload_file(self, *, path: Path, timeout_seconds: float) -> str:
+        mime = _guess_mime(path)
+        body = FileBody(path)
+
+        def start() -> str:
+            with open_response(
+                url=self._api_url("upload", "files"),
+                method="POST",
+                headers={
+                    **self._headers(),
+                    "content-type": "application/json",
+                    "X-Goog-Upload-Protocol": "resumable",
+                    "X-Goog-Upload-Command": "start",
+                    "X-Goog-Upload-Header-Content-Length": str(len(body)),
+                    "X-Goog-Upload-Header-Content-Type": mime,
+                },
+                body=json.dumps({"file": {"display_name": path.name}}).encode("utf-8"),
+                timeout_seconds=timeout_seconds,
+            ) as resp:
+                resp.read()
+                upload_url = resp.headers.get("x-goog-upload-url")
+            if not upload_url:
+                raise ValueError("Gemini Files API did not return an upload URL.")
+            return upload_url
+
+        def finish(upload_url: str) -> dict[str, Any]:
+            with open_response(
+                url=upload_url,
+                method="POST",
+                headers={
+                    **self._headers(),
+                    "Content-Length": str(len(body)),
+                    "X-Goog-Upload-Offset": "0",
+                    "X-Goog-Upload-Command": "upload, finalize",
+                },
+                body=body,
+                timeout_seconds=timeout_seconds,
+            ) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+
+        upload_url = call_with_rate_limit("gemini", "files", start)
+        resp = call_with_rate_limit("gemini", "files", lambda: finish(upload_url))
+        uri = (resp.get("file") or {}).get("uri")
+        if not uri:
+            raise ValueError(f"Gemini Files API upload returned no file uri: {resp}")
+        return str(uri)
+
+    def _reference_part(self, ref: Path) -> dict[str, Any]:
+        ref = prepare_reference(ref, "gemini")
+        mime = _guess_mime(ref)
+        if self.config.upload_references:
+            return {"fileData": {"mimeType": mime, "fileUri": self.upload_file(ref)}}
+        return {"inlineData": {"mimeType": mime, "data": inline_file_base64(ref)}}
+
+    def build_image_request(
+        self,
+        *,
+        prompt: str,
+        aspect_ratio: str = "9:16",
+        image_size: str = "2K",
+        reference_images: list[Path] | None = None,
+    ) -> dict[str, Any]:
+        """`generateContent` request body (also the per-item request of an image batch)."""
+        parts: list[dict[str, Any]] = [{"text": prompt}]
+        parts.extend(self._reference_part(ref) for ref in reference_images or [])
+        return {
+            "contents": [{"parts": parts}],
+            "generationConfig": {
+                "responseModalities": ["Image"],
+                "imageConfig": {"aspectRatio": aspect_ratio, "imageSize": image_size},
+            },
+        }
+
     def generate_image(
         self,
         *,
@@ -104,29 +292,142 @@ class GeminiClient:
         model: str | None = None,
         timeout_seconds: float = 180.0,
     ) -> tuple[bytes, str | None, dict[str, Any]]:
+        """Returns (image bytes, mime type, response with the image data redacted)."""
         model_name = model or self.config.image_model
         url = f"{self.config.api_base.rstrip('/')}/models/{model_name}:generateContent"
-        parts: list[dict[str, Any]] = [{"text": prompt}]
-        for ref in reference_images or []:
-            mime = _guess_mime(ref)
-            b64 = base64.b64encode(ref.read_bytes()).decode("ascii")
-            parts.append({"inlineData": {"mimeType": mime, "data": b64}})
+        payload = self.build_image_request(
+            prompt=prompt, aspect_ratio=aspect_ratio, image_size=image_size, reference_images=reference_images
+        )
+        raw = call_with_rate_limit(
+            "gemini",
+            model_name,
+            lambda: request_bytes(
+                url=url,
+                method="POST",
+                headers={"content-type": "application/json", **self._headers()},
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
+        )
+        return parse_image_response(raw)
+
+    def submit_image_batch(
+        self,
+        *,
+        requests: dict[str, dict[str, Any]],
+        model: str | None = None,
+        display_name: str = "toc-images",
+        timeout_seconds: float = 180.0,
+    ) -> dict[str, Any]:
+        """
+        Submit `build_image_request` bodies (keyed by caller ids) as one Batch API job.
+
+        Returns the batch operation; wait for it with `poll_image_batch(name=resp["name"])`.
+        """
+        model_name = model or self.config.image_model
+        url = f"{self.config.api_base.rstrip('/')}/models/{model_name}:batchGenerateContent"
         payload = {
-            "contents": [{"parts": parts}],
-            "generationConfig": {
-                "responseModalities": ["Image"],
-                "imageConfig": {"aspectRatio": aspect_ratio, "imageSize": image_size},
-            },
+            "batch": {
+                "display_name": display_name,
+                "input_config": {
+                    "requests": {
+                        "requests": [{"request": req, "metadata": {"key": key}} for key, req in requests.items()]
+                    }
+                },
+            }
         }
-        resp = request_json(
-            url=url,
-            method="POST",
-            headers={"content-type": "application/json", **self._headers()},
-            json_payload=payload,
-            timeout_seconds=timeout_seconds,
+        return call_with_rate_limit(
+            "gemini",
+            model_name,
+            lambda: request_json(
+                url=url,
+                method="POST",
+                headers={"content-type": "application/json", **self._headers()},
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
         )
-        image_bytes, mime_type = _extract_first_inline_image(resp)
-        return image_bytes, mime_type, resp
+
+    def poll_image_batch(
+        self, *, name: str, poll_every_seconds: float = 30.0, timeout_seconds: float = 24 * 3600.0
+    ) -> bytes:
+        """
+        Poll an image batch until it is done and return the final body as raw bytes.
+
+        Polls are fetched with `request_bytes`, so the finished batch's inlined images are
+        never parsed into Python strs; hand the result to `read_image_batch`.
+        """
+        url = f"{self.config.api_base.rstrip('/')}/{name.lstrip('/')}"
+
+        def fetch() -> dict[str, Any]:
+            raw = request_bytes(url=url, method="GET", headers=self._headers(), timeout_seconds=180.0)
+            batch, _ = _cut_inline_blobs(raw)
+            return {"done": isinstance(batch, dict) and batch.get("done") is True, "raw": raw}
+
+        done = shared_poller().submit(
+            PollJob(
+                label=f"batch: {name}",
+                fetch=fetch,
+                is_finished=lambda state: state["done"],
+                poll_every_seconds=float(poll_every_seconds),
+                timeout_seconds=float(timeout_seconds),
+            )
+        ).result()
+        return done["raw"]
+
+    def read_image_batch(
+        self,
+        raw: bytes,
+        *,
+        on_image: Callable[[str, bytes, str | None, dict[str, Any]], None],
+        timeout_seconds: float = 600.0,
+    ) -> dict[str, str]:
+        """
+        Hand each image of a finished batch body to `on_image(key, image, mime, response)`.
+
+        Images are decoded one at a time from slices of `raw` (responses are redacted like
+        `generate_image`'s), so only one decoded image is alive at once. Results delivered
+        as a file (`responsesFile`) are downloaded to a temp file and read line by line.
+        Returns the per-request errors keyed like the submitted requests.
+        """
+        batch, blobs = _cut_inline_blobs(raw)
+        state = (batch.get("metadata") or {}).get("state")
+        output = _batch_output(batch)
+        if batch.get("error") or (state in BATCH_FAILED_STATES and not output):
+            raise ValueError(f"Gemini batch {batch.get('name')} failed ({state}): {batch.get('error')}")
+        errors: dict[str, str] = {}
+
+        def take(key: str, item: dict[str, Any], blobs: dict[int, InlineBlob]) -> None:
+            if item.get("error"):
+                errors[key] = json.dumps(item["error"], ensure_ascii=False)
+                return
+            resp = item.get("response") or {}
+            try:
+                image, mime = _decode_first_image([blobs[id(n)] for n in _inline_nodes(resp) if id(n) in blobs])
+            except ValueError as e:
+                errors[key] = str(e)
+                return
+            on_image(key, image, mime, resp)
+
+        by_inline = {id(blob[0]): blob for blob in blobs}
+        for item in (output.get("inlinedResponses") or {}).get("inlinedResponses") or []:
+            take(str((item.get("metadata") or {}).get("key") or ""), item, by_inline)
+        responses_file = output.get("responsesFile")
+        if responses_file:
+            with tempfile.TemporaryDirectory(prefix="toc_gemini_batch_") as td:
+                out = Path(td) / "responses.jsonl"
+                stream_to_file(
+                    url=self._api_url("download", f"{responses_file}:download?alt=media"),
+                    out_path=out,
+                    headers=self._headers(),
+                    timeout_seconds=timeout_seconds,
+                )
+                with out.open("rb") as f:
+                    for line in f:
+                        if line.strip():
+                            item, line_blobs = _cut_inline_blobs(line)
+                            take(str(item.get("key") or ""), item, {id(b[0]): b for b in line_blobs})
+        return errors
 
     def start_video_generation(
         self,
@@ -146,8 +447,9 @@ class GeminiClient:
         url = f"{self.config.api_base.rstrip('/')}/models/{model_name}:predictLongRunning"
         instance: dict[str, Any] = {"prompt": prompt}
         if input_image is not None:
+            input_image = prepare_reference(input_image, "gemini")
             mime = _guess_mime(input_image)
-            b64 = base64.b64encode(input_image.read_bytes()).decode("ascii")
+            b64 = inline_file_base64(input_image)
             if input_image_format == "inlineData":
                 instance["image"] = {"inlineData": {"mimeType": mime, "data": b64}}
             elif input_image_format == "bytesBase64Encoded":
@@ -161,8 +463,9 @@ class GeminiClient:
             # Best-effort: Veo 3.1 may support end-frame conditioning. Field name can vary by API version.
             # Allow override via env for future compatibility.
             end_field = last_frame_field or (_env("GEMINI_VEO_LAST_IMAGE_FIELD", "endImage") or "endImage")
+            last_frame_image = prepare_reference(last_frame_image, "gemini")
             mime = _guess_mime(last_frame_image)
-            b64 = base64.b64encode(last_frame_image.read_bytes()).decode("ascii")
+            b64 = inline_file_base64(last_frame_image)
             if input_image_format == "inlineData":
                 instance[end_field] = {"inlineData": {"mimeType": mime, "data": b64}}
             elif input_image_format == "bytesBase64Encoded":
@@ -181,39 +484,56 @@ class GeminiClient:
                 "resolution": resolution,
             },
         }
-        return request_json(
-            url=url,
-            method="POST",
-            headers={"content-type": "application/json", **self._headers()},
-            json_payload=payload,
-            timeout_seconds=timeout_seconds,
+        return call_with_rate_limit(
+            "gemini",
+            model_name,
+            lambda: request_json(
+                url=url,
+                method="POST",
+                headers={"content-type": "application/json", **self._headers()},
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
         )
 
-    def poll_operation(
+    def watch_operation(
         self,
         *,
         op_name_or_url: str,
         poll_every_seconds: float = 5.0,
         timeout_seconds: float = 900.0,
-    ) -> dict[str, Any]:
+    ) -> concurrent.futures.Future[dict[str, Any]]:
+        """Poll on the shared poller; the future resolves with the finished operation."""
         op_url = (
             op_name_or_url
             if op_name_or_url.startswith("http")
             else f"{self.config.api_base.rstrip('/')}/{op_name_or_url.lstrip('/')}"
         )
-        deadline = time.time() + float(timeout_seconds)
-        while True:
-            op = request_json(url=op_url, method="GET", headers=self._headers(), timeout_seconds=180.0)
-            if op.get("done") is True:
-                return op
-            if time.time() > deadline:
-                raise TimeoutError(f"Timed out waiting for operation: {op_name_or_url}")
-            time.sleep(float(poll_every_seconds))
+        return shared_poller().submit(
+            PollJob(
+                label=f"operation: {op_name_or_url}",
+                fetch=lambda: request_json(url=op_url, method="GET", headers=self._headers(), timeout_seconds=180.0),
+                is_finished=lambda op: op.get("done") is True,
+                poll_every_seconds=float(poll_every_seconds),
+                timeout_seconds=float(timeout_seconds),
+            )
+        )
+
+    def poll_operation(
+        self,
+        *,
+        op_name_or_url: str,
+        poll_every_seconds: float = 5.0,
+        timeout_seconds: float = 900.0,
+    ) -> dict[str, Any]:
+        return self.watch_operation(
+            op_name_or_url=op_name_or_url,
+            poll_every_seconds=poll_every_seconds,
+            timeout_seconds=timeout_seconds,
+        ).result()
 
     def extract_video_uri(self, operation: dict[str, Any]) -> str:
         return _extract_video_uri(operation)
 
     def download_to_file(self, *, uri: str, out_path: Path, timeout_seconds: float = 600.0) -> None:
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        data = request_bytes(url=uri, method="GET", headers=self._headers(), timeout_seconds=timeout_seconds)
-        out_path.write_bytes(data)
+        stream_to_file(url=uri, out_path=out_path, headers=self._headers(), timeout_seconds=timeout_seconds)
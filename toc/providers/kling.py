@@ -1,16 +1,21 @@
 from __future__ import annotations
 
 import base64
+import concurrent.futures
 import hashlib
 import hmac
 import json
 import os
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from toc.http import HttpError, request_bytes, request_json
+from toc.http import HttpError, inline_file_base64, request_json, stream_to_file
+from toc.poller import PollJob, shared_poller
+from toc.ratelimit import call_with_rate_limit
+from toc.refprep import prepare_reference
 
 
 def _env(name: str, default: str | None = None) -> str | None:
@@ -148,7 +153,16 @@ class KlingClient:
         self.config = config
         self._cached_jwt: str | None = None
         self._cached_jwt_exp: int | None = None
-        self._last_status_path_template: str | None = None
+        # Per-thread: a submit and its poll happen on the same worker thread.
+        self._local = threading.local()
+
+    @property
+    def _last_status_path_template(self) -> str | None:
+        return getattr(self._local, "status_path_template", None)
+
+    @_last_status_path_template.setter
+    def _last_status_path_template(self, value: str | None) -> None:
+        self._local.status_path_template = value
 
     @staticmethod
     def from_env(**overrides: Any) -> "KlingClient":
@@ -240,6 +254,10 @@ class KlingClient:
         extra_payload: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
         payload_format = (self.config.payload_format or "official_task").strip().lower()
+        if input_image is not None:
+            input_image = prepare_reference(input_image, "kling")
+        if last_frame_image is not None:
+            last_frame_image = prepare_reference(last_frame_image, "kling")
         if payload_format in {"legacy", "flat"}:
             payload: dict[str, Any] = {
                 "model": model or self.config.video_model,
@@ -255,13 +273,13 @@ class KlingClient:
             if input_image is not None:
                 payload["first_frame_image"] = {
                     "mime_type": _guess_mime(input_image),
-                    "data": base64.b64encode(input_image.read_bytes()).decode("ascii"),
+                    "data": inline_file_base64(input_image),
                 }
 
             if last_frame_image is not None:
                 payload["last_frame_image"] = {
                     "mime_type": _guess_mime(last_frame_image),
-                    "data": base64.b64encode(last_frame_image.read_bytes()).decode("ascii"),
+                    "data": inline_file_base64(last_frame_image),
                 }
 
             if extra_payload:
@@ -283,13 +301,13 @@ class KlingClient:
             if input_image is not None:
                 input_block["first_frame_image"] = {
                     "mime_type": _guess_mime(input_image),
-                    "data": base64.b64encode(input_image.read_bytes()).decode("ascii"),
+                    "data": inline_file_base64(input_image),
                 }
 
             if last_frame_image is not None:
                 input_block["last_frame_image"] = {
                     "mime_type": _guess_mime(last_frame_image),
-                    "data": base64.b64encode(last_frame_image.read_bytes()).decode("ascii"),
+                    "data": inline_file_base64(last_frame_image),
                 }
 
             payload: dict[str, Any] = {"model": model or self.config.video_model, "input": input_block}
@@ -314,14 +332,14 @@ class KlingClient:
 
         # Best-effort: inline base64 images (supported by some official docs).
         if input_image is not None:
-            image_b64 = base64.b64encode(input_image.read_bytes()).decode("ascii")
+            image_b64 = inline_file_base64(input_image)
             payload["image"] = image_b64
             payload["first_frame_image"] = {
                 "mime_type": _guess_mime(input_image),
                 "data": image_b64,
             }
         if last_frame_image is not None:
-            image_tail_b64 = base64.b64encode(last_frame_image.read_bytes()).decode("ascii")
+            image_tail_b64 = inline_file_base64(last_frame_image)
             payload["image_tail"] = image_tail_b64
             payload["last_frame_image"] = {
                 "mime_type": _guess_mime(last_frame_image),
@@ -371,12 +389,16 @@ class KlingClient:
                 or self.config.status_path_template
             )
         self._last_status_path_template = status_template
-        return request_json(
-            url=self._resolve_url(submit_path),
-            method="POST",
-            headers={"content-type": "application/json", **self._headers()},
-            json_payload=payload,
-            timeout_seconds=timeout_seconds,
+        return call_with_rate_limit(
+            "kling",
+            str(payload.get("model_name") or payload.get("model") or self.config.video_model),
+            lambda: request_json(
+                url=self._resolve_url(submit_path),
+                method="POST",
+                headers={"content-type": "application/json", **self._headers()},
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
         )
 
     def extract_operation_id(
@@ -455,7 +477,14 @@ class KlingClient:
             return True
         return False
 
-    def poll_operation(
+    def operation_status_url(self, operation_id_or_url: str) -> str:
+        """Status URL for an operation submitted from this thread (text2video and image2video differ)."""
+        if operation_id_or_url.startswith("http://") or operation_id_or_url.startswith("https://"):
+            return operation_id_or_url
+        status_template = self._last_status_path_template or self.config.status_path_template
+        return self._resolve_url(status_template, operation_id=operation_id_or_url)
+
+    def watch_operation(
         self,
         *,
         operation_id_or_url: str,
@@ -464,30 +493,48 @@ class KlingClient:
         failed_statuses: list[str] | None = None,
         poll_every_seconds: float = 5.0,
         timeout_seconds: float = 900.0,
-    ) -> dict[str, Any]:
-        status_template = self._last_status_path_template or self.config.status_path_template
-        operation_url = (
-            operation_id_or_url
-            if operation_id_or_url.startswith("http://") or operation_id_or_url.startswith("https://")
-            else self._resolve_url(status_template, operation_id=operation_id_or_url)
-        )
-
-        deadline = time.time() + float(timeout_seconds)
-        while True:
-            op = request_json(
-                url=operation_url,
-                method="GET",
-                headers=self._headers(),
-                timeout_seconds=180.0,
+    ) -> concurrent.futures.Future[dict[str, Any]]:
+        """Poll on the shared poller; the future resolves with the done (or failed) operation."""
+        operation_url = self.operation_status_url(operation_id_or_url)
+
+        def is_finished(op: dict[str, Any]) -> bool:
+            return self.is_failed_operation(
+                op, status_paths=status_paths, failed_statuses=failed_statuses
+            ) or self.is_done_operation(op, status_paths=status_paths, done_statuses=done_statuses)
+
+        return shared_poller().submit(
+            PollJob(
+                label=f"operation: {operation_id_or_url}",
+                fetch=lambda: request_json(
+                    url=operation_url,
+                    method="GET",
+                    headers=self._headers(),
+                    timeout_seconds=180.0,
+                ),
+                is_finished=is_finished,
+                poll_every_seconds=float(poll_every_seconds),
+                timeout_seconds=float(timeout_seconds),
             )
-            if self.is_failed_operation(op, status_paths=status_paths, failed_statuses=failed_statuses):
-                return op
-            if self.is_done_operation(op, status_paths=status_paths, done_statuses=done_statuses):
-                return op
+        )
 
-            if time.time() > deadline:
-                raise TimeoutError(f"Timed out waiting for operation: {operation_id_or_url}")
-            time.sleep(float(poll_every_seconds))
+    def poll_operation(
+        self,
+        *,
+        operation_id_or_url: str,
+        status_paths: list[str] | None = None,
+        done_statuses: list[str] | None = None,
+        failed_statuses: list[str] | None = None,
+        poll_every_seconds: float = 5.0,
+        timeout_seconds: float = 900.0,
+    ) -> dict[str, Any]:
+        return self.watch_operation(
+            operation_id_or_url=operation_id_or_url,
+            status_paths=status_paths,
+            done_statuses=done_statuses,
+            failed_statuses=failed_statuses,
+            poll_every_seconds=poll_every_seconds,
+            timeout_seconds=timeout_seconds,
+        ).result()
 
     def extract_video_uri(
         self,
@@ -522,9 +569,8 @@ class KlingClient:
         raise ValueError(f"Video URL value has unsupported type: {type(value).__name__}")
 
     def download_to_file(self, *, uri: str, out_path: Path, timeout_seconds: float = 600.0) -> None:
-        out_path.parent.mkdir(parents=True, exist_ok=True)
         try:
-            data = request_bytes(url=uri, method="GET", headers=self._headers(), timeout_seconds=timeout_seconds)
+            stream_to_file(url=uri, out_path=out_path, headers=self._headers(), timeout_seconds=timeout_seconds)
         except HttpError:
-            data = request_bytes(url=uri, method="GET", headers=None, timeout_seconds=timeout_seconds)
-        out_path.write_bytes(data)
+            # Signed CDN URLs may reject the API auth header.
+            stream_to_file(url=uri, out_path=out_path, headers=None, timeout_seconds=timeout_seconds)
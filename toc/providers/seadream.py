@@ -6,6 +6,7 @@ from dataclasses import dataclass
 from typing import Any
 
 from toc.http import request_bytes, request_json
+from toc.ratelimit import call_with_rate_limit
 
 
 def _env(name: str, default: str | None = None) -> str | None:
@@ -89,12 +90,16 @@ class SeaDreamClient:
         if extra_payload:
             payload.update(extra_payload)
 
-        resp = request_json(
-            url=url,
-            method="POST",
-            headers={"content-type": "application/json", **self._headers()},
-            json_payload=payload,
-            timeout_seconds=timeout_seconds,
+        resp = call_with_rate_limit(
+            "seadream",
+            model_name,
+            lambda: request_json(
+                url=url,
+                method="POST",
+                headers={"content-type": "application/json", **self._headers()},
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
         )
 
         data_list = resp.get("data") or []
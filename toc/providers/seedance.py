@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-import base64
+import concurrent.futures
 import os
-import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from toc.http import request_bytes, request_json
+from toc.http import Base64File, inline_file_base64, request_json, stream_to_file
+from toc.poller import PollJob, shared_poller
+from toc.ratelimit import call_with_rate_limit
+from toc.refprep import prepare_reference
 
 
 def _env(name: str, default: str | None = None) -> str | None:
@@ -28,16 +30,18 @@ def _guess_image_format(path: Path) -> str:
     raise ValueError(f"Unsupported image format: {path.suffix} (expected .png/.jpg/.jpeg/.webp)")
 
 
-def encode_image_as_data_url(path: Path) -> str:
+def encode_image_as_data_url(path: Path) -> str | Base64File:
     """
     Encode a local image as a `data:image/<fmt>;base64,...` URL.
 
     BytePlus ModelArk video generation docs specify this format for base64 image inputs.
+    The image is first reduced to the Seedance reference profile when preparation is enabled.
+    Large files come back as a `Base64File` that is encoded while the request is sent.
     """
 
+    path = prepare_reference(path, "seedance")
     fmt = _guess_image_format(path)
-    b64 = base64.b64encode(path.read_bytes()).decode("ascii")
-    return f"data:image/{fmt};base64,{b64}"
+    return inline_file_base64(path, prefix=f"data:image/{fmt};base64,")
 
 
 def _lookup_path(data: Any, path: str) -> Any:
@@ -137,12 +141,16 @@ class SeedanceClient:
         return f"{self.config.api_base.rstrip('/')}/{path}"
 
     def create_task(self, *, payload: dict[str, Any], timeout_seconds: float = 180.0) -> dict[str, Any]:
-        return request_json(
-            url=self._resolve_url(self.config.submit_path),
-            method="POST",
-            headers={"content-type": "application/json", **self._headers()},
-            json_payload=payload,
-            timeout_seconds=timeout_seconds,
+        return call_with_rate_limit(
+            "seedance",
+            str(payload.get("model") or "") or None,
+            lambda: request_json(
+                url=self._resolve_url(self.config.submit_path),
+                method="POST",
+                headers={"content-type": "application/json", **self._headers()},
+                json_payload=payload,
+                timeout_seconds=timeout_seconds,
+            ),
         )
 
     def get_task(self, *, task_id: str, timeout_seconds: float = 60.0) -> dict[str, Any]:
@@ -153,29 +161,52 @@ class SeedanceClient:
             timeout_seconds=timeout_seconds,
         )
 
-    def poll_task(
+    def watch_task(
         self,
         *,
         task_id: str,
         poll_every_seconds: float = 5.0,
         timeout_seconds: float = 900.0,
-    ) -> dict[str, Any]:
-        start = time.time()
-        last: dict[str, Any] | None = None
-        while True:
-            if time.time() - start > timeout_seconds:
-                raise TimeoutError(f"Seedance task timed out after {timeout_seconds:.1f}s: {task_id}")
-
-            task = self.get_task(task_id=task_id, timeout_seconds=max(60.0, float(poll_every_seconds) * 4.0))
-            last = task
-            status = str(task.get("status") or "").strip().lower()
+    ) -> concurrent.futures.Future[dict[str, Any]]:
+        """Poll on the shared poller; the future resolves with the finished (or failed) task."""
 
-            if status in {"succeeded", "success", "succeed", "completed", "done"}:
-                return task
-            if status in {"failed", "error", "canceled", "cancelled", "rejected"}:
-                return task
+        def is_finished(task: dict[str, Any]) -> bool:
+            status = str(task.get("status") or "").strip().lower()
+            return status in {
+                "succeeded",
+                "success",
+                "succeed",
+                "completed",
+                "done",
+                "failed",
+                "error",
+                "canceled",
+                "cancelled",
+                "rejected",
+            }
+
+        return shared_poller().submit(
+            PollJob(
+                label=f"Seedance task ({timeout_seconds:.1f}s): {task_id}",
+                fetch=lambda: self.get_task(task_id=task_id, timeout_seconds=max(60.0, float(poll_every_seconds) * 4.0)),
+                is_finished=is_finished,
+                poll_every_seconds=max(0.5, float(poll_every_seconds)),
+                timeout_seconds=float(timeout_seconds),
+            )
+        )
 
-            time.sleep(max(0.5, float(poll_every_seconds)))
+    def poll_task(
+        self,
+        *,
+        task_id: str,
+        poll_every_seconds: float = 5.0,
+        timeout_seconds: float = 900.0,
+    ) -> dict[str, Any]:
+        return self.watch_task(
+            task_id=task_id,
+            poll_every_seconds=poll_every_seconds,
+            timeout_seconds=timeout_seconds,
+        ).result()
 
     def is_failed_task(self, task: dict[str, Any]) -> bool:
         status = str(task.get("status") or "").strip().lower()
@@ -194,9 +225,7 @@ class SeedanceClient:
         return str(url)
 
     def download_to_file(self, *, url: str, out_path: Path, timeout_seconds: float = 600.0) -> None:
-        data = request_bytes(url=url, method="GET", headers=self._headers(), timeout_seconds=timeout_seconds)
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_path.write_bytes(data)
+        stream_to_file(url=url, out_path=out_path, headers=self._headers(), timeout_seconds=timeout_seconds)
 
     def build_video_payload(
         self,
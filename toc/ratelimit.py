@@ -0,0 +1,229 @@
+"""
+Per-provider request budgets (token bucket + concurrency cap).
+
+Every provider client wraps its *submit* requests (image generation, video task
+creation, TTS, uploads) in `call_with_rate_limit(provider, model, fn)`. Status polls
+and media downloads are not budgeted.
+
+Limits are keyed by provider+model and resolved in this order:
+
+- env: `TOC_RATE_LIMIT_<PROVIDER>_<MODEL>_RPM` / `..._CONCURRENCY`
+- env: `TOC_RATE_LIMIT_<PROVIDER>_RPM` / `TOC_RATE_LIMIT_<PROVIDER>_CONCURRENCY`
+- `config/system.yaml`: `providers.rate_limits.<provider>.models.<model>.{rpm,concurrency}`
+- `config/system.yaml`: `providers.rate_limits.<provider>.{rpm,concurrency}`
+- `config/system.yaml`: `providers.rate_limits.default.{rpm,concurrency}`
+
+Unset values mean "unlimited". On HTTP 429 the bucket is paused for `Retry-After`
+(or an exponential backoff) and its effective rate is halved; successful calls
+recover it gradually back to the configured rate.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from toc.http import HttpError
+from toc.system_config import config_value, load_system_config
+
+
+T = TypeVar("T")
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_SECONDS = 5.0
+MAX_BACKOFF_SECONDS = 120.0
+
+
+def _env_key(value: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", value.upper()).strip("_")
+
+
+def _as_float(value: Any) -> float | None:
+    if value is None or value == "":
+        return None
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if v > 0 else None
+
+
+def _as_int(value: Any) -> int | None:
+    v = _as_float(value)
+    return int(v) if v is not None else None
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rpm: float | None = None
+    concurrency: int | None = None
+
+
+def resolve_rate_limit(provider: str, model: str | None = None, *, config: dict[str, Any] | None = None) -> RateLimit:
+    cfg = load_system_config(REPO_ROOT) if config is None else config
+    limits = config_value(cfg, "providers.rate_limits", {}) or {}
+    if not isinstance(limits, dict):
+        limits = {}
+    default_cfg = limits.get("default") if isinstance(limits.get("default"), dict) else {}
+    provider_cfg = limits.get(provider) if isinstance(limits.get(provider), dict) else {}
+    models_cfg = provider_cfg.get("models") if isinstance(provider_cfg.get("models"), dict) else {}
+    model_cfg = models_cfg.get(model) if model and isinstance(models_cfg.get(model), dict) else {}
+
+    def pick(field: str) -> Any:
+        prefix = f"TOC_RATE_LIMIT_{_env_key(provider)}"
+        candidates: list[Any] = []
+        if model:
+            candidates.append(os.environ.get(f"{prefix}_{_env_key(model)}_{field.upper()}"))
+        candidates.append(os.environ.get(f"{prefix}_{field.upper()}"))
+        candidates.extend([model_cfg.get(field), provider_cfg.get(field), default_cfg.get(field)])
+        for value in candidates:
+            if value is not None and value != "":
+                return value
+        return None
+
+    return RateLimit(rpm=_as_float(pick("rpm")), concurrency=_as_int(pick("concurrency")))
+
+
+class ProviderLimiter:
+    """Token bucket (refilled at `rpm`/60 per second, burst 1) plus an in-flight cap."""
+
+    def __init__(self, key: str, limit: RateLimit, *, clock: Callable[[], float] = time.monotonic):
+        self.key = key
+        self.limit = limit
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(limit.concurrency) if limit.concurrency else None
+        self._rate = (limit.rpm / 60.0) if limit.rpm else None
+        self._tokens = 1.0
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._strikes = 0
+
+    def _reserve(self) -> float:
+        """Take a token if possible; otherwise return how long to wait."""
+        with self._lock:
+            now = self._clock()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._rate is None:
+                return 0.0
+            self._tokens = min(1.0, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self._rate
+
+    def acquire(self) -> None:
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            while True:
+                wait = self._reserve()
+                if wait <= 0:
+                    return
+                time.sleep(min(wait, 5.0))
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def penalize(self, retry_after_seconds: float | None = None) -> float:
+        """Record a 429: pause the bucket and halve the effective rate. Returns the pause length."""
+        with self._lock:
+            self._strikes += 1
+            pause = retry_after_seconds
+            if pause is None:
+                pause = min(MAX_BACKOFF_SECONDS, DEFAULT_BACKOFF_SECONDS * (2 ** (self._strikes - 1)))
+            now = self._clock()
+            self._blocked_until = max(self._blocked_until, now + float(pause))
+            base = self._rate if self._rate is not None else 1.0 / max(float(pause), 1.0)
+            self._rate = max(base / 2.0, 1.0 / 600.0)
+            self._tokens = 0.0
+            self._updated = now
+            return float(pause)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._strikes = 0
+            if self._rate is None:
+                return
+            target = (self.limit.rpm / 60.0) if self.limit.rpm else None
+            if target is None:
+                # Adaptive-only limiter (no configured rpm): grow back until effectively unlimited.
+                self._rate *= 1.25
+                if self._rate >= 10.0:
+                    self._rate = None
+            elif self._rate < target:
+                self._rate = min(target, self._rate * 1.25)
+
+    @property
+    def effective_rpm(self) -> float | None:
+        with self._lock:
+            return self._rate * 60.0 if self._rate is not None else None
+
+
+_LIMITERS: dict[str, ProviderLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def limiter_for(provider: str, model: str | None = None) -> ProviderLimiter:
+    key = f"{provider}:{model}" if model else provider
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = ProviderLimiter(key, resolve_rate_limit(provider, model))
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+def reset_limiters() -> None:
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
+
+
+def _max_retries() -> int:
+    raw = (os.environ.get("TOC_RATE_LIMIT_MAX_RETRIES") or "").strip()
+    if not raw:
+        return DEFAULT_MAX_RETRIES
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        return DEFAULT_MAX_RETRIES
+
+
+def call_with_rate_limit(provider: str, model: str | None, fn: Callable[[], T]) -> T:
+    """
+    Run `fn` inside the provider+model budget.
+
+    HTTP 429 responses adapt the limiter and are retried (TOC_RATE_LIMIT_MAX_RETRIES,
+    default 4); other errors propagate unchanged.
+    """
+    limiter = limiter_for(provider, model)
+    retries = _max_retries()
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            result = fn()
+        except HttpError as e:
+            if e.status != 429 or attempt >= retries:
+                raise
+            attempt += 1
+            pause = limiter.penalize(e.retry_after_seconds)
+            print(f"[rate-limit] {limiter.key}: HTTP 429, retrying in {pause:.1f}s ({attempt}/{retries})")
+            continue
+        finally:
+            limiter.release()
+        limiter.record_success()
+        return result
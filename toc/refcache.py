@@ -0,0 +1,151 @@
+"""
+Per-process memoization for reference images sent to providers.
+
+- `file_digest`: sha256 of a file, memoized by (path, size, mtime_ns).
+- `encode_file_base64`: base64 text of a file, memoized by content digest (bounded LRU).
+- `UploadCache`: content digest -> uploaded URL with a TTL, shared by every client in
+  the process and optionally persisted to JSON (`TOC_UPLOAD_CACHE_PATH`) so later runs
+  can reuse uploads that have not expired yet. Concurrent requests for the same file
+  wait for a single upload.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+
+DEFAULT_UPLOAD_TTL_SECONDS = 12 * 3600
+DEFAULT_BASE64_CACHE_BYTES = 256 * 1024 * 1024
+
+_digest_lock = threading.Lock()
+_digests: dict[tuple[str, int, int], str] = {}
+
+_b64_lock = threading.Lock()
+_b64: OrderedDict[str, str] = OrderedDict()
+_b64_bytes = 0
+
+
+def file_digest(path: Path) -> str:
+    st = path.stat()
+    memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        cached = _digests.get(memo_key)
+    if cached is not None:
+        return cached
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digest_lock:
+        _digests[memo_key] = digest
+    return digest
+
+
+def encode_file_base64(path: Path) -> str:
+    global _b64_bytes
+    digest = file_digest(path)
+    with _b64_lock:
+        cached = _b64.get(digest)
+        if cached is not None:
+            _b64.move_to_end(digest)
+            return cached
+    encoded = base64.b64encode(path.read_bytes()).decode("ascii")
+    with _b64_lock:
+        if digest not in _b64:
+            _b64[digest] = encoded
+            _b64_bytes += len(encoded)
+            while _b64_bytes > DEFAULT_BASE64_CACHE_BYTES and len(_b64) > 1:
+                _, dropped = _b64.popitem(last=False)
+                _b64_bytes -= len(dropped)
+    return encoded
+
+
+class UploadCache:
+    def __init__(self, *, ttl_seconds: float = DEFAULT_UPLOAD_TTL_SECONDS, persist_path: Path | None = None):
+        self.ttl_seconds = float(ttl_seconds)
+        self.persist_path = persist_path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, float | str]] = {}
+        self._inflight: dict[str, threading.Lock] = {}
+        self._load()
+
+    @staticmethod
+    def from_env() -> "UploadCache":
+        raw_ttl = (os.environ.get("TOC_UPLOAD_CACHE_TTL_SECONDS") or "").strip()
+        try:
+            ttl = float(raw_ttl) if raw_ttl else DEFAULT_UPLOAD_TTL_SECONDS
+        except ValueError:
+            ttl = DEFAULT_UPLOAD_TTL_SECONDS
+        raw_path = (os.environ.get("TOC_UPLOAD_CACHE_PATH") or "").strip()
+        return UploadCache(ttl_seconds=ttl, persist_path=Path(raw_path).expanduser() if raw_path else None)
+
+    def _load(self) -> None:
+        if self.persist_path is None or not self.persist_path.exists():
+            return
+        try:
+            data = json.loads(self.persist_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self._entries = {k: v for k, v in data.items() if isinstance(v, dict) and isinstance(v.get("url"), str)}
+
+    def _save(self) -> None:
+        if self.persist_path is None:
+            return
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(self.persist_path.parent), prefix=".upload-cache-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.persist_path)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - float(entry.get("uploaded_at") or 0.0) > self.ttl_seconds:
+                self._entries.pop(key, None)
+                return None
+            return str(entry["url"])
+
+    def put(self, key: str, url: str) -> None:
+        with self._lock:
+            self._entries[key] = {"url": url, "uploaded_at": time.time()}
+            self._save()
+
+    def get_or_upload(self, namespace: str, path: Path, upload: Callable[[], str]) -> str:
+        key = f"{namespace}:{file_digest(path)}"
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            gate = self._inflight.setdefault(key, threading.Lock())
+        with gate:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+            url = upload()
+            self.put(key, url)
+            return url
+
+
+_shared_uploads: UploadCache | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_upload_cache() -> UploadCache:
+    global _shared_uploads
+    with _shared_lock:
+        if _shared_uploads is None:
+            _shared_uploads = UploadCache.from_env()
+        return _shared_uploads
@@ -0,0 +1,147 @@
+"""
+Per-provider preparation of reference images before they are base64'd into requests.
+
+Generated stills are 2K+ PNGs, but providers condition on much smaller inputs. With
+preparation enabled (`TOC_PREPARE_REFERENCES=1`, or `--prepare-references` on
+generate-assets-from-manifest.py) each reference is downscaled to the provider's
+effective input size (`PROFILES`) and re-encoded as JPEG; images with an alpha channel
+stay PNG. Prepared variants are cached by source content hash + profile:
+
+    <repo>/output/.cache/refprep/<sha[:2]>/<sha>-<profile>.<ext>   (override: TOC_REFPREP_CACHE_DIR)
+
+Encoding uses Pillow when installed, otherwise one ffmpeg call per new variant. If
+neither is available, or the variant is not smaller than the source, the original
+file is sent unchanged.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from toc.imaging import Image, UnsupportedImage, decode, encode, png_has_alpha, resize
+from toc.refcache import file_digest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+PREP_VERSION = 3
+
+
+@dataclass(frozen=True)
+class ReferenceProfile:
+    max_edge: int
+    fmt: str = "jpeg"
+    quality: int = 90
+
+    @property
+    def name(self) -> str:
+        return f"v{PREP_VERSION}-{self.max_edge}-{self.fmt}{self.quality}"
+
+
+PROFILES: dict[str, ReferenceProfile] = {
+    "gemini": ReferenceProfile(max_edge=1536, quality=90),
+    "kling": ReferenceProfile(max_edge=1920, quality=92),
+    "seedance": ReferenceProfile(max_edge=1920, quality=92),
+    "evolink": ReferenceProfile(max_edge=1920, quality=92),
+}
+
+_SUFFIXES = {"jpeg": ".jpg", "png": ".png", "webp": ".webp"}
+
+_lock = threading.Lock()
+_inflight: dict[str, threading.Lock] = {}
+
+
+def prepare_enabled() -> bool:
+    return (os.environ.get("TOC_PREPARE_REFERENCES") or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def prep_signature() -> str | None:
+    """Identifies the active preparation profiles (None when disabled); part of generation cache keys."""
+    if not prepare_enabled():
+        return None
+    return ",".join(f"{provider}={profile.name}" for provider, profile in sorted(PROFILES.items()))
+
+
+def cache_root() -> Path:
+    raw = (os.environ.get("TOC_REFPREP_CACHE_DIR") or "").strip()
+    return Path(raw).expanduser() if raw else (REPO_ROOT / "output" / ".cache" / "refprep")
+
+
+def _fit(width: int, height: int, max_edge: int) -> tuple[int, int]:
+    scale = min(1.0, max_edge / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _prepare_in_process(src: Path, profile: ReferenceProfile, tmp: Path) -> str | None:
+    """Returns the written format, or None when this needs Pillow and it is not installed."""
+    if Image is None:
+        return None
+    raster = decode(src.read_bytes())
+    raster = resize(raster, *_fit(raster.width, raster.height, profile.max_edge))
+    fmt = "png" if raster.channels == 4 else profile.fmt
+    tmp.write_bytes(encode(raster, fmt, quality=profile.quality))
+    return fmt
+
+
+def _prepare_with_ffmpeg(src: Path, profile: ReferenceProfile, tmp: Path) -> str | None:
+    if shutil.which("ffmpeg") is None:
+        return None
+    edge = profile.max_edge
+    scale = f"scale='min({edge},iw)':'min({edge},ih)':force_original_aspect_ratio=decrease"
+    with src.open("rb") as f:
+        alpha = png_has_alpha(f)
+    if alpha:
+        # Keep transparency: downscale only, still PNG.
+        fmt, codec = "png", ["-c:v", "png"]
+    else:
+        # JPEG qscale 2..31 (lower is better); map quality 100..0 onto it.
+        qscale = max(2, min(31, round(31 - (profile.quality / 100) * 29)))
+        fmt, codec = "jpeg", ["-q:v", str(qscale), "-c:v", "mjpeg"]
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", str(src), "-vf", scale, "-frames:v", "1",
+         "-f", "image2", *codec, str(tmp)],
+        check=True,
+    )  # fmt: skip
+    return fmt
+
+
+def prepare_reference(path: Path, provider: str, *, profile: ReferenceProfile | None = None) -> Path:
+    """Path to send for `path` (a cached prepared variant, or `path` itself)."""
+    profile = profile or PROFILES.get(provider)
+    if profile is None or not prepare_enabled() or not path.exists():
+        return path
+    digest = file_digest(path)
+    base = cache_root() / digest[:2] / f"{digest}-{profile.name}"
+    key = str(base)
+    with _lock:
+        gate = _inflight.setdefault(key, threading.Lock())
+    with gate:
+        for suffix in _SUFFIXES.values():
+            done = base.with_name(base.name + suffix)
+            if done.exists():
+                return done if done.stat().st_size < path.stat().st_size else path
+        base.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=str(base.parent), prefix=f".{base.name}.", suffix=".tmp")
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            try:
+                fmt = _prepare_in_process(path, profile, tmp)
+            except UnsupportedImage:
+                fmt = None
+            if fmt is None:
+                fmt = _prepare_with_ffmpeg(path, profile, tmp)
+            if fmt is None or tmp.stat().st_size == 0:
+                return path
+            done = base.with_name(base.name + _SUFFIXES[fmt])
+            os.replace(tmp, done)
+        except (OSError, ValueError, subprocess.CalledProcessError):
+            return path
+        finally:
+            tmp.unlink(missing_ok=True)
+        return done if done.stat().st_size < path.stat().st_size else path
@@ -0,0 +1,298 @@
+"""
+Single-pass ffmpeg command builder for the final render.
+
+`render-video.sh` used to run up to five ffmpeg invocations (concat -> audio prep ->
+mix -> mux -> scale/fps/subtitles) with intermediate files and, with `--reencode`
+plus `--size`, two full video encodes. `build_render_command` instead emits one
+invocation whose filter graph does everything in a single encode:
+
+    input 0: clips.txt (concat demuxer)
+    input 1..: --audio | narration (file or concat list) and/or bgm
+    video: [0:v] scale -> fps -> subtitles  (or stream copy when nothing needs a filter)
+    audio: [bgm] volume -> amix with narration (or a straight map)
+
+Encoder settings come from `RENDER_PRESETS` (software libx264/aac only, so the same
+command works on every machine).
+
+Incremental renders (`SegmentCache`) normalize each clip once (codec, size, fps,
+pix_fmt) into a content-addressed segment keyed by the clip's sha256 plus those
+settings; the final video is then a stream-copy concat of cached segments, so
+regenerating one cut only re-encodes that cut. The cache is capped like the generation
+cache: `TOC_RENDER_SEGMENT_CACHE_MAX_BYTES` (default 10 GiB; 0 disables eviction), least
+recently used segments (by mtime, refreshed on every hit) first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from toc.refcache import file_digest
+
+
+SUBTITLE_STYLE = "FontSize=24,PrimaryColour=&HFFFFFF"
+AUDIO_BITRATE = "192k"
+
+# name -> (x264 preset, crf). "standard" matches the historical render-video.sh output.
+RENDER_PRESETS: dict[str, tuple[str, int]] = {
+    "draft": ("veryfast", 23),
+    "standard": ("medium", 18),
+    "final": ("slow", 16),
+}
+DEFAULT_PRESET = "standard"
+
+# Bump when the normalize command changes so stale segments are not reused.
+SEGMENT_FORMAT_VERSION = 1
+SEGMENT_TIMESCALE = "90000"
+
+
+@dataclass(frozen=True)
+class RenderSpec:
+    clip_list: Path
+    out: Path
+    narration: Path | None = None
+    narration_list: Path | None = None
+    bgm: Path | None = None
+    bgm_volume: str = "0.3"
+    audio: Path | None = None
+    srt: Path | None = None
+    fps: str | None = None
+    size: str | None = None
+    reencode: bool = False
+    preset: str = DEFAULT_PRESET
+
+    def needs_video_filter(self) -> bool:
+        return bool(self.fps or self.size or self.srt)
+
+
+def parse_size(size: str) -> tuple[str, str]:
+    w, sep, h = size.strip().partition("x")
+    if not sep or not w or not h:
+        raise ValueError(f"Invalid --size (expected WxH): {size}")
+    return w, h
+
+
+def escape_filter_path(path: Path | str) -> str:
+    """Escape a path for use as a filter option inside -filter_complex (both quoting levels)."""
+    s = str(path)
+    for ch in ("\\", "'", ":"):
+        s = s.replace(ch, "\\" + ch)
+    for ch in ("\\", "'", "[", "]", ",", ";"):
+        s = s.replace(ch, "\\" + ch)
+    return s
+
+
+def video_filter_chain(spec: RenderSpec) -> str:
+    parts: list[str] = []
+    if spec.size:
+        w, h = parse_size(spec.size)
+        parts.append(f"scale={w}:{h}")
+    if spec.fps:
+        parts.append(f"fps={spec.fps}")
+    if spec.srt:
+        parts.append(f"subtitles={escape_filter_path(spec.srt)}:force_style='{SUBTITLE_STYLE}'")
+    return ",".join(parts)
+
+
+def video_encoder_args(preset: str = DEFAULT_PRESET) -> list[str]:
+    if preset not in RENDER_PRESETS:
+        raise ValueError(f"Unknown render preset: {preset} (choose from {', '.join(RENDER_PRESETS)})")
+    x264_preset, crf = RENDER_PRESETS[preset]
+    return ["-c:v", "libx264", "-preset", x264_preset, "-crf", str(crf), "-pix_fmt", "yuv420p"]
+
+
+def build_render_command(spec: RenderSpec, *, ffmpeg: str = "ffmpeg") -> list[str]:
+    if spec.narration and spec.narration_list:
+        raise ValueError("Use either --narration or --narration-list, not both.")
+
+    cmd: list[str] = [ffmpeg, "-hide_banner", "-y", "-f", "concat", "-safe", "0", "-i", str(spec.clip_list)]
+    next_input = 1
+
+    def add_input(path: Path, *, concat: bool = False) -> int:
+        nonlocal next_input
+        if concat:
+            cmd.extend(["-f", "concat", "-safe", "0"])
+        cmd.extend(["-i", str(path)])
+        next_input += 1
+        return next_input - 1
+
+    audio_idx: int | None = None
+    narration_idx: int | None = None
+    bgm_idx: int | None = None
+    if spec.audio:
+        audio_idx = add_input(spec.audio)
+    else:
+        if spec.narration_list:
+            narration_idx = add_input(spec.narration_list, concat=True)
+        elif spec.narration:
+            narration_idx = add_input(spec.narration)
+        if spec.bgm:
+            bgm_idx = add_input(spec.bgm)
+
+    graph: list[str] = []
+    video_map = "0:v:0"
+    chain = video_filter_chain(spec)
+    if chain:
+        graph.append(f"[0:v]{chain}[v]")
+        video_map = "[v]"
+
+    audio_map: str | None
+    if audio_idx is not None:
+        audio_map = f"{audio_idx}:a:0"
+    elif narration_idx is not None and bgm_idx is not None:
+        graph.append(f"[{bgm_idx}:a]volume={spec.bgm_volume}[bgm]")
+        graph.append(f"[{narration_idx}:a][bgm]amix=inputs=2:duration=first:dropout_transition=2[a]")
+        audio_map = "[a]"
+    elif narration_idx is not None:
+        audio_map = f"{narration_idx}:a:0"
+    elif bgm_idx is not None:
+        audio_map = f"{bgm_idx}:a:0"
+    else:
+        audio_map = None
+
+    if graph:
+        cmd.extend(["-filter_complex", ";".join(graph)])
+    cmd.extend(["-map", video_map])
+    if audio_map is not None:
+        # External audio always replaces any audio embedded in the clips.
+        cmd.extend(["-map", audio_map])
+    else:
+        cmd.extend(["-map", "0:a?"])
+
+    if chain or spec.reencode:
+        cmd.extend(video_encoder_args(spec.preset))
+    else:
+        cmd.extend(["-c:v", "copy"])
+
+    if audio_map is not None:
+        cmd.extend(["-c:a", "aac", "-b:a", AUDIO_BITRATE, "-shortest"])
+    elif chain or spec.reencode:
+        cmd.extend(["-c:a", "aac"])
+    else:
+        cmd.extend(["-c:a", "copy"])
+
+    cmd.append(str(spec.out))
+    return cmd
+
+
+def read_concat_list(path: Path) -> list[Path]:
+    """`file '...'` entries of an ffmpeg concat list (relative paths resolve against the list)."""
+    clips: list[Path] = []
+    for raw in path.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line.startswith("file "):
+            continue
+        value = line[len("file ") :].strip()
+        if len(value) >= 2 and value[0] == value[-1] == "'":
+            value = value[1:-1].replace("'\\''", "'")
+        clip = Path(value)
+        clips.append(clip if clip.is_absolute() else path.parent / clip)
+    return clips
+
+
+def write_concat_list(paths: list[Path], out_path: Path) -> None:
+    lines = ["file '" + str(p.resolve()).replace("'", "'\\''") + "'" for p in paths]
+    out_path.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+
+
+def supports_incremental(spec: RenderSpec) -> bool:
+    """Segments are video-only and subtitles span cuts: clip audio or --srt needs a full render."""
+    has_external_audio = bool(spec.audio or spec.narration or spec.narration_list or spec.bgm)
+    return has_external_audio and not spec.srt
+
+
+DEFAULT_SEGMENT_CACHE_MAX_BYTES = 10 * 1024**3
+
+
+class SegmentCache:
+    def __init__(self, root: Path, *, max_bytes: int | None = DEFAULT_SEGMENT_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes if max_bytes and max_bytes > 0 else None
+
+    @staticmethod
+    def from_env(repo_root: Path, *, root: Path | None = None) -> "SegmentCache":
+        if root is None:
+            raw_root = (os.environ.get("TOC_RENDER_SEGMENT_CACHE_DIR") or "").strip()
+            root = Path(raw_root).expanduser() if raw_root else (repo_root / "output" / ".cache" / "segments")
+        raw_max = (os.environ.get("TOC_RENDER_SEGMENT_CACHE_MAX_BYTES") or "").strip()
+        try:
+            max_bytes = int(raw_max) if raw_max else DEFAULT_SEGMENT_CACHE_MAX_BYTES
+        except ValueError:
+            max_bytes = DEFAULT_SEGMENT_CACHE_MAX_BYTES
+        return SegmentCache(root, max_bytes=max_bytes)
+
+    @staticmethod
+    def segment_key(clip: Path, spec: RenderSpec) -> str:
+        doc = {
+            "version": SEGMENT_FORMAT_VERSION,
+            "source": file_digest(clip),
+            "size": spec.size,
+            "fps": spec.fps,
+            "encoder": video_encoder_args(spec.preset),
+        }
+        blob = json.dumps(doc, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def segment_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.mp4"
+
+    def lookup(self, clip: Path, spec: RenderSpec) -> tuple[Path, bool]:
+        """(segment path, already cached)."""
+        seg = self.segment_path(self.segment_key(clip, spec))
+        cached = seg.exists() and seg.stat().st_size > 0
+        if cached:
+            try:
+                os.utime(seg)
+            except OSError:
+                pass
+        return seg, cached
+
+    def evict(self, *, keep: set[Path] | None = None) -> int:
+        """Drop least-recently-used segments (never `keep`) until the cache fits `max_bytes`. Returns bytes freed."""
+        if self.max_bytes is None:
+            return 0
+        entries: list[tuple[float, int, Path]] = []
+        total = 0
+        for p in self.root.glob("*/*.mp4"):
+            if p.name.startswith(".tmp-") or not p.is_file():
+                continue
+            st = p.stat()
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        freed = 0
+        for _, size, p in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            if keep and p in keep:
+                continue
+            p.unlink(missing_ok=True)
+            freed += size
+        return freed
+
+
+def build_normalize_command(clip: Path, out: Path, spec: RenderSpec, *, ffmpeg: str = "ffmpeg") -> list[str]:
+    """Encode one clip into a concat-compatible, video-only segment."""
+    cmd = [ffmpeg, "-hide_banner", "-y", "-i", str(clip)]
+    chain = video_filter_chain(RenderSpec(clip_list=clip, out=out, size=spec.size, fps=spec.fps))
+    if chain:
+        cmd.extend(["-vf", chain])
+    cmd.extend(video_encoder_args(spec.preset))
+    cmd.extend(["-an", "-video_track_timescale", SEGMENT_TIMESCALE, "-f", "mp4", str(out)])
+    return cmd
+
+
+def segment_render_spec(spec: RenderSpec, segment_list: Path) -> RenderSpec:
+    """The final pass over cached segments: no filters, stream-copied video."""
+    return RenderSpec(
+        clip_list=segment_list,
+        out=spec.out,
+        narration=spec.narration,
+        narration_list=spec.narration_list,
+        bgm=spec.bgm,
+        bgm_volume=spec.bgm_volume,
+        audio=spec.audio,
+        preset=spec.preset,
+    )
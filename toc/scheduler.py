@@ -0,0 +1,125 @@
+"""Dependency-aware task graph executed on a thread pool."""
+
+from __future__ import annotations
+
+import concurrent.futures
+import heapq
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+
+@dataclass
+class TaskNode:
+    key: str
+    fn: Callable[[], Any]
+    deps: set[str] = field(default_factory=set)
+    label: str | None = None
+
+
+class TaskGraph:
+    """
+    A small DAG of callables.
+
+    - Nodes are run once all of their dependencies finished successfully.
+    - Dependencies on keys that are not part of the graph are ignored (the artifact
+      is expected to exist already, e.g. generated by a previous run).
+    - The first failure stops scheduling new nodes; running nodes are awaited and the
+      original exception (including SystemExit) is re-raised.
+    """
+
+    def __init__(self) -> None:
+        self._nodes: dict[str, TaskNode] = {}
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, key: str, fn: Callable[[], Any], *, deps: Iterable[str] = (), label: str | None = None) -> TaskNode:
+        if key in self._nodes:
+            raise ValueError(f"Duplicate task key: {key}")
+        node = TaskNode(key=key, fn=fn, deps={d for d in deps if d and d != key}, label=label)
+        self._nodes[key] = node
+        return node
+
+    def add_dependency(self, key: str, dep: str) -> None:
+        if dep and dep != key:
+            self._nodes[key].deps.add(dep)
+
+    def _resolved_deps(self, node: TaskNode) -> set[str]:
+        return {d for d in node.deps if d in self._nodes}
+
+    def topological_order(self) -> list[str]:
+        """Stable topological order (insertion order among ready nodes)."""
+        index = {key: i for i, key in enumerate(self._nodes)}
+        indegree = {key: len(self._resolved_deps(node)) for key, node in self._nodes.items()}
+        dependents: dict[str, list[str]] = {key: [] for key in self._nodes}
+        for key, node in self._nodes.items():
+            for dep in self._resolved_deps(node):
+                dependents[dep].append(key)
+
+        ready = [index[key] for key, n in indegree.items() if n == 0]
+        heapq.heapify(ready)
+        keys = list(self._nodes)
+        order: list[str] = []
+        while ready:
+            key = keys[heapq.heappop(ready)]
+            order.append(key)
+            for child in dependents[key]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    heapq.heappush(ready, index[child])
+        if len(order) != len(keys):
+            stuck = sorted(key for key, n in indegree.items() if n > 0)
+            raise ValueError(f"Task graph has a cycle among: {stuck}")
+        return order
+
+    def critical_path_length(self) -> int:
+        depth: dict[str, int] = {}
+        for key in self.topological_order():
+            deps = self._resolved_deps(self._nodes[key])
+            depth[key] = 1 + max((depth[d] for d in deps), default=0)
+        return max(depth.values(), default=0)
+
+    def run(self, *, max_workers: int = 1) -> None:
+        order = self.topological_order()
+        if max_workers <= 1:
+            for key in order:
+                self._nodes[key].fn()
+            return
+
+        deps_left = {key: set(self._resolved_deps(self._nodes[key])) for key in order}
+        dependents: dict[str, list[str]] = {key: [] for key in order}
+        for key, deps in deps_left.items():
+            for dep in deps:
+                dependents[dep].append(key)
+
+        position = {key: i for i, key in enumerate(order)}
+        ready = [position[key] for key in order if not deps_left[key]]
+        heapq.heapify(ready)
+        running: dict[concurrent.futures.Future[Any], str] = {}
+        failure: BaseException | None = None
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="toc-task") as pool:
+            while ready or running:
+                while ready and failure is None:
+                    key = order[heapq.heappop(ready)]
+                    running[pool.submit(self._nodes[key].fn)] = key
+                if not running:
+                    break
+                finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for fut in finished:
+                    key = running.pop(fut)
+                    exc = fut.exception()
+                    if exc is not None:
+                        if failure is None:
+                            failure = exc
+                        continue
+                    for child in dependents[key]:
+                        deps_left[child].discard(key)
+                        if not deps_left[child]:
+                            heapq.heappush(ready, position[child])
+
+        if failure is not None:
+            raise failure
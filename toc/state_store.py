@@ -0,0 +1,263 @@
+"""
+SQLite-backed run state (WAL mode), one database per run dir:
+
+    <run_dir>/state.sqlite3
+      snapshots(seq, ts)                 one row per update
+      changes(seq, key, value)           keys written by that update (indexed by key)
+      current(key, value, seq)           merged state (last write wins)
+      meta(key, value)                   bookkeeping (state.txt mirror offset)
+
+Each `update` is one `BEGIN IMMEDIATE` transaction, so concurrent writers serialize
+instead of interleaving, and only the changed keys are written (no history re-parse).
+`state.txt` (append-only key=value blocks) and `run_status.json` are still produced
+for compatibility: every update appends its merged snapshot block to `state.txt` and
+rewrites `run_status.json` while holding the write lock.
+
+`state.txt` stays authoritative for anything the store did not write itself: blocks
+appended by other tools are imported on the next update. When the file's size or
+mtime moved since the last sync, a sha256 of the previously synced prefix tells an
+append from an edit; a truncated or edited file (even a same-length edit) triggers a
+full re-import.
+
+Disable with `TOC_STATE_STORE=0` (falls back to the plain text append).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from toc.harness import format_state_block, new_job_id, now_iso, sync_run_status
+
+try:
+    import sqlite3
+except Exception:  # pragma: no cover - optional import fallback (Python built without sqlite)
+    sqlite3 = None  # type: ignore[assignment]
+
+
+DB_NAME = "state.sqlite3"
+SCHEMA_VERSION = 1
+BUSY_TIMEOUT_SECONDS = 30.0
+_DIGEST_CHUNK_BYTES = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS snapshots(seq INTEGER PRIMARY KEY AUTOINCREMENT, ts TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS changes(
+    seq INTEGER NOT NULL REFERENCES snapshots(seq),
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY(seq, key)
+);
+CREATE INDEX IF NOT EXISTS changes_key_seq ON changes(key, seq);
+CREATE TABLE IF NOT EXISTS current(key TEXT PRIMARY KEY, value TEXT NOT NULL, seq INTEGER NOT NULL);
+"""
+
+
+def store_enabled() -> bool:
+    if sqlite3 is None:
+        return False
+    return (os.environ.get("TOC_STATE_STORE") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def parse_state_blocks(text: str) -> list[dict[str, str]]:
+    """Split state.txt content into its `---`-separated key=value blocks."""
+    blocks: list[dict[str, str]] = []
+    cur: dict[str, str] = {}
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line == "---":
+            if cur:
+                blocks.append(cur)
+            cur = {}
+            continue
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        key = key.strip()
+        if key:
+            cur[key] = value.strip()
+    if cur:
+        blocks.append(cur)
+    return blocks
+
+
+@dataclass(frozen=True)
+class StateChange:
+    seq: int
+    ts: str
+    key: str
+    value: str
+
+
+class StateStore:
+    def __init__(self, state_path: Path, *, timeout_seconds: float = BUSY_TIMEOUT_SECONDS):
+        self.state_path = state_path
+        self.run_dir = state_path.parent
+        self.db_path = self.run_dir / DB_NAME
+        self.timeout_seconds = timeout_seconds
+
+    @staticmethod
+    def for_run_dir(run_dir: Path) -> "StateStore":
+        return StateStore(run_dir / "state.txt")
+
+    @contextmanager
+    def _connect(self) -> Iterator["sqlite3.Connection"]:
+        if sqlite3 is None:
+            raise RuntimeError("sqlite3 is not available in this Python build.")
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=self.timeout_seconds, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write(self) -> Iterator["sqlite3.Connection"]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # --- state.txt mirror ---
+
+    @staticmethod
+    def _meta(conn: "sqlite3.Connection", key: str) -> str | None:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: "sqlite3.Connection", key: str, value: str) -> None:
+        conn.execute("INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    @staticmethod
+    def _insert_snapshot(conn: "sqlite3.Connection", ts: str, changes: dict[str, str]) -> int:
+        seq = int(conn.execute("INSERT INTO snapshots(ts) VALUES(?)", (ts,)).lastrowid)
+        conn.executemany("INSERT INTO changes(seq, key, value) VALUES(?, ?, ?)", [(seq, k, v) for k, v in changes.items()])
+        conn.executemany(
+            "INSERT INTO current(key, value, seq) VALUES(?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, seq = excluded.seq",
+            [(k, v, seq) for k, v in changes.items()],
+        )
+        return seq
+
+    def _text_digest(self, end: int) -> str:
+        """sha256 of the first `end` bytes of state.txt."""
+        h = hashlib.sha256()
+        with self.state_path.open("rb") as f:
+            remaining = end
+            while remaining > 0:
+                chunk = f.read(min(remaining, _DIGEST_CHUNK_BYTES))
+                if not chunk:
+                    break
+                h.update(chunk)
+                remaining -= len(chunk)
+        return h.hexdigest()
+
+    def _mark_text_synced(self, conn: "sqlite3.Connection") -> None:
+        st = self.state_path.stat()
+        self._set_meta(conn, "text_size", str(st.st_size))
+        self._set_meta(conn, "text_mtime_ns", str(st.st_mtime_ns))
+        self._set_meta(conn, "text_sha256", self._text_digest(st.st_size))
+
+    def _import_text(self, conn: "sqlite3.Connection") -> None:
+        """Bring the store up to date with blocks written to state.txt by other tools."""
+        try:
+            st = self.state_path.stat()
+        except FileNotFoundError:
+            # Nothing to import; `export` / the next update recreates the file.
+            return
+        size = st.st_size
+        recorded = int(self._meta(conn, "text_size") or 0)
+        if size == recorded and str(st.st_mtime_ns) == self._meta(conn, "text_mtime_ns"):
+            return
+        start = recorded
+        if size < recorded or (recorded and self._text_digest(recorded) != self._meta(conn, "text_sha256")):
+            # Truncated or edited: rebuild from scratch.
+            conn.execute("DELETE FROM changes")
+            conn.execute("DELETE FROM current")
+            conn.execute("DELETE FROM snapshots")
+            start = 0
+        elif size == recorded:
+            # Touched but unchanged.
+            self._mark_text_synced(conn)
+            return
+        with self.state_path.open("rb") as f:
+            f.seek(start)
+            tail = f.read().decode("utf-8", errors="replace")
+        for block in parse_state_blocks(tail):
+            self._insert_snapshot(conn, block.get("timestamp") or now_iso(), block)
+        self._mark_text_synced(conn)
+
+    # --- public API ---
+
+    def update(self, updates: dict[str, str]) -> dict[str, str]:
+        """Atomically merge `updates`, mirror to state.txt/run_status.json, return the merged state."""
+        cleaned = {key: value.replace("\n", " ").strip() for key, value in updates.items()}
+        with self._write() as conn:
+            self._set_meta(conn, "schema_version", str(SCHEMA_VERSION))
+            self._import_text(conn)
+            merged = dict(conn.execute("SELECT key, value FROM current").fetchall())
+            if not (merged.get("job_id") or "").strip() and not (cleaned.get("job_id") or "").strip():
+                cleaned["job_id"] = new_job_id()
+            if not (merged.get("status") or "").strip() and not (cleaned.get("status") or "").strip():
+                cleaned["status"] = "INIT"
+            cleaned["timestamp"] = now_iso()
+            self._insert_snapshot(conn, cleaned["timestamp"], cleaned)
+            merged.update(cleaned)
+
+            with self.state_path.open("a", encoding="utf-8") as handle:
+                handle.write(format_state_block(merged))
+            self._mark_text_synced(conn)
+            sync_run_status(self.run_dir, merged)
+        return merged
+
+    def current(self) -> dict[str, str]:
+        with self._write() as conn:
+            self._import_text(conn)
+            return dict(conn.execute("SELECT key, value FROM current").fetchall())
+
+    def history(self, key: str | None = None, *, limit: int | None = None) -> list[StateChange]:
+        """Changes newest first, optionally for one key (uses the key index)."""
+        with self._write() as conn:
+            self._import_text(conn)
+            sql = "SELECT c.seq, s.ts, c.key, c.value FROM changes c JOIN snapshots s ON s.seq = c.seq"
+            params: list[object] = []
+            if key is not None:
+                sql += " WHERE c.key = ?"
+                params.append(key)
+            sql += " ORDER BY c.seq DESC, c.key"
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(int(limit))
+            return [StateChange(*row) for row in conn.execute(sql, params).fetchall()]
+
+    def export(self) -> tuple[Path, Path]:
+        """Rewrite state.txt (one cumulative block per update) and run_status.json from the store."""
+        with self._write() as conn:
+            self._import_text(conn)
+            merged: dict[str, str] = {}
+            parts: list[str] = []
+            seq_changes: dict[int, dict[str, str]] = {}
+            for seq, key, value in conn.execute("SELECT seq, key, value FROM changes ORDER BY seq").fetchall():
+                seq_changes.setdefault(int(seq), {})[key] = value
+            for seq in sorted(seq_changes):
+                merged.update(seq_changes[seq])
+                parts.append(format_state_block(merged))
+            tmp = self.state_path.with_name(f".{self.state_path.name}.tmp")
+            tmp.write_text("".join(parts), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+            self._mark_text_synced(conn)
+            status_path = sync_run_status(self.run_dir, merged)
+        return self.state_path, status_path
@@ -0,0 +1,55 @@
+"""Read defaults from `config/system.yaml`."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+try:
+    import yaml  # type: ignore
+except Exception:  # pragma: no cover - optional import fallback
+    yaml = None
+
+
+DEFAULT_MAX_WORKERS = 2
+
+
+def system_config_path(repo_root: Path) -> Path:
+    return repo_root / "config" / "system.yaml"
+
+
+def load_system_config(repo_root: Path) -> dict[str, Any]:
+    path = system_config_path(repo_root)
+    if yaml is None or not path.exists():
+        return {}
+    try:
+        data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def config_value(config: dict[str, Any], dotted_key: str, default: Any = None) -> Any:
+    cur: Any = config
+    for part in dotted_key.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return default
+        cur = cur[part]
+    return cur
+
+
+def configured_max_workers(repo_root: Path) -> int:
+    """
+    Resolve the worker count for in-process concurrency.
+
+    Order: TOC_MAX_WORKERS env > config/system.yaml execution.concurrency.max_workers > default.
+    """
+    raw = os.environ.get("TOC_MAX_WORKERS")
+    if raw is None or raw.strip() == "":
+        raw = config_value(load_system_config(repo_root), "execution.concurrency.max_workers", DEFAULT_MAX_WORKERS)
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_WORKERS
+    return max(1, value)